@@ -7,36 +7,60 @@ from __future__ import (absolute_import, print_function,
                         division)
 
 import argparse
+import importlib
 import sys
-import sqlalchemy
 
 from .command import Command, SmartFormatter
-from .cmd_run import Run
-from .cmd_debug import Debug
-from .cmd_import import Import
-from .cmd_push import Push
-from .cmd_pull import Pull
-from .cmd_list import List
-from .cmd_show import Show
-from .cmd_diff import Diff
-from .cmd_dataflow import Dataflow
-from .cmd_export import Export
-from .cmd_restore import Restore
-from .cmd_vis import Vis
-from .cmd_demo import Demo
-from .cmd_helper import Helper
-from .cmd_history import History
-from .cmd_prov import Prov
-from .cmd_prospective import Prospective
-from .cmd_schema import Schema
-from .cmd_kernel import Kernel
-from .cmd_gc import GC
-from .cmd_evaluation import Evaluation
-from .cmd_clean import Clean
-from .cmd_ast import Ast
 from ..utils.io import print_msg
 
 
+# Command name -> (module, class). Modules are imported on demand
+COMMANDS = [
+    ("run", "cmd_run", "Run"),
+    ("debug", "cmd_debug", "Debug"),
+    ("list", "cmd_list", "List"),
+    ("show", "cmd_show", "Show"),
+    ("diff", "cmd_diff", "Diff"),
+    ("dataflow", "cmd_dataflow", "Dataflow"),
+    ("export", "cmd_export", "Export"),
+    ("import", "cmd_import", "Import"),
+    ("push", "cmd_push", "Push"),
+    ("pull", "cmd_pull", "Pull"),
+    ("restore", "cmd_restore", "Restore"),
+    ("vis", "cmd_vis", "Vis"),
+    ("demo", "cmd_demo", "Demo"),
+    ("helper", "cmd_helper", "Helper"),
+    ("history", "cmd_history", "History"),
+    ("prov", "cmd_prov", "Prov"),
+    ("prospective", "cmd_prospective", "Prospective"),
+    ("schema", "cmd_schema", "Schema"),
+    ("kernel", "cmd_kernel", "Kernel"),
+    ("gc", "cmd_gc", "GC"),
+    ("evaluation", "cmd_evaluation", "Evaluation"),
+    ("clean", "cmd_clean", "Clean"),
+    ("ast", "cmd_ast", "Ast"),
+]
+CLASSES = {cls: module for _, module, cls in COMMANDS}
+
+
+def load_command(module, cls):
+    """Import command module and return command class"""
+    return getattr(importlib.import_module("." + module, __name__), cls)
+
+
+def selected_commands(argv):
+    """Return commands that must be imported to parse argv
+    Return all commands if argv does not select a single one"""
+    names = {name: (module, cls) for name, module, cls in COMMANDS}
+    for arg in argv:
+        if arg.startswith("-"):
+            continue
+        if arg in names:
+            return [names[arg]]
+        break
+    return [(module, cls) for _, module, cls in COMMANDS]
+
+
 def main():
     """Main function"""
     from ..utils.functions import version
@@ -45,48 +69,37 @@ def main():
     parser.add_argument("-v", "--version", action="version",
                         version="noWorkflow {}".format(version()))
     subparsers = parser.add_subparsers(metavar="")
-    commands = [
-        Run(),
-        Debug(),
-        List(),
-        Show(),
-        Diff(),
-        Dataflow(),
-        Export(),
-        Import(),
-        Push(),
-        Pull(),
-        Restore(),
-        Vis(),
-        Demo(),
-        Helper(),
-        History(),
-        Prov(),
-        Prospective(),
-        Schema(),
-        Kernel(),
-        GC(),
-        Evaluation(),
-        Clean(),
-        Ast()
-
-    ]
-    for cmd in commands:
-        cmd.create_parser(subparsers)
 
     if len(sys.argv) == 1:
         sys.argv.append("-h")
 
+    for module, cls in selected_commands(sys.argv[1:]):
+        load_command(module, cls)().create_parser(subparsers)
+
     try:
         args, _ = parser.parse_known_args()
         args.func(args)
     except RuntimeError as exc:
         print_msg(exc, True)
-    except sqlalchemy.exc.OperationalError as exc:
+    except Exception as exc:                                                     # pylint: disable=broad-except
+        # Do not import sqlalchemy before the command needs it
+        sqlalchemy = sys.modules.get("sqlalchemy")
+        if sqlalchemy is None or not isinstance(
+                exc, sqlalchemy.exc.OperationalError):
+            raise
         print_msg("invalid noWorkflow database", True)
         print_msg("it is probably outdated", True)
 
 
+def __getattr__(name):
+    """Import command classes on first access"""
+    if name in CLASSES:
+        return load_command(CLASSES[name], name)
+    raise AttributeError("module {!r} has no attribute {!r}".format(
+        __name__, name
+    ))
+
+
 __all__ = [
     "Command",
     "Run",
@@ -37,6 +37,8 @@ class Clean(Command):
                 help="Also restore code cells from previous notebook during merge")
         add_arg("--add-empty", action="store_true",
                 help="Add empty code cell in the end")
+        add_arg("--graph-index", action="store_true",
+                help="Navigate dependencies on the compiled graph index of the trial")
         add_query_arguments(add_arg)
                 
         add_arg("--dir", type=str,
@@ -52,11 +54,19 @@ class Clean(Command):
         trial = Trial(trial_ref=args.trial)
         result = list(proxy_gen(query_evaluations(args)))
 
-        from ..models.dependency_querier import PreloadedQuerierOptions
         from ..models.cleaning import get_cells, create_clean, create_merged_from_cells
-        options = PreloadedQuerierOptions(trial, visit_out=False)
-       
-        cells = get_cells(result, options)
+        if args.graph_index:
+            from ..models.dependency_querier import QuerierOptions
+            from ..models.dependency_querier import IndexedQuerier, load_graph_index
+            querier = IndexedQuerier(
+                load_graph_index(trial), QuerierOptions(visit_out=False),
+                {evaluation.id: evaluation for evaluation in trial.evaluations}
+            )
+            cells = get_cells(result, querier=querier)
+        else:
+            from ..models.dependency_querier import PreloadedQuerierOptions
+            options = PreloadedQuerierOptions(trial, visit_out=False)
+            cells = get_cells(result, options)
         if not cells:
             print("Trial {} is not a notebook trial".format(args.trial))
             return
@@ -11,6 +11,7 @@ import os
 from ..models.dependency_graph.config import DependencyConfig
 from ..persistence.models import Trial
 from ..persistence import persistence_config
+from ..persistence.trial_data import TrialData
 
 from .command import Command
 
@@ -52,6 +53,7 @@ class Dataflow(Command):
         persistence_config.content_engine = args.content_engine
         persistence_config.connect_existing(args.dir or os.getcwd())
         trial = Trial(trial_ref=args.trial)
+        trial.trial_data = TrialData(trial)
         trial.dependency_config.read_args(args)
         trial.dot.value_length = args.value_length
         trial.dot.name_length = args.name_length
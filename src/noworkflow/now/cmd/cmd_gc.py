@@ -8,8 +8,10 @@ from __future__ import (absolute_import, print_function,
 
 import os
 
+from os.path import join, isdir
+
 from ..persistence.models import Trial
-from ..persistence import persistence_config
+from ..persistence import persistence_config, code_cache
 from ..utils.io import print_msg
 from ..persistence import content
 
@@ -28,8 +30,42 @@ class GC(Command):
                 help="executes aggressively the garbage collection in the content database")
         add_arg("--content-engine", type=str,
                 help="set the content database engine")
+        add_arg("--pack", action="store_true",
+                help="move the plain content directory into pack files")
+        add_arg("--recompress", action="store_true",
+                help="rewrite stored contents with the --compression codec")
+        add_arg("--compression", choices=["none", "zlib", "zstd", "lz4"],
+                help="set the compression codec of stored contents")
+        add_arg("--compression-threshold", type=int,
+                help="store contents smaller than it without compression")
 
     def execute(self, args):
         persistence_config.content_engine = args.content_engine
+        if args.pack:
+            persistence_config.content_engine = args.content_engine or "pack"
+        if args.compression is not None:
+            persistence_config.content_compression = args.compression
+        if args.compression_threshold is not None:
+            persistence_config.compression_threshold = args.compression_threshold
         persistence_config.connect_existing(args.dir or os.getcwd())
+        if args.pack:
+            from ..persistence.content.plain_engine import STANDARD_DATABASE_DIR
+            plain_path = join(
+                persistence_config.provenance_path, STANDARD_DATABASE_DIR
+            )
+            if isdir(plain_path):
+                count = content.import_plain(plain_path)
+                print_msg("moved {} blobs into pack files".format(count), True)
+        if args.recompress:
+            try:
+                count, before, after = content.recompress()
+                print_msg("recompressed {} blobs: {} -> {} bytes".format(
+                    count, before, after
+                ), True)
+            except NotImplementedError:
+                print_msg("the content engine does not support --recompress",
+                          True)
         content.gc()
+        removed = code_cache.prune()
+        if removed:
+            print_msg("removed {} code cache entries".format(removed), True)
@@ -20,6 +20,7 @@ from .cmd_history import History
 from .cmd_show import Show
 
 from ..models.prov.export import export_prov
+from ..persistence.trial_data import TrialData
 
 
 class Prov(Command):
@@ -38,5 +39,5 @@ class Prov(Command):
     def execute(self, args):
         persistence_config.connect_existing(args.dir or os.getcwd())
         trial = Trial(trial_ref=args.trial)
-        output = export_prov(trial)
+        output = export_prov(trial, data=TrialData(trial))
         print(output)
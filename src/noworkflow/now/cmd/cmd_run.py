@@ -11,9 +11,11 @@ import os
 import sys
 
 from ..collection.metadata import Metascript
+from ..collection.prov_execution.structures import LoopSample
 from ..persistence.models import Tag, Trial, Argument
 from ..utils import io, metaprofiler
 from ..persistence import content
+from ..persistence.content.compression import COMPRESSION_THRESHOLD
 
 from .command import Command
 
@@ -27,6 +29,23 @@ def non_negative(string):
     return value
 
 
+def non_negative_float(string):
+    """Check if argument is a float >= 0"""
+    value = float(string)
+    if value < 0:
+        raise argparse.ArgumentTypeError(
+            "{} is not a non-negative value".format(string))
+    return value
+
+
+def loop_sample(string):
+    """Parse loop sample 'first=K,last=M,every=N'"""
+    try:
+        return LoopSample.parse(string)
+    except ValueError as exc:
+        raise argparse.ArgumentTypeError(str(exc))
+
+
 class ScriptArgs(argparse.Action):                                               # pylint: disable=too-few-public-methods
     """Action to create script attribute"""
     def __call__(self, parser, namespace, values, option_string=None):
@@ -81,6 +100,7 @@ class Run(Command):
         self.default_collect_values = "all"
         self.default_call_storage_frequency = 10000
         self.default_save_frequency = 0
+        self.default_storage_queue_limit = 100000
         self.add_help = False
 
     def add_arguments(self):
@@ -110,14 +130,31 @@ class Run(Command):
                 help="depth for capturing function activations (default: "
                      "recursion limit)")
         # ToDo: limit module depth
-        add_arg("-r", "--serializer", choices=["repr", "jsonpickle", "jsonpickle_content", "simple"],
+        add_arg("-r", "--serializer", choices=["repr", "jsonpickle", "jsonpickle_content", "simple",
+                                               "scientific", "scientific_content"],
                 default=self.default_serializer,
-                help="serialization method for evaluation values (default: repr)")
+                help="R|serialization method for evaluation values (default: repr).\n"
+                     "The 'scientific' options summarize NumPy arrays and pandas objects.\n"
+                     "The 'scientific_content' option also stores array buffers in the\n"
+                     "content database")
         add_arg("-e", "--collect-values", choices=["none", "relevant", "all"],
                 default=self.default_collect_values,
                 help="R|collect evaluation values (default: all).\n"
                      "The 'relevant' option makes it collect only values of activations,\n"
                      "arguments, and tagged evaluations.")
+        add_arg("--value-size-limit", type=non_negative, default=0,
+                metavar="N",
+                help="truncate value representations larger than N "
+                     "characters. Large builtin collections and strings "
+                     "use a bounded repr (default: 0, disabled)")
+        add_arg("--value-time-limit", type=non_negative_float, default=0.0,
+                metavar="SECONDS",
+                help="stop serializing values of a type and size class "
+                     "after one of them takes more than SECONDS to "
+                     "serialize (default: 0, disabled)")
+        add_arg("--defer-immutable-values", action="store_true",
+                help="serialize immutable values (numbers, strings) only "
+                     "when storing provenance")
         #   Use context option: main, package, all
         add_arg("-c", "--context", choices=["main", "package", "all"],
                 default=self.default_context,
@@ -129,10 +166,46 @@ class Run(Command):
         add_arg("-S", "--call-storage-frequency", type=non_negative,
                 default=self.default_call_storage_frequency,
                 help="frequency (in calls) to save partial provenance")
+        add_arg("--async-storage", action="store_true",
+                help="save partial provenance in a background thread")
+        add_arg("--storage-queue-limit", type=non_negative,
+                default=self.default_storage_queue_limit,
+                help="maximum number of objects waiting for the background "
+                     "storage before blocking the script. 0 disables the "
+                     "limit (default: 100000)")
+        add_arg("--storage-profile", choices=["default", "fast"],
+                default="default",
+                help="R|SQLite settings for storing provenance (default: default).\n"
+                     "The 'fast' profile uses WAL journal, synchronous=NORMAL,\n"
+                     "and a 256 MiB page cache")
+        add_arg("--columnar-stores", action="store_true",
+                help="keep evaluations, dependencies, and members in "
+                     "compact columns to reduce memory usage")
         # ToDo: capture only activations
         add_arg("-cg", "--coarse-granularity", action="store_true",
                 help="capture only activation-level provenance "
                      "(activations, arguments, returns and file accesses)")
+        add_arg("--no-code-cache", dest="code_cache", action="store_false",
+                help="do not reuse transformed code from previous trials")
+        add_arg("--loop-sample", type=loop_sample, default=None,
+                metavar="first=K,last=M,every=N",
+                help="collect only the first K, the last M (for sized "
+                     "iterables), and every N-th iteration of loops. "
+                     "Skipped iterations are summarized per loop")
+        add_arg("--hot-function-calls", type=non_negative, default=0,
+                metavar="N",
+                help="after N collected activations of a function, record "
+                     "only an aggregated summary of its calls (default: 0, "
+                     "disabled)")
+        add_arg("--hot-function-budget", type=non_negative_float, default=0.0,
+                metavar="SECONDS",
+                help="after a function spends SECONDS in collected "
+                     "activations, record only an aggregated summary of its "
+                     "calls (default: 0, disabled)")
+        add_arg("--file-content-limit", type=non_negative, default=0,
+                metavar="BYTES",
+                help="store only the hash of accessed files larger than "
+                     "BYTES (default: 0, store all contents)")
 
         # Other
         if not self.is_ipython:
@@ -155,6 +228,23 @@ class Run(Command):
                 help="add a message to the commit of the trial")
         add_arg("--content-engine", type=str,
                 help="set the content database engine")
+        add_arg("--compression", choices=["none", "zlib", "zstd", "lz4"],
+                default="none",
+                help="compress contents stored by the plain and pack content "
+                     "engines. zstd and lz4 require the zstandard and lz4 "
+                     "packages (default: none)")
+        add_arg("--compression-threshold", type=non_negative,
+                default=COMPRESSION_THRESHOLD, metavar="BYTES",
+                help="store contents smaller than BYTES without compression "
+                     "(default: {})".format(COMPRESSION_THRESHOLD))
+        add_arg("--content-workers", type=non_negative, default=None,
+                metavar="N",
+                help="number of threads of threading content engines "
+                     "(default: cpu count + 4, up to 32)")
+        add_arg("--content-queue-limit", type=non_negative, default=None,
+                metavar="BYTES",
+                help="block the script while BYTES of content wait for "
+                     "threading content engines (default: 64 MiB)")
                                 
 
         # Internal
@@ -16,11 +16,12 @@ from ..persistence.models import Trial, ORDER
 from ..persistence import persistence_config, relational
 
 
+from ..utils.io import print_msg
 from .command import Command
 
 
 class Schema(Command):
-    """Present the SQL or Prolog schema of noWorkflow"""
+    """Present the SQL or Prolog schema of noWorkflow or migrate the database"""
 
     def __init__(self, *args, **kwargs):
         super(Schema, self).__init__(*args, **kwargs)
@@ -29,8 +30,9 @@ class Schema(Command):
         add_arg = self.add_argument
         self.add_argument_cmd("-d", "--diagram", action="store_true",
                               help="export graphic schema to dot")
-        add_arg("type", type=str.lower, choices=["sql", "prolog"],
-                help="schema type")
+        add_arg("type", type=str.lower, choices=["sql", "prolog", "migrate"],
+                help="schema type. 'migrate' creates missing tables and "
+                     "indexes on the existing database and runs ANALYZE")
         add_arg("--dir", type=str,
                 help="set project path where is the database. Default to "
                      "current directory")
@@ -74,7 +76,18 @@ class Schema(Command):
         }[args.type][args.diagram]
         return self.post_process(func(), args)
 
+    def migrate(self, args):                                                     # pylint: disable=no-self-use
+        """Migrate existing database to the current schema"""
+        persistence_config.connect_existing(args.dir or os.getcwd())
+        created = relational.migrate()
+        for name in created:
+            print_msg("created index {}".format(name))
+        print_msg("database migrated. Created {} indexes".format(len(created)),
+                  True)
+
     def execute(self, args):
         persistence_config.content_engine = args.content_engine
+        if args.type == "migrate":
+            return self.migrate(args)
         persistence_config.connect(args.dir or os.getcwd())
         print(self.process(args))
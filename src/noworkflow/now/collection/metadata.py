@@ -25,6 +25,9 @@ from ..persistence.lightweight import CompositionLW
 from ..persistence.lightweight import EvaluationLW, ActivationLW, DependencyLW
 from ..persistence.lightweight import MemberLW, FileAccessLW, StageTagsLW
 from ..persistence.lightweight import ExceptionLW
+from ..persistence.lightweight import ColumnarObjectStore
+from ..persistence.lightweight import ColumnarEvaluationStore
+from ..persistence.content.compression import COMPRESSION_THRESHOLD
 
 
 from ..utils import io
@@ -96,6 +99,12 @@ class Metascript(object):
         self.serialize = repr_serializer
         # Collect values from evaluations
         self.collect_values = ALL_VALUES
+        # Truncate value representations larger than X characters : int
+        self.value_size_limit = 0
+        # Stop serializing values of types that took more than X seconds : float
+        self.value_time_limit = 0.0
+        # Serialize immutable values only when storing them : bool
+        self.defer_immutable_values = False
         # Trial command : str
         self.command = ""
         # Main id : int
@@ -115,6 +124,8 @@ class Metascript(object):
 
         # Capture func component : bool
         self.capture_func_component = True
+        # Reuse transformed code from .noworkflow/code_cache : bool
+        self.code_cache = True
 
         # Depth for capturing function activations : int
         self.depth = sys.getrecursionlimit()
@@ -122,11 +133,27 @@ class Metascript(object):
         self._context = MAIN
         # Should collect only coarse granularity provenance: bool
         self.coarse_granularity = False
+        # Collect only sampled loop iterations : LoopSample
+        self.loop_sample = None
+        # Store only the hash of accessed files larger than X bytes : int
+        self.file_content_limit = 0
+        # Summarize functions after X collected activations : int
+        self.hot_function_calls = 0
+        # Summarize functions after X seconds of collected activations : float
+        self.hot_function_budget = 0.0
 
         # Save every X ms : int
         self.save_frequency = None
         # Save after closing X activations : int
         self.call_storage_frequency = 0
+        # Store partial provenance in a background thread : bool
+        self.async_storage = False
+        # SQLite storage profile : ["default", "fast"]
+        self.storage_profile = "default"
+        # Keep evaluations, dependencies, and members in columns : bool
+        self._columnar_stores = False
+        # Block script while X objects wait for background storage : int
+        self.storage_queue_limit = 100000
 
         # Used by jupyter to indicate that it should not transform cell : bool
         self.jupyter_original = False
@@ -135,6 +162,14 @@ class Metascript(object):
         self.message = ""
         # Content engine : str
         self.content_engine = None
+        # Content compression codec : ["none", "zlib", "zstd", "lz4"]
+        self.content_compression = "none"
+        # Store contents smaller than X bytes without compression : int
+        self.compression_threshold = COMPRESSION_THRESHOLD
+        # Threads of threading content engines. None: cpu_count() + 4 : int
+        self.content_workers = None
+        # Block script while X bytes wait for content threads. None: 64 MiB
+        self.content_queue_limit = None
 
 
         # Trial time
@@ -163,6 +198,25 @@ class Metascript(object):
         """Set context"""
         self._context = CONTEXTS[context]
 
+    @property
+    def columnar_stores(self):
+        """Return whether high-volume stores are columnar"""
+        return self._columnar_stores
+
+    @columnar_stores.setter
+    def columnar_stores(self, value):
+        """Replace evaluations, dependencies, and members stores"""
+        self._columnar_stores = value
+        if value:
+            self.evaluations_store = ColumnarEvaluationStore(EvaluationLW)
+            self.dependencies_store = ColumnarObjectStore(DependencyLW)
+            self.members_store = ColumnarObjectStore(MemberLW)
+        else:
+            self.evaluations_store = ObjectStore(EvaluationLW)
+            self.dependencies_store = ObjectStore(DependencyLW)
+            self.members_store = ObjectStore(MemberLW)
+        self.execution.collector.reload_metascript(self)
+
     def clear_namespace(self, erase=True):
         """Clear namespace dict"""
         if erase:
@@ -226,11 +280,27 @@ class Metascript(object):
             depth=sys.getrecursionlimit(),
             save_frequency=0,
             call_storage_frequency=10000,
+            async_storage=False,
+            storage_queue_limit=100000,
+            columnar_stores=False,
+            storage_profile="default",
+            code_cache=True,
+            loop_sample=None,
+            hot_function_calls=0,
+            hot_function_budget=0.0,
+            file_content_limit=0,
             context="main",
             serializer="repr",
             collect_values="all",
+            value_size_limit=0,
+            value_time_limit=0.0,
+            defer_immutable_values=False,
             message=None,
             content_engine=None,
+            compression="none",
+            compression_threshold=COMPRESSION_THRESHOLD,
+            content_workers=None,
+            content_queue_limit=None,
         )
         self._read_args(args)
         self.path = os.getcwd()
@@ -240,17 +310,37 @@ class Metascript(object):
         """Read cmd line argument object"""
         self.serialize = get_serializer(args)
         self.collect_values = COLLECT_VALUES[args.collect_values]
+        self.value_size_limit = args.value_size_limit
+        self.value_time_limit = args.value_time_limit
+        self.defer_immutable_values = args.defer_immutable_values
         self.verbose = args.verbose
         self.meta = args.meta
 
         self.bypass_modules = args.bypass_modules
         self.coarse_granularity = args.coarse_granularity
+        self.code_cache = args.code_cache
+        self.loop_sample = args.loop_sample
+        self.hot_function_calls = args.hot_function_calls
+        self.hot_function_budget = args.hot_function_budget
+        self.file_content_limit = args.file_content_limit
 
         self.depth = args.depth
         self.save_frequency = args.save_frequency
         self.call_storage_frequency = args.call_storage_frequency
+        self.async_storage = args.async_storage
+        self.storage_queue_limit = args.storage_queue_limit
+        self.columnar_stores = args.columnar_stores
+        self.storage_profile = persistence_config.storage_profile = args.storage_profile
         self.message = args.message
         self.content_engine = persistence_config.content_engine = args.content_engine
+        self.content_compression = args.compression
+        persistence_config.content_compression = args.compression
+        self.compression_threshold = args.compression_threshold
+        persistence_config.compression_threshold = args.compression_threshold
+        self.content_workers = args.content_workers
+        persistence_config.content_workers = args.content_workers
+        self.content_queue_limit = args.content_queue_limit
+        persistence_config.content_queue_limit = args.content_queue_limit
         self.context = args.context
         self.execution.collector.reload_metascript(self)
         io.print_msg("setting up local provenance store")
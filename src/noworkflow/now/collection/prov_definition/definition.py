@@ -14,7 +14,7 @@ import traceback
 
 import pyposast
 
-from ...persistence import content
+from ...persistence import content, code_cache, relational
 
 from ...utils.io import print_msg
 from ...utils.metaprofiler import meta_profiler
@@ -41,9 +41,10 @@ class Definition(object):
         metascript = self.metascript
         # Remove after save
         partial = True
-        metascript.code_components_store.do_store(partial)
-        metascript.code_blocks_store.do_store(partial)
-        metascript.compositions_store.do_store(partial)
+        with relational.transaction() as conn:
+            metascript.code_components_store.do_store(partial, conn)
+            metascript.code_blocks_store.do_store(partial, conn)
+            metascript.compositions_store.do_store(partial, conn)
 
     def create_code_block(self, code, path, type_, binary, load):
         """Create code block for script/module"""
@@ -89,7 +90,6 @@ class Definition(object):
     @meta_profiler("definition")
     def parse(self, type_, source, filename, mode):
         """Parse source and return tree, code_block_id, transformed"""
-        transformed = False
         ast_or_no_source = isinstance(source, ast.AST) or source is None
         tree = source if ast_or_no_source else None
         source, id_ = self.create_code_block(
@@ -97,6 +97,15 @@ class Definition(object):
             type_,
             False, ast_or_no_source
         )
+        tree, transformed = self.transform(
+            type_, source, filename, mode, id_, tree=tree
+        )
+        return tree, id_, transformed
+
+    def transform(self, type_, source, filename, mode, id_, tree=None):
+        """Transform source of code block id_. Return tree, transformed"""
+        # pylint: disable=too-many-arguments
+        transformed = False
         cell = filename if type_ == "cell" else None
 
         try:
@@ -119,15 +128,113 @@ class Definition(object):
         if tree is None:
             tree = ast.parse(source, filename, mode)
 
-        return tree, id_, transformed
+        return tree, transformed
+
+    def cache_key(self, type_, source, filename, mode, id_):
+        """Return code cache key for source
+        Generated code refers to component ids. Thus, the key includes
+        the first ids that the transformer would use
+        """
+        # pylint: disable=too-many-arguments
+        metascript = self.metascript
+        return code_cache.key(
+            source, type_, mode, filename,
+            os.path.relpath(filename, metascript.dir),
+            metascript.coarse_granularity,
+            metascript.capture_func_component,
+            id_,
+            metascript.code_components_store.id,
+            metascript.compositions_store.id,
+        )
+
+    def record(self, code, first_component, first_composition):
+        """Create code cache entry for code and definition provenance
+        created after first_component and first_composition
+        Return None if provenance is not available anymore
+        """
+        metascript = self.metascript
+        components_store = metascript.code_components_store
+        blocks_store = metascript.code_blocks_store.store
+        compositions_store = metascript.compositions_store
+        components, blocks, compositions = [], [], []
+        try:
+            for id_ in range(first_component + 1, components_store.id + 1):
+                comp = components_store[id_]
+                components.append((
+                    comp.name, comp.type, comp.mode,
+                    comp.first_char_line, comp.first_char_column,
+                    comp.last_char_line, comp.last_char_column,
+                    comp.container_id
+                ))
+                block = blocks_store.get(id_)
+                if block is not None:
+                    blocks.append((
+                        id_, block.code, isinstance(block.code, bytes),
+                        block.docstring,
+                        block.code_hash
+                    ))
+            for id_ in range(first_composition + 1, compositions_store.id + 1):
+                comp = compositions_store[id_]
+                compositions.append((
+                    comp.part_id, comp.whole_id, comp.type, comp.position,
+                    comp.extra
+                ))
+        except (KeyError, AttributeError):
+            return None
+        return (code, tuple(components), tuple(blocks), tuple(compositions))
+
+    def replay(self, entry, filename):
+        """Add definition provenance from code cache entry. Return code"""
+        metascript = self.metascript
+        trial_id = metascript.trial_id
+        code, components, blocks, compositions = entry
+        for component in components:
+            metascript.code_components_store.add(trial_id, *component)
+        for id_, code_text, binary, docstring, code_hash in blocks:
+            metascript.code_blocks_store.add(
+                id_, trial_id, code_text, binary, docstring, filename,
+                code_hash
+            )
+        for composition in compositions:
+            metascript.compositions_store.add(trial_id, *composition)
+        return code
+
+    @meta_profiler("definition")
+    def cached_collect(self, type_, source, filename, mode):
+        """Compile source using code cache
+        Return code, code_block_id, transformed
+        """
+        metascript = self.metascript
+        source, id_ = self.create_code_block(
+            source, filename, type_, False, source is None
+        )
+        key = self.cache_key(type_, source, filename, mode, id_)
+        entry = code_cache.load(key)
+        if entry is not None:
+            return self.replay(entry, filename), id_, True
+
+        first_component = metascript.code_components_store.id
+        first_composition = metascript.compositions_store.id
+        tree, transformed = self.transform(type_, source, filename, mode, id_)
+        code = cross_compile(tree, filename, mode)
+        if transformed:
+            entry = self.record(code, first_component, first_composition)
+            if entry is not None:
+                code_cache.save(key, entry)
+        return code, id_, transformed
 
     def collect(self, source, filename, mode, compiler=cross_compile, **kwargs):
         """Compile source and return code, code_block_id, transformed"""
-        tree, id_, transformed = self.parse(
-            "script" if self.first else "module",
-            source, filename, mode
-        )
+        type_ = "script" if self.first else "module"
         self.first = False
+        use_cache = (
+            self.metascript.code_cache and code_cache.enabled and
+            compiler is cross_compile and not kwargs and
+            not isinstance(source, ast.AST)
+        )
+        if use_cache:
+            return self.cached_collect(type_, source, filename, mode)
+        tree, id_, transformed = self.parse(type_, source, filename, mode)
         return compiler(
             tree, filename, mode,
             **kwargs
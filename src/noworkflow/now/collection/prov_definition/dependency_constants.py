@@ -45,6 +45,8 @@ ITEM = "item"
 #  expr.yield
 KEY = "key"
 #  expr._dict_itemize
+LOOP_SUMMARY = "loop_summary"
+#  collector._sampled_loop_generator
 SLICE = "slice"
 #  expr.visit_Subscript
 USE = "use"
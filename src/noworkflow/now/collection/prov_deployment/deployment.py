@@ -14,13 +14,12 @@ import socket
 import sys
 import weakref
 import getpass
-import pkg_resources
 
 from future.utils import viewitems, native_str
 from future.builtins import map as cvmap
 
 from ...persistence.models import Module
-from ...persistence import content
+from ...persistence import content, relational
 from ...utils.io import print_msg, redirect_output
 from ...utils.metaprofiler import meta_profiler
 from ...utils.cross_version import string
@@ -89,6 +88,7 @@ class Deployment(object):
         # Check package declared module version
         try:
             # ToDo: This is slow! Is there any alternative?
+            import pkg_resources
             return pkg_resources.get_distribution(module_name).version
         except Exception:                                                        # pylint: disable=broad-except
             pass
@@ -128,5 +128,6 @@ class Deployment(object):
         metascript = self.metascript
         # Remove after save
         partial = True
-        metascript.environment_attrs_store.do_store(partial)
-        metascript.modules_store.do_store(partial)
+        with relational.transaction() as conn:
+            metascript.environment_attrs_store.do_store(partial, conn)
+            metascript.modules_store.do_store(partial, conn)
@@ -19,15 +19,18 @@ from types import GeneratorType
 
 from future.utils import viewvalues, viewkeys, viewitems, exec_
 
-from ...persistence import content
+from ...persistence import content, file_hashes, relational
 from ...persistence.models import Trial
 from ...utils.cross_version import IMMUTABLE, isiterable, PY3
 from ...utils.cross_version import cross_print, PY38
+from ...utils.io import print_msg
 
 from .structures import AssignAccess, Assign, Generator, FutureActivation
 from .structures import DependencyAware, Dependency, Parameter
 from .structures import MemberDependencyAware, CollectionDependencyAware
 from .structures import ConditionExceptions, WithContext
+from .hot_functions import HotFunctionPolicy, arguments_repr
+from ..prov_definition.dependency_constants import LOOP_SUMMARY
 
 NOW_UNSET = "<now_unset>"
 
@@ -116,6 +119,9 @@ class Collector(object):
         self.get_value = None  # type: Callable[[any, bool], Optional[str]] | Callable[[any], Optional[str]] 
         self.partial_save_frequency = None  # type: Optional[float]
         self.last_partial_save = None  # type: Optional[float]
+        self.closed_activations = 0  # type: int
+        self.writer = None  # type: Optional[BackgroundWriter]
+        self.hot_functions = HotFunctionPolicy()
         self.first_activation = None  # type: ActivationLW
         self.last_activation = None  # type: ActivationLW
         
@@ -182,8 +188,9 @@ class Collector(object):
             )
             if os.path.exists(name):
                 # Read previous content if file exists
-                with content.std_open(name, "rb") as fil:
-                    file_access.content_hash_before = content.put(fil.read(), name)
+                file_access.content_hash_before = file_hashes.content_hash(
+                    name, size_limit=self.metascript.file_content_limit
+                )
             file_access.activation_id = activation.id
             # Update with the informed keyword arguments (mode / buffering)
             file_access.update(kwargs)
@@ -415,6 +422,9 @@ class Collector(object):
             exc_handler=float('inf'), # do not delete
         ))
         activation.parent = act
+        # Restore the previous activation on close. Active code may run
+        # after it, e.g., sampled iterations after skipped ones
+        activation.last_activation = self.last_activation
         self.last_activation = activation
         return activation
 
@@ -441,13 +451,22 @@ class Collector(object):
         evaluation.checkpoint = self.time()
         evaluation.repr = self.get_value(value, is_relevant=True)
         evaluation.set_reference(reference)
-        self.add_type(evaluation, value)
+        if evaluation.id != -1:
+            # Dry activations are not stored. Do not add members to them
+            self.add_type(evaluation, value)
         self.last_activation = activation.last_activation
         for file_access in activation.file_accesses:
             if os.path.exists(file_access.name):
-                with content.std_open(file_access.name, "rb") as fil:
-                    file_access.content_hash_after = content.put(fil.read(), file_access.name)
+                file_access.content_hash_after = file_hashes.content_hash(
+                    file_access.name,
+                    size_limit=self.metascript.file_content_limit
+                )
             file_access.done = True
+        # Partial save after closing call_storage_frequency activations
+        self.closed_activations += 1
+        frequency = self.metascript.call_storage_frequency
+        if frequency and self.closed_activations % frequency == 0:
+            self.store(partial=True)
 
     def start_script(self, module_name, code_component_id, iscell):
         """Start script collection. Create new activation"""
@@ -1220,6 +1239,15 @@ class Collector(object):
         future = self.future_activation.pop()
         parent_activation = future.activation
         parent_depa = parent_activation.dependencies.pop()
+        hot_functions = self.hot_functions
+        track = (
+            hot_functions.enabled and parent_activation.active and
+            future.dependency_type != "internal"
+        )
+        if track:
+            summary = hot_functions.summary(future.func)
+            if summary is not None:
+                return self._summarized_call(future, summary, args, kwargs)
         if future.activation.active:
             activation = self.start_activation(
                 future.name,
@@ -1249,6 +1277,11 @@ class Collector(object):
                     break
             # Close activation
             self.close_activation(activation, result, reference)
+            if track and activation.active:
+                hot_functions.record(
+                    future.func,
+                    eva.checkpoint - activation.start_checkpoint
+                )
 
             if activation.parent.active:
                 # Create dependencies
@@ -1268,6 +1301,57 @@ class Collector(object):
                     activation.generator.dependency = dependency
         return result
 
+    def _summarized_call(self, future, summary, args, kwargs):
+        """Call demoted function with a dry activation
+        Aggregate the call into the function summary activation.
+        The result depends on the summary activation
+        """
+        parent = future.activation
+        previous = self.last_activation
+        activation = self.dry_activation(parent)
+        activation.dependencies.extend(future.dependencies)
+        activation.bound_dependency = future.bound_dependency
+        activation.func_evaluation = future.func_evaluation
+        activation.func = future.func
+        result = None
+        start = self.get_time()
+        try:
+            result = future.func(*args, **kwargs)
+        finally:
+            end = self.get_time()
+            self.last_activation = previous
+            if summary.activation is None:
+                trial_id = self.trial_id
+                evaluation = self.evaluations.add_object(
+                    trial_id, future.code_id, parent.id, None, None
+                )
+                # The dry activation has no code block. Use the definition
+                summary.activation = self.activations.add_object(
+                    evaluation, trial_id, summary.name, start,
+                    getattr(future.func, "code_block_id", -1)
+                )
+                for depa in future.dependencies:
+                    self.create_dependencies(evaluation, depa)
+            summary.add(
+                arguments_repr(args, kwargs, self.metascript.serialize),
+                end - start, end
+            )
+            parent.dependencies[-1].add(Dependency(
+                summary.activation.evaluation, result, future.dependency_type
+            ))
+        return result
+
+    def finish_hot_functions(self):
+        """Close summary activations and report demoted functions"""
+        for summary in self.hot_functions.demoted:
+            if summary.activation is not None:
+                evaluation = summary.activation.evaluation
+                evaluation.checkpoint = summary.end
+                evaluation.repr = repr(summary)
+        for line in self.hot_functions.report():
+            print_msg(line)
+        self.hot_functions.demoted = []
+
     def decorator(self, activation, code_id, exc_handler):
         """Capture decorator before"""
         activation.dependencies.append(DependencyAware(
@@ -1712,6 +1796,11 @@ class Collector(object):
     def _loop(self, activation, value):
         """Capture loop after. Return generator"""
         dependency = activation.dependencies.pop()
+        sample = self.metascript.loop_sample
+        if sample is not None and activation.active:
+            return self._sampled_loop_generator(
+                activation, value, dependency, sample
+            )
         return self._loop_generator(activation, value, dependency)
 
     def enumerate_generator(self, activation, value, code_id, exc_handler):
@@ -1753,30 +1842,99 @@ class Collector(object):
         )
 
         for index, element, depa in it_:
-            clone_depa = dependency.clone(mode="dependency")
-            if len(dependency.dependencies) == 1 and activation.active:
-                dep = dependency.dependencies[0]
-                self.create_dependencies_id(
-                    activation.id, dep.evaluation.id, depa
-                )
-                bind = False
-                if len(depa.dependencies) == 1:
-                    gen_dep = depa.dependencies[0]
-                    bind = gen_dep.value == element
-                clone_depa, found = self.sub_dependency(
-                    dep, value, index, clone_depa
-                )
-                depa = depa.clone(mode="assign")
-                if found is not None:
-                    clone_depa.extra_dependencies = dependency.dependencies
-                clone_depa.extra_dependencies += depa.dependencies
-                if bind:
-                    clone_depa.swap()
-            assign = Assign(self.time(), element, clone_depa)
-            assign.index = index
-            activation.assignments.append(assign)
+            activation.assignments.append(self._loop_assign(
+                activation, value, dependency, index, element, depa
+            ))
             yield element
 
+    def _loop_assign(self, activation, value, dependency, index, element,
+                     depa):
+        """Create assign for loop iteration"""
+        # pylint: disable=too-many-arguments
+        clone_depa = dependency.clone(mode="dependency")
+        if len(dependency.dependencies) == 1 and activation.active:
+            dep = dependency.dependencies[0]
+            self.create_dependencies_id(
+                activation.id, dep.evaluation.id, depa
+            )
+            bind = False
+            if len(depa.dependencies) == 1:
+                gen_dep = depa.dependencies[0]
+                bind = gen_dep.value == element
+            clone_depa, found = self.sub_dependency(
+                dep, value, index, clone_depa
+            )
+            depa = depa.clone(mode="assign")
+            if found is not None:
+                clone_depa.extra_dependencies = dependency.dependencies
+            clone_depa.extra_dependencies += depa.dependencies
+            if bind:
+                clone_depa.swap()
+        assign = Assign(self.time(), element, clone_depa)
+        assign.index = index
+        return assign
+
+    def _sampled_loop_generator(self, activation, value, dependency, sample):
+        """Loop generator that collects only sampled iterations
+        Skipped iterations run with an inactive activation.
+        A summary evaluation of the loop target represents them. It holds
+        the number of skipped iterations and the time spent on them.
+        Sampled iterations after skipped ones depend on the summary
+        """
+        # pylint: disable=too-many-locals
+        try:
+            total = len(value)
+        except TypeError:
+            total = None
+        it_ = self.enumerate_generator(
+            activation, value, dependency.code_id, dependency.exc_handler
+        )
+        summary = None
+        skipped, skipped_time, skip_start = 0, 0.0, None
+        try:
+            for index, element, depa in it_:
+                if skip_start is not None:
+                    activation.active = True
+                    skipped_time += self.get_time() - skip_start
+                    skip_start = None
+                if sample.selects(index, total):
+                    assign = self._loop_assign(
+                        activation, value, dependency, index, element, depa
+                    )
+                    if summary is not None:
+                        assign.dependency.extra_dependencies = (
+                            assign.dependency.extra_dependencies +
+                            [Dependency(summary, None, LOOP_SUMMARY)]
+                        )
+                    activation.assignments.append(assign)
+                    yield element
+                    continue
+                if summary is None:
+                    summary = self.evaluations.add_object(
+                        self.trial_id, dependency.code_id, activation.id,
+                        None, None
+                    )
+                    summary_depa = DependencyAware()
+                    for dep in dependency.dependencies:
+                        summary_depa.add(Dependency(
+                            dep.evaluation, value, LOOP_SUMMARY
+                        ))
+                    self.create_dependencies(summary, summary_depa)
+                skipped += 1
+                activation.assignments.append(Assign(None, element, None))
+                skip_start = self.get_time()
+                activation.active = False
+                yield element
+        finally:
+            if skip_start is not None:
+                activation.active = True
+                skipped_time += self.get_time() - skip_start
+            if summary is not None:
+                summary.repr = "<{} skipped iterations in {:.6f}s>".format(
+                    skipped, skipped_time
+                )
+                summary.checkpoint = self.get_time()
+
     def condition(self, activation, exc_handler):
         """Capture condition before"""
         activation.dependencies.append(DependencyAware(
@@ -1986,18 +2144,52 @@ class Collector(object):
         self.add_type(evaluation, value)
         return evaluation
 
+    def start_writer(self):
+        """Start background writer for partial provenance storage"""
+        from ...persistence.writer import BackgroundWriter
+        self.writer = BackgroundWriter(
+            max_pending=self.metascript.storage_queue_limit
+        ).start()
+
+    def enqueue_complete(self):
+        """Send complete objects to the background writer"""
+        metascript = self.metascript
+        for object_store in (
+                metascript.evaluations_store,
+                metascript.activations_store,
+                metascript.dependencies_store,
+                metascript.members_store,
+                metascript.file_accesses_store,
+                metascript.stage_tags_store):
+            if object_store.has_items():
+                self.writer.put(
+                    object_store.cls.model, object_store.pop_complete()
+                )
+
     def store(self, partial, status="running"):
         """Store execution provenance"""
         metascript = self.metascript
         tid = metascript.trial_id
-
-        metascript.code_components_store.do_store(partial)
-        metascript.evaluations_store.do_store(partial)
-        metascript.activations_store.do_store(partial)
-        metascript.dependencies_store.do_store(partial)
-        metascript.members_store.do_store(partial)
-        metascript.file_accesses_store.do_store(partial)
-        metascript.stage_tags_store.do_store(partial)
+        if not partial:
+            self.finish_hot_functions()
+
+        if self.writer is not None:
+            if partial and self.writer.alive:
+                # Incomplete objects are stored by the final storage
+                self.enqueue_complete()
+                self.last_partial_save = self.get_time()
+                return
+            self.writer.close()
+            self.writer = None
+
+        with relational.transaction() as conn:
+            metascript.code_components_store.do_store(partial, conn)
+            metascript.evaluations_store.do_store(partial, conn)
+            metascript.activations_store.do_store(partial, conn)
+            metascript.dependencies_store.do_store(partial, conn)
+            metascript.members_store.do_store(partial, conn)
+            metascript.file_accesses_store.do_store(partial, conn)
+            metascript.stage_tags_store.do_store(partial, conn)
 
         now = self.get_time()
         if not partial:
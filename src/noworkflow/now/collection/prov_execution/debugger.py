@@ -17,7 +17,6 @@ import webbrowser
 
 from argparse import Namespace
 
-from ...cmd.cmd_show import Show
 from ...persistence.models.trial import Trial
 from ...utils.io import redirect_output
 
@@ -120,6 +119,7 @@ def debugger_builtins(provider, namespace, metascript):
 
     def now_notebook(start=True):
         """Start Jupyter Notebook"""
+        from ...cmd.cmd_show import Show
         try:
             import IPython
             Show().execute_export(Namespace(ipynb=True, dir=None))
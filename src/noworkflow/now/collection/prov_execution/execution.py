@@ -13,12 +13,14 @@ import io
 import os
 import codecs
 
-from ...persistence import content
+from ...persistence import content, file_hashes
+from ...persistence.serializers import BudgetedSerializer
 from ...utils.io import print_msg
 from ...utils.metaprofiler import meta_profiler
 
 from .debugger import debugger_builtins
 from .collector import Collector
+from .hot_functions import HotFunctionPolicy
 
 from noworkflow.now.persistence.models import Evaluation, Activation
 from noworkflow.now.models.dependency_querier import DependencyQuerier
@@ -39,6 +41,15 @@ class Execution(object):
     def configure(self):
         """Configure execution provenance collection"""
         self.collector.trial_id = self.metascript.trial_id
+        # Trial clock starts with the trial
+        self.collector.last_partial_save = self.collector.get_time()
+        if self.metascript.async_storage:
+            self.collector.start_writer()
+        self.configure_serializer()
+        self.collector.hot_functions = HotFunctionPolicy(
+            self.metascript.hot_function_calls,
+            self.metascript.hot_function_budget
+        )
         builtin = self.metascript.namespace["__builtins__"]
 
 
@@ -61,6 +72,22 @@ class Execution(object):
             self.collector, builtin, self.metascript
         )
 
+    def configure_serializer(self):
+        """Limit the cost of value serialization"""
+        metascript = self.metascript
+        serialize = metascript.serialize
+        if isinstance(serialize, BudgetedSerializer):
+            serialize = serialize.serialize
+        if (metascript.value_size_limit or metascript.value_time_limit
+                or metascript.defer_immutable_values):
+            serialize = BudgetedSerializer(
+                serialize,
+                metascript.value_size_limit,
+                metascript.value_time_limit,
+                metascript.defer_immutable_values
+            )
+        metascript.serialize = serialize
+
     @meta_profiler("execution")
     def collect_provenance(self):
         """Collect execution provenance"""
@@ -100,5 +127,6 @@ class Execution(object):
             partial=False,
             status="finished" if not self.force_msg else "unfinished"
         )
+        file_hashes.save()
         if self.msg:
             print_msg(self.msg, self.force_msg)
\ No newline at end of file
@@ -0,0 +1,133 @@
+# Copyright (c) 2016 Universidade Federal Fluminense (UFF)
+# Copyright (c) 2016 Polytechnic Institute of New York University.
+# This file is part of noWorkflow.
+# Please, consult the license terms in the LICENSE file.
+"""Adaptive black-boxing of hot functions"""
+from __future__ import (absolute_import, print_function,
+                        division, unicode_literals)
+
+
+class FunctionSummary(object):
+    """Aggregated activation of a demoted function"""
+    # pylint: disable=too-many-instance-attributes
+
+    def __init__(self, name, reason):
+        self.name = name
+        self.reason = reason
+        # Summary activation. Created on the first summarized call
+        self.activation = None
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+        # Serialized arguments of the first and last summarized calls
+        self.first_arguments = None
+        self.last_arguments = None
+        self.end = None
+
+    def add(self, arguments, duration, end):
+        """Add summarized call with serialized arguments"""
+        self.count += 1
+        self.total += duration
+        if self.min is None or duration < self.min:
+            self.min = duration
+        if self.max is None or duration > self.max:
+            self.max = duration
+        if self.first_arguments is None:
+            self.first_arguments = arguments
+        self.last_arguments = arguments
+        self.end = end
+
+    def __repr__(self):
+        return (
+            "<{0.count} summarized calls of {0.name}: total={0.total:.6f}s, "
+            "min={0.min:.6f}s, max={0.max:.6f}s, first={1}, last={2}>"
+        ).format(
+            self, self.first_arguments or "()", self.last_arguments or "()"
+        )
+
+
+def arguments_repr(args, kwargs, serialize=repr):
+    """Serialize call arguments when they are captured
+    Summaries do not keep references to the arguments"""
+    parts = []
+    for arg in args:
+        try:
+            parts.append(serialize(arg))
+        except Exception:                                                        # pylint: disable=broad-except
+            parts.append("<unrepresentable>")
+    for key, arg in kwargs.items():
+        try:
+            parts.append("{}={}".format(key, serialize(arg)))
+        except Exception:                                                        # pylint: disable=broad-except
+            parts.append("{}=<unrepresentable>".format(key))
+    return "({})".format(", ".join(parts))
+
+
+class HotFunctionPolicy(object):
+    """Decide which functions should stop producing full provenance
+
+    A function is demoted after max_calls collected activations or after
+    its collected activations take more than budget seconds.
+    Zero disables the respective limit.
+    """
+
+    def __init__(self, max_calls=0, budget=0.0):
+        self.max_calls = max_calls
+        self.budget = budget
+        self.stats = {}  # function -> [count, total duration]
+        self.summaries = {}  # function -> FunctionSummary
+        self.demoted = []  # FunctionSummary in demotion order
+
+    @property
+    def enabled(self):
+        """Check if policy has any limit"""
+        return bool(self.max_calls or self.budget)
+
+    @staticmethod
+    def key(func):
+        """Return function used as key. Unwrap bound methods"""
+        return getattr(func, "__func__", func)
+
+    def summary(self, func):
+        """Return summary of demoted function or None"""
+        try:
+            return self.summaries.get(self.key(func))
+        except TypeError:
+            return None
+
+    def record(self, func, duration):
+        """Record collected activation of func. Demote it if it is hot"""
+        key = self.key(func)
+        try:
+            stats = self.stats.get(key)
+            if stats is None:
+                stats = self.stats[key] = [0, 0.0]
+        except TypeError:
+            return None
+        stats[0] += 1
+        stats[1] += duration
+        reason = None
+        if self.max_calls and stats[0] >= self.max_calls:
+            reason = "{} activations".format(stats[0])
+        elif self.budget and stats[1] >= self.budget:
+            reason = "{:.6f}s in {} activations".format(stats[1], stats[0])
+        if reason is None:
+            return None
+        summary = FunctionSummary(
+            getattr(func, "__name__", type(func).__name__), reason
+        )
+        self.summaries[key] = summary
+        del self.stats[key]
+        self.demoted.append(summary)
+        return summary
+
+    def report(self):
+        """Return demotion report lines"""
+        return [
+            "demoted {} after {}. {}".format(
+                summary.name, summary.reason,
+                summary if summary.count else "No summarized calls"
+            )
+            for summary in self.demoted
+        ]
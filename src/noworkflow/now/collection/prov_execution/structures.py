@@ -19,6 +19,34 @@ AssignAccess = namedtuple(
     "AssignAccess", "value dependency addr value_dep checkpoint")
 
 
+class LoopSample(namedtuple("LoopSample", "first last every")):
+    """Select loop iterations that should have full provenance"""
+
+    @classmethod
+    def parse(cls, text):
+        """Parse 'first=K,last=M,every=N'. Raise ValueError on errors"""
+        values = {"first": 0, "last": 0, "every": 0}
+        for part in text.split(","):
+            key, _, value = part.partition("=")
+            key = key.strip()
+            if key not in values or not value:
+                raise ValueError("invalid loop sample option: {}".format(part))
+            values[key] = int(value)
+            if values[key] < 0:
+                raise ValueError("{} must be non-negative".format(key))
+        return cls(**values)
+
+    def selects(self, index, total=None):
+        """Check if iteration index should be collected
+        Last iterations can only be selected for sized iterables
+        """
+        return (
+            index < self.first or
+            (total is not None and index >= total - self.last) or
+            (self.every > 0 and index % self.every == 0)
+        )
+
+
 class FutureActivation(object):
 
     def __init__(self, name, code_id, activation, func, dependency_type):
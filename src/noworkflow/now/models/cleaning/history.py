@@ -6,7 +6,7 @@ import nbformat as nbf
 
 from copy import copy
 from datetime import datetime
-from ..dependency_querier import DependencyQuerier
+from ..dependency_querier import DependencyQuerier, slice_cache
 from .merge import merge_json
 
 
@@ -24,10 +24,11 @@ def find_cell(code_component, found=None):
     return found[code_component]
 
 
-def get_cells(evaluations, options=None):
-    """Return cells that contribute to the creation of the evaluations"""
+def get_cells(evaluations, options=None, querier=None):
+    """Return cells that contribute to the creation of the evaluations
+    Use querier (e.g., IndexedQuerier) instead of a DependencyQuerier, if it is set"""
     result = copy(evaluations)
-    querier = DependencyQuerier(options)
+    querier = querier or DependencyQuerier(options, cache=slice_cache)
     visited = set()
     code_component_cell = {}
     cells = set()
@@ -73,3 +73,4 @@ EMPTY_ATTR = Attributes({})
 REFERENCE_ATTR = Attributes({"arrowhead": "empty", "_reference": True})
 PROPAGATED_ATTR = Attributes({"style": "dashed", "_type": "propagated"})
 ACCESS_ATTR = Attributes({"style": "dashed"})
+SUMMARY_ATTR = Attributes({"style": "dotted", "label": "sampled"})
@@ -15,7 +15,7 @@ from ...persistence import relational
 from ...persistence.models import UniqueFileAccess, Evaluation, CodeComponent
 
 from .attributes import EMPTY_ATTR, ACCESS_ATTR, PROPAGATED_ATTR
-from .attributes import REFERENCE_ATTR
+from .attributes import REFERENCE_ATTR, SUMMARY_ATTR
 from .config import DependencyConfig
 from .node_types import AccessNode
 from .node_types import ActivationNode, ClusterNode, EvaluationNode
@@ -25,8 +25,11 @@ class Clusterizer(object):
     """Clusterize trial activations"""
     # pylint: disable=too-many-instance-attributes
 
-    def __init__(self, trial, config=None, filter_=None, synonymer=None):
+    def __init__(self, trial, config=None, filter_=None, synonymer=None,
+                 data=None):
         self.trial = weakref.ref(trial)
+        # TrialData with read-only evaluations, dependencies, and members
+        self.data = data
         self.config = config or DependencyConfig()
         self.main_cluster = None
         # Map of dependencies as (node1, node2): style
@@ -45,7 +48,7 @@ class Clusterizer(object):
 
     def erase(self):
         """Erase graph"""
-        self.__init__(self.trial(), self.config)
+        self.__init__(self.trial(), self.config, data=self.data)
 
     def add_dependency(self, source, target, attrs):
         """Add dependency"""
@@ -78,16 +81,36 @@ class Clusterizer(object):
         if reason != "done":
             return None
 
-        for member in node.evaluation.memberships_as_collection:
-            self.process_evaluation(member.member, cluster, True)
+        for evaluation in self._members_of(node.evaluation):
+            self.process_evaluation(evaluation, cluster, True)
 
         if not is_type:
-            for member in node.evaluation.memberships_as_member:
-                self.process_evaluation(
-                    member.collection, cluster, False)
+            for evaluation in self._collections_of(node.evaluation):
+                self.process_evaluation(evaluation, cluster, False)
 
         return node
 
+    def _members_of(self, evaluation):
+        """Iterate on member evaluations of collection evaluation
+        Use the member timelines of data to skip evaluations without members"""
+        if self.data is None:
+            for member in evaluation.memberships_as_collection:
+                yield member.member
+            return
+        trial_id = evaluation.trial_id
+        for member in self.data.timelines.memberships_as_collection(evaluation.id):
+            yield Evaluation((trial_id, member.member_id))
+
+    def _collections_of(self, evaluation):
+        """Iterate on collection evaluations of member evaluation"""
+        if self.data is None:
+            for member in evaluation.memberships_as_member:
+                yield member.collection
+            return
+        trial_id = evaluation.trial_id
+        for member in self.data.timelines.memberships_as_member(evaluation.id):
+            yield Evaluation((trial_id, member.collection_id))
+
     def process_evaluation(self, evaluation, cluster, is_type):
         """Process evaluation and add it to cluster"""
         act = evaluation.this_activation
@@ -187,14 +210,23 @@ class Clusterizer(object):
             dependent_nid = synonymer.from_node_id(dependent_nid)
             yield member, dependent_nid, dependency_nid
 
+    @property
+    def source(self):
+        """Return data source for dependencies: TrialData or trial"""
+        return self.trial() if self.data is None else self.data
+
     def _create_evaluation_dependencies(self):
         """Load propagatable dependencies from database into a graph"""
         departing_arrows = self.departing_arrows
         arriving_arrows = self.arriving_arrows
         attributes = EMPTY_ATTR
         reference = REFERENCE_ATTR
-        for dep, source, target in self.dep_iter(self.trial().dependencies):
+        data = self.source
+        for dep, source, target in self.dep_iter(data.dependencies):
             attr = (reference if dep.reference else attributes)
+            if dep.type == "loop_summary":
+                # Arrow represents skipped loop iterations
+                attr = SUMMARY_ATTR
             dep_attributes = attr.update({
                 "_type": dep.type,
                 "_checkpoint": dep.dependent.checkpoint, # slow
@@ -202,7 +234,7 @@ class Clusterizer(object):
             departing_arrows[source][target].add(dep_attributes)
             arriving_arrows[target][source].add(dep_attributes)
 
-        for member, source, target in self.member_iter(self.trial().members):
+        for member, source, target in self.member_iter(data.members):
             extra = ""
             if self.config.show_timestamps:
                 extra = "\n{}".format(member.checkpoint)
@@ -218,7 +250,7 @@ class Clusterizer(object):
 
     def _all_nodes(self):
         """Iterate on all possible nodes"""
-        for evaluation in self.trial().evaluations:
+        for evaluation in self.source.evaluations:
             yield EvaluationNode.get_node_id(evaluation.id)
 
     def _fix_dependencies(self):
@@ -194,7 +194,7 @@ class DependencyConfig(object):
             return AcceptAllNodesFilter()
         return JoinedFilter.create(*filters)
 
-    def clusterizer(self, trial, filter_=None, synonymer=None):
+    def clusterizer(self, trial, filter_=None, synonymer=None, data=None):
         """Return clusterizer based on config"""
         from .clusterizer import Clusterizer
         from .clusterizer import ActivationClusterizer
@@ -212,5 +212,6 @@ class DependencyConfig(object):
             trial,
             config=self,
             filter_=filter_,
-            synonymer=synonymer
+            synonymer=synonymer,
+            data=data
         )
@@ -9,6 +9,7 @@ from argparse import Namespace
 from ...persistence.models.base import proxy_gen, proxy
 from ...persistence.models import CodeComponent, Activation, Dependency
 from ...persistence import relational
+from ..dependency_querier import load_reachability_index
 
 from  ...cmd.cmd_evaluation import query_evaluations, Evaluation as EvaluationPrint
 
@@ -129,34 +130,29 @@ class FilterNotFromCodeOut(AcceptAllNodesFilter):
 class FilterWasDerivedFrom(AcceptAllNodesFilter):
     """Filter that accepts only one evaluation and the ones that derived it"""
     # pylint: disable=too-few-public-methods
-    was_derived_from_list = None
     def __init__(self, eid, trial):
-        if self.was_derived_from_list is None:
-            # TODO This class is being disnecessarily instantiated twice
-            self.was_derived_from_list = self.get_was_derived_from_list(eid, trial)
-        
+        self.was_derived_from_ids = self.get_was_derived_from_ids(eid, trial)
+
     def __contains__(self, node):
         if isinstance(node, EvaluationNode):
-            return not node.evaluation not in self.was_derived_from_list
+            return node.evaluation.id in self.was_derived_from_ids
         return super(FilterWasDerivedFrom, self).__contains__(node)
-    
-    def get_was_derived_from_list(self, eid, trial):
+
+    def get_was_derived_from_ids(self, eid, trial):
+        """Return ids of the evaluation and of the ones that derived it
+        The reachability index is loaded once per trial"""
         args = Namespace(trial=trial, eid=eid, wdf_trial=trial)
-        
-        evaluation = proxy(query_evaluations(args)[0])
-        
-        if not evaluation:
+
+        result = query_evaluations(args)
+        if not result:
             print("No evaluation found")
-            return
-        
-        check_dependencies = list(proxy_gen(query_evaluations(args, prefix="wdf_")))
-
-        derived_from = evaluation.was_derived_from(check_dependencies, distinguish=True)
-        derived_list = []
-        for other, derived in derived_from.items():
-            if derived: derived_list.append(other)
-        derived_list.append(evaluation)
-        return derived_list
+            return set()
+        evaluation = proxy(result[0])
+
+        reachability = load_reachability_index(evaluation.trial)
+        derived_ids = reachability.ancestors(evaluation.id)
+        derived_ids.add(evaluation.id)
+        return derived_ids
 
 
 class _JoinedFilterAttribute(object):
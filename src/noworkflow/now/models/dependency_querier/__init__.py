@@ -5,4 +5,7 @@
 """Trial dependency queriers"""
 
 from .querier import DependencyQuerier
-from .querier_options import QuerierOptions, PreloadedQuerierOptions
\ No newline at end of file
+from .querier_options import QuerierOptions, PreloadedQuerierOptions
+from .graph_index import GraphIndex, IndexedQuerier, load_graph_index
+from .reachability import ReachabilityIndex, load_reachability_index
+from .slice_cache import SliceCache, slice_cache
@@ -0,0 +1,462 @@
+# Copyright (c) 2021 Universidade Federal Fluminense (UFF)
+# Copyright (c) 2021 Polytechnic Institute of New York University.
+# This file is part of noWorkflow.
+# Please, consult the license terms in the LICENSE file.
+"""Compiled dependency graph of a trial"""
+
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import deque
+
+from .querier_options import QuerierOptions
+from .node_context import NodeContext
+
+
+INDEX_KIND = "graph_index"
+INDEX_FORMAT = 1
+NONE_CHECKPOINT = float("inf")  # Memberships without checkpoint never apply
+
+
+def offsets_of(count, sources):
+    """Return CSR offsets of edges with sources in [0, count)"""
+    offsets = array("q", [0]) * (count + 1)
+    for source in sources:
+        offsets[source + 1] += 1
+    for position in range(count):
+        offsets[position + 1] += offsets[position]
+    return offsets
+
+
+class GraphIndex(object):
+    """Dependency and member edges of a trial in CSR arrays
+
+    Evaluations are identified by dense indices in id order. Each
+    adjacency is an offsets array with one entry per evaluation, plus
+    parallel arrays of edge targets and edge attributes:
+    dependencies (dependent -> dependency) and reverse dependencies
+    store type codes; members are grouped by (collection, key), and the
+    entries of a group are sorted by checkpoint; reverse members
+    (member -> collection) store checkpoints; references
+    (container -> evaluations that use its value) are sorted by checkpoint
+    """
+
+    ARRAYS = (
+        "ids", "checkpoints", "containers", "activations", "is_out",
+        "dep_offsets", "dep_targets", "dep_types",
+        "rdep_offsets", "rdep_targets", "rdep_types",
+        "group_offsets", "member_offsets", "group_keys",
+        "member_targets", "member_checkpoints",
+        "rmember_offsets", "rmember_targets", "rmember_checkpoints",
+        "ref_offsets", "ref_targets", "ref_checkpoints",
+    )
+
+    def __init__(self, trial_id=None):
+        self.trial_id = trial_id
+        self.ids = array("q")
+        self.checkpoints = array("d")  # NaN represents None
+        self.containers = array("q")  # Original container of each value
+        self.activations = array("q")  # Activation evaluation or -1
+        self.is_out = array("b")
+        self.types = []  # Dependency type names
+        self.keys = []  # Member key names
+        self.dep_offsets = self.dep_targets = self.dep_types = None
+        self.rdep_offsets = self.rdep_targets = self.rdep_types = None
+        # collection -> groups -> member entries
+        self.group_offsets = self.member_offsets = self.group_keys = None
+        self.member_targets = self.member_checkpoints = None
+        self.rmember_offsets = self.rmember_targets = None
+        self.rmember_checkpoints = None
+        self.ref_offsets = self.ref_targets = self.ref_checkpoints = None
+        self.positions = {}  # Evaluation id -> dense index
+
+    def __len__(self):
+        return len(self.ids)
+
+    def index_of(self, evaluation_id):
+        """Return dense index of evaluation id"""
+        return self.positions[evaluation_id]
+
+    def checkpoint(self, index):
+        """Return checkpoint of dense index or None"""
+        checkpoint = self.checkpoints[index]
+        return None if checkpoint != checkpoint else checkpoint
+
+    @classmethod
+    def build(cls, data):
+        """Build index from TrialData"""
+        index = cls(data.trial_id)
+        evaluations = data.evaluations
+        index.ids = array("q", evaluations.ids)
+        positions = index.positions = {
+            id_: position for position, id_ in enumerate(index.ids)
+        }
+        count = len(index.ids)
+        index.checkpoints = array("d", (
+            float("nan") if checkpoint is None else checkpoint
+            for checkpoint in evaluations.values("checkpoint")
+        ))
+        index.containers = array("q", (
+            position if container is None else positions[container]
+            for position, container in enumerate(
+                evaluations.values("member_container_id")
+            )
+        ))
+        index.activations = array("q", (
+            -1 if activation is None else positions.get(activation, -1)
+            for activation in evaluations.values("activation_id")
+        ))
+        components = data.code_components
+        out = {
+            id_ for id_, name in zip(components.ids, components.values("name"))
+            if name == "Out"
+        }
+        index.is_out = array("b", (
+            component in out
+            for component in evaluations.values("code_component_id")
+        ))
+        index._build_dependencies(data.dependencies, count)
+        index._build_members(data.members, count)
+        index._build_references(count)
+        return index
+
+    def _build_dependencies(self, dependencies, count):
+        """Build dependency and reverse dependency adjacencies"""
+        positions = self.positions
+        sources = [positions[id_] for id_ in dependencies.values("dependent_id")]
+        targets = [positions[id_] for id_ in dependencies.values("dependency_id")]
+        codes = {}
+        types = [
+            codes.setdefault(type_, len(codes))
+            for type_ in dependencies.values("type")
+        ]
+        self.types = sorted(codes, key=codes.get)
+        for prefix, first, second in (("dep", sources, targets),
+                                      ("rdep", targets, sources)):
+            order = sorted(range(len(first)), key=first.__getitem__)
+            setattr(self, prefix + "_offsets", offsets_of(count, first))
+            setattr(self, prefix + "_targets", array(
+                "q", (second[row] for row in order)
+            ))
+            setattr(self, prefix + "_types", array(
+                "H", (types[row] for row in order)
+            ))
+
+    def _build_members(self, members, count):
+        """Build member groups and reverse member adjacencies"""
+        positions = self.positions
+        collections = [
+            positions[id_] for id_ in members.values("collection_id")
+        ]
+        targets = [positions[id_] for id_ in members.values("member_id")]
+        checkpoints = [
+            NONE_CHECKPOINT if checkpoint is None else checkpoint
+            for checkpoint in members.values("checkpoint")
+        ]
+        codes = {}
+        keys = [codes.setdefault(key, len(codes)) for key in members.values("key")]
+        self.keys = sorted(codes, key=codes.get)
+
+        order = sorted(range(len(collections)), key=lambda row: (
+            collections[row], keys[row], checkpoints[row], row
+        ))
+        groups = []  # (collection, key) of each group
+        member_offsets = array("q")
+        for position, row in enumerate(order):
+            group = (collections[row], keys[row])
+            if not groups or groups[-1] != group:
+                groups.append(group)
+                member_offsets.append(position)
+        member_offsets.append(len(order))
+        self.member_offsets = member_offsets
+        self.group_offsets = offsets_of(count, [group[0] for group in groups])
+        self.group_keys = array("q", (group[1] for group in groups))
+        self.member_targets = array("q", (targets[row] for row in order))
+        self.member_checkpoints = array(
+            "d", (checkpoints[row] for row in order)
+        )
+
+        order = sorted(range(len(targets)), key=targets.__getitem__)
+        self.rmember_offsets = offsets_of(count, targets)
+        self.rmember_targets = array("q", (collections[row] for row in order))
+        self.rmember_checkpoints = array(
+            "d", (checkpoints[row] for row in order)
+        )
+
+    def _build_references(self, count):
+        """Build container -> evaluations adjacency sorted by checkpoint"""
+        containers = self.containers
+        checkpoints = [
+            NONE_CHECKPOINT if checkpoint != checkpoint else checkpoint
+            for checkpoint in self.checkpoints
+        ]
+        order = sorted(range(count), key=lambda row: (
+            containers[row], checkpoints[row], row
+        ))
+        self.ref_offsets = offsets_of(count, containers)
+        self.ref_targets = array("q", order)
+        self.ref_checkpoints = array("d", (checkpoints[row] for row in order))
+
+    def to_entry(self):
+        """Return marshal-compatible dict"""
+        entry = {
+            name: (getattr(self, name).typecode, getattr(self, name).tobytes())
+            for name in self.ARRAYS
+        }
+        entry["trial_id"] = self.trial_id
+        entry["types"] = self.types
+        entry["keys"] = self.keys
+        return entry
+
+    @classmethod
+    def from_entry(cls, entry):
+        """Create index from to_entry result"""
+        index = cls(entry["trial_id"])
+        for name in cls.ARRAYS:
+            typecode, values = entry[name]
+            column = array(str(typecode))
+            column.frombytes(values)
+            setattr(index, name, column)
+        index.types = entry["types"]
+        index.keys = entry["keys"]
+        index.positions = {
+            id_: position for position, id_ in enumerate(index.ids)
+        }
+        return index
+
+
+def trial_version(trial):
+    """Return value that changes when new provenance of trial is stored
+
+    Finished trials do not change. Trial may be a Trial or a trial id
+    """
+    from sqlalchemy import func
+    from ...persistence import relational
+    from ...persistence.models import Trial, Evaluation, Dependency, Member
+    trial_id = getattr(trial, "id", trial)
+    status = getattr(trial, "status", None)
+    if status is None:
+        status = relational.session.query(Trial.m.status).filter(
+            Trial.m.id == trial_id
+        ).scalar()
+    if status == "finished":
+        return "finished"
+    return tuple(
+        relational.session.query(func.count(model.m.id))
+        .filter(model.m.trial_id == trial_id).scalar()
+        for model in (Evaluation, Dependency, Member)
+    )
+
+
+def load_graph_index(trial, data=None):
+    """Return GraphIndex of trial
+
+    Indexes of finished trials are stored in the analysis cache
+    """
+    from ...persistence import analysis_cache
+    from ...persistence.trial_data import TrialData
+    finished = getattr(trial, "finished", False)
+    trial_id = getattr(trial, "id", trial)
+    if finished:
+        entry = analysis_cache.load(INDEX_KIND, trial_id, INDEX_FORMAT)
+        if entry is not None:
+            return GraphIndex.from_entry(entry)
+    index = GraphIndex.build(data or TrialData(trial_id))
+    if finished:
+        analysis_cache.save(INDEX_KIND, trial_id, INDEX_FORMAT, index.to_entry())
+    return index
+
+
+class IndexedQuerier(object):
+    """Run dependency queries over a GraphIndex
+
+    Nodes are (dense index, checkpoint, is activation) tuples and
+    follow the same rules as NodeContext.dependencies. The search is
+    breadth-first, so steps are the shortest distances to the seeds.
+    The options provide the visit flags. Their visit_arrow and
+    visit_context hooks are not called
+    """
+
+    def __init__(self, index, options=None, evaluations=None):
+        self.index = index
+        self.options = options or QuerierOptions()
+        self.evaluations = evaluations  # Evaluation id -> evaluation object
+
+    def backward(self, node):
+        """Yield (neighbor, arrow) of node towards its influencers"""
+        index, checkpoint, is_activation = node
+        if is_activation:
+            return
+        graph, options = self.index, self.options
+        checkpoint = checkpoint or graph.checkpoint(index)
+        types = graph.types
+        targets, dep_types = graph.dep_targets, graph.dep_types
+        for edge in range(graph.dep_offsets[index], graph.dep_offsets[index + 1]):
+            target = targets[edge]
+            checkpoint = checkpoint or graph.checkpoint(target)
+            arrow = types[dep_types[edge]]
+            if arrow == "argument" and not options.visit_arguments:
+                continue
+            yield (target, None, False), arrow
+
+        activation = graph.activations[index]
+        if options.visit_activations and activation >= 0:
+            yield (activation, None, True), "<A>"
+
+        if checkpoint and options.visit_members:
+            if not options.visit_out and graph.is_out[index]:
+                return
+            container = graph.containers[index]
+            member_offsets, member_checkpoints = (
+                graph.member_offsets, graph.member_checkpoints
+            )
+            for group in range(graph.group_offsets[container],
+                               graph.group_offsets[container + 1]):
+                low = member_offsets[group]
+                position = bisect_right(
+                    member_checkpoints, checkpoint,
+                    low, member_offsets[group + 1]
+                ) - 1
+                if position >= low:
+                    yield (
+                        (graph.member_targets[position], checkpoint, False),
+                        "<{}>".format(graph.keys[graph.group_keys[group]])
+                    )
+
+    def forward(self, node):
+        """Yield (neighbor, arrow) of node towards the evaluations it influences
+
+        Members reach every use of their collections after the membership,
+        even if a later membership replaced them. Thus, forward slices may
+        include more evaluations than the reverse of backward slices
+        """
+        index, _, is_activation = node
+        if is_activation:
+            return
+        graph, options = self.index, self.options
+        types = graph.types
+        targets, dep_types = graph.rdep_targets, graph.rdep_types
+        for edge in range(graph.rdep_offsets[index], graph.rdep_offsets[index + 1]):
+            arrow = types[dep_types[edge]]
+            if arrow == "argument" and not options.visit_arguments:
+                continue
+            yield (targets[edge], None, False), arrow
+
+        if not options.visit_members:
+            return
+        ref_checkpoints = graph.ref_checkpoints
+        for edge in range(graph.rmember_offsets[index],
+                          graph.rmember_offsets[index + 1]):
+            collection = graph.rmember_targets[edge]
+            high = graph.ref_offsets[collection + 1]
+            low = bisect_left(
+                ref_checkpoints, graph.rmember_checkpoints[edge],
+                graph.ref_offsets[collection], high
+            )
+            for position in range(low, high):
+                target = graph.ref_targets[position]
+                if options.visit_out or not graph.is_out[target]:
+                    yield (target, None, False), "<member>"
+
+    def search(self, seeds, forward=False, stop_on=None, max_depth=None,
+               visited=None):
+        """Navigate from seed nodes
+
+        Arguments:
+        seeds -- nodes or evaluation ids
+        forward -- navigate towards influenced evaluations
+        stop_on -- evaluation ids. Stop when all of them are found
+        max_depth -- maximum number of steps from the seeds
+        visited -- nodes that should not be visited again
+
+        Return dict of visited node -> (steps, arrow) and found ids
+        """
+        graph = self.index
+        expand = self.forward if forward else self.backward
+        skip = visited or ()
+        visited = {}
+        queue = deque()
+        for seed in seeds:
+            if not isinstance(seed, tuple):
+                seed = (graph.index_of(seed), None, False)
+            if seed not in skip and seed not in visited:
+                visited[seed] = (0, None)
+                queue.append((seed, 0))
+
+        stop = set(stop_on or ())
+        found = set()
+        ids = graph.ids
+        while queue:
+            node, steps = queue.popleft()
+            if max_depth is not None and steps >= max_depth:
+                continue
+            for neighbor, arrow in expand(node):
+                if neighbor in visited or neighbor in skip:
+                    continue
+                visited[neighbor] = (steps + 1, arrow)
+                queue.append((neighbor, steps + 1))
+                evaluation_id = ids[neighbor[0]]
+                if evaluation_id in stop:
+                    found.add(evaluation_id)
+                    if len(found) == len(stop):
+                        return visited, found
+        return visited, found
+
+    def backward_slice(self, evaluation_ids, stop_on=None, max_depth=None):
+        """Return ids of evaluations that influence evaluation_ids"""
+        visited, _ = self.search(
+            evaluation_ids, stop_on=stop_on, max_depth=max_depth
+        )
+        ids = self.index.ids
+        return {ids[node[0]] for node in visited}
+
+    def forward_slice(self, evaluation_ids, stop_on=None, max_depth=None):
+        """Return ids of evaluations influenced by evaluation_ids"""
+        visited, _ = self.search(
+            evaluation_ids, forward=True, stop_on=stop_on, max_depth=max_depth
+        )
+        ids = self.index.ids
+        return {ids[node[0]] for node in visited}
+
+    def resolve(self, evaluation_id):
+        """Return evaluation object of id"""
+        if self.evaluations is None:
+            from ...persistence.trial_data import TrialData
+            self.evaluations = TrialData(self.index.trial_id).evaluations
+        return self.evaluations[evaluation_id]
+
+    def navigate_dependencies(self, initial_evaluations, visited=None, stop_on=None):
+        """Navigate like DependencyQuerier.navigate_dependencies
+
+        Return an empty list of nodes to visit, the set of visited
+        NodeContexts, and the set of found evaluations
+        """
+        graph = self.index
+        objects = {}
+        skip = set()
+        for context in visited or ():
+            objects[context.evaluation.id] = context.evaluation
+            skip.add((
+                graph.index_of(context.evaluation.id),
+                context.checkpoint, context.is_activation
+            ))
+        seeds = []
+        for evaluation in initial_evaluations:
+            objects.setdefault(evaluation.id, evaluation)
+            seeds.append((graph.index_of(evaluation.id), None, False))
+        stop = {}
+        for evaluation in stop_on or ():
+            stop[evaluation.id] = evaluation
+        nodes, found = self.search(seeds, stop_on=stop, visited=skip)
+
+        result = set(visited or ())
+        ids = graph.ids
+        for (index, checkpoint, is_activation), (steps, arrow) in nodes.items():
+            evaluation_id = ids[index]
+            evaluation = objects.get(evaluation_id)
+            if evaluation is None:
+                evaluation = objects[evaluation_id] = self.resolve(evaluation_id)
+            result.add(NodeContext(
+                evaluation, checkpoint, is_activation,
+                arrow=arrow, steps=steps, options=self.options
+            ))
+        return [], result, {stop[evaluation_id] for evaluation_id in found}
@@ -61,20 +61,7 @@ class NodeContext(object):
 
             # Move to all parts of the structure
             # Reconstruct state
-            member_dict = self.options.members(original)
-            state = {}
-            for key, checkpoints in member_dict.items():
-                value = max(
-                    (
-                        (member_checkpoint, member)
-                        for member_checkpoint, member in checkpoints.items()
-                        if member_checkpoint <= checkpoint
-                    ),
-                    key=lambda tup: tup[0],
-                    default=None 
-                )
-                if value is not None:
-                    state[key] = value
+            state = self.options.member_state(original, checkpoint)
 
             # Move to parts of the state
             for key, (member_checkpoint, member) in state.items():
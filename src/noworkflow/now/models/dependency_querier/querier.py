@@ -5,22 +5,59 @@
 
 from .querier_options import QuerierOptions
 from .node_context import NodeContext
+from .slice_cache import node_key
 
 class DependencyQuerier(object):
 
-    def __init__(self, options=None):
+    def __init__(self, options=None, cache=None):
         self.options = options or QuerierOptions()
         self.last_search = (None, None)
+        self.cache = cache  # SliceCache
 
     def navigate_dependencies(self, initial_evaluations, visited=None, stop_on=None):
+        if self.cache is None:
+            return self._navigate(initial_evaluations, visited, stop_on)
+        initial_evaluations = list(initial_evaluations)
+        if not initial_evaluations:
+            return self._navigate(initial_evaluations, visited, stop_on)
+        visited = visited or set()
+        trial_id = initial_evaluations[0].trial_id
+        key = self.cache.key(self.options, initial_evaluations, stop_on, visited)
+        entry = self.cache.get(trial_id, key)
+        if entry is not None:
+            return self._replay(trial_id, entry, initial_evaluations, visited, stop_on)
+        trace = []
+        result = self._navigate(initial_evaluations, visited, stop_on, trace)
+        nodes_to_visit, _, found = result
+        positions = {
+            node_key(context): position
+            for position, (context, _) in enumerate(trace)
+        }
+        self.cache.put(trial_id, key, {
+            "nodes": [
+                node_key(context) + (context.arrow,) for context, _ in trace
+            ],
+            "parents": [parent for _, parent in trace],
+            "found": [evaluation.id for evaluation in found],
+            "pending": [positions[node_key(context)] for context in nodes_to_visit],
+        })
+        return result
+
+    def _navigate(self, initial_evaluations, visited=None, stop_on=None, trace=None):
+        """Navigate dependencies
+        Append (visited context, index of the context that reached it) to trace"""
         self.options.reset_arrows()    
         nodes_to_visit = []
         visited = visited or set()
+        positions = {}
         for evaluation in initial_evaluations:
             context = NodeContext(evaluation, None, options=self.options)
             if context not in visited:
                 nodes_to_visit.append(context)
                 visited.add(self.options.visit_context(context))
+                if trace is not None:
+                    positions[context] = len(trace)
+                    trace.append((context, None))
 
         found = set()
         while nodes_to_visit:
@@ -30,10 +67,38 @@ class DependencyQuerier(object):
                     self.options.visit_arrow(context, neighbor)
                     visited.add(self.options.visit_context(neighbor))
                     nodes_to_visit.append(neighbor)
+                    if trace is not None:
+                        positions[neighbor] = len(trace)
+                        trace.append((neighbor, positions[context]))
                     if stop_on and neighbor.evaluation in stop_on:
                         found.add(neighbor.evaluation)
                         if len(found) == len(stop_on):
                             return nodes_to_visit, visited, found
         return nodes_to_visit, visited, found
 
-    
\ No newline at end of file
+    def _replay(self, trial_id, entry, initial_evaluations, visited, stop_on):
+        """Repeat the visits of a cached navigation"""
+        options = self.options
+        options.reset_arrows()
+        objects = {evaluation.id: evaluation for evaluation in initial_evaluations}
+        contexts = []
+        for evaluation_id, checkpoint, is_activation, arrow in entry["nodes"]:
+            evaluation = objects.get(evaluation_id)
+            if evaluation is None:
+                evaluation = objects[evaluation_id] = options.evaluation(
+                    trial_id, evaluation_id
+                )
+            contexts.append(NodeContext(
+                evaluation, checkpoint, is_activation,
+                arrow=arrow, options=options
+            ))
+        for context, parent in zip(contexts, entry["parents"]):
+            if parent is not None:
+                options.visit_arrow(contexts[parent], context)
+            visited.add(options.visit_context(context))
+        found_ids = set(entry["found"])
+        found = {
+            evaluation for evaluation in stop_on or ()
+            if evaluation.id in found_ids
+        }
+        return [contexts[position] for position in entry["pending"]], visited, found
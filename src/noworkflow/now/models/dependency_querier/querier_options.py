@@ -5,6 +5,8 @@
 
 from collections import defaultdict
 
+from ...persistence.member_timeline import MemberTimeline, MemberTimelines
+
 class QuerierOptions(object):
 
     def __init__(self, visit_activations=False, visit_arguments=True, visit_members=True, visit_out=True):
@@ -12,6 +14,19 @@ class QuerierOptions(object):
         self.visit_arguments = visit_arguments
         self.visit_members = visit_members
         self.visit_out = visit_out
+        self._timelines = {}  # Evaluation id -> MemberTimeline of evaluations
+
+    def flags(self):
+        """Get flags that change the navigation"""
+        return (
+            self.visit_activations, self.visit_arguments,
+            self.visit_members, self.visit_out
+        )
+
+    def evaluation(self, trial_id, evaluation_id):
+        """Get evaluation by id"""
+        from ...persistence.models import Evaluation
+        return Evaluation((trial_id, evaluation_id))
 
     def dependencies(self, evaluation):
         """Get evaluation dependencies"""
@@ -22,11 +37,17 @@ class QuerierOptions(object):
         return evaluation.member_container
 
     def members(self, evaluation):
-        """Get evaluation members"""
-        result = defaultdict(dict)
-        for member in evaluation.memberships_as_collection:
-            result[member.key][member.checkpoint] = member.member
-        return result
+        """Get MemberTimeline of evaluation members"""
+        timeline = self._timelines.get(evaluation.id)
+        if timeline is None:
+            timeline = self._timelines[evaluation.id] = MemberTimeline()
+            for member in evaluation.memberships_as_collection:
+                timeline.add(member.key, member.checkpoint, member.member)
+        return timeline
+
+    def member_state(self, evaluation, checkpoint):
+        """Get dict of key -> (checkpoint, member) of evaluation at checkpoint"""
+        return self.members(evaluation).state(checkpoint)
 
     def visit_arrow(self, from_, to_):
         """Visit arrow"""
@@ -40,25 +61,38 @@ class QuerierOptions(object):
 
 
 class PreloadedQuerierOptions(QuerierOptions):
+    """Load all evaluations, dependencies, and members of a trial before querying
 
-    def __init__(self, trial, visit_activations=False, visit_arguments=True, visit_members=True, visit_out=True):
+    The data source is the trial itself or a TrialData with read-only
+    records of the trial. Evaluations are indexed by id, so initial
+    evaluations may come from either source
+    """
+
+    def __init__(self, trial, visit_activations=False, visit_arguments=True, visit_members=True, visit_out=True, data=None):
         super(PreloadedQuerierOptions, self).__init__(visit_activations, visit_arguments, visit_members, visit_out)
         self.trial = trial
+        self.data = data
         self._dependencies = defaultdict(list)
-        self._members = defaultdict(lambda: defaultdict(dict))
+        self.timelines = None  # MemberTimelines with member ids
         self._containers = {}
         self._activations = {}
         self._evaluations = {}
         self.gen_disabled_static = True
         self.initialize(initial=True)
 
+    @property
+    def source(self):
+        """Return data source: TrialData or trial"""
+        return self.trial if self.data is None else self.data
+
     def add_static_arrow(self, from_, to_, mode, checkpoint=None):
         pass
 
     def initialize_evaluations(self):
         """Initialize evaluations"""
-        self._activations = {act.id: act for act in self.trial.activations}
-        self._evaluations = {eva.id: eva for eva in self.trial.evaluations}
+        source = self.source
+        self._activations = {act.id: act for act in source.activations}
+        self._evaluations = {eva.id: eva for eva in source.evaluations}
         for _, evaluation in self._evaluations.items():
             if (self.visit_activations or self.gen_disabled_static) and evaluation.activation_id:
                 activation = self._evaluations[evaluation.activation_id]
@@ -69,21 +103,29 @@ class PreloadedQuerierOptions(QuerierOptions):
 
     def initialize_dependencies(self):
         """Initialize dependencies"""
-        for dependency in self.trial.dependencies:
+        for dependency in self.source.dependencies:
             # Dependency between evaluations
             influenced = self._evaluations[dependency.dependent_id]
             influencer = self._evaluations[dependency.dependency_id]
-            self._dependencies[influenced].append(dependency)
+            self._dependencies[influenced.id].append(dependency)
             if dependency.type == "argument" and not (self.visit_arguments or self.gen_disabled_static):
                 continue
             self.add_static_arrow(influenced, influencer, dependency.type)
         
     def initialize_members(self):
-        """Initialize members"""
-        for member in self.trial.members:
+        """Initialize members
+
+        Share the timelines of the TrialData, if it is the data source
+        """
+        if self.data is not None:
+            self.timelines = self.data.timelines
+        else:
+            self.timelines = MemberTimelines()
+        for member in self.source.members:
             ecollection = self._evaluations[member.collection_id]
             emember = self._evaluations[member.member_id]
-            self._members[ecollection][member.key][member.checkpoint] = emember
+            if self.data is None:
+                self.timelines.add(member)
             if self.visit_members or self.gen_disabled_static:
                 self.add_static_arrow(ecollection, emember, "<{}>".format(member.key), member.checkpoint)
 
@@ -92,7 +134,7 @@ class PreloadedQuerierOptions(QuerierOptions):
         if not initial:
             self.__init__(
                 self.trial, self.visit_activations, self.visit_arguments, 
-                self.visit_members, self.visit_out
+                self.visit_members, self.visit_out, self.data
             )
 
         self.initialize_evaluations()
@@ -100,11 +142,23 @@ class PreloadedQuerierOptions(QuerierOptions):
         self.initialize_members()
         return self
 
+    def evaluation(self, trial_id, evaluation_id):
+        return self._evaluations[evaluation_id]
+
     def dependencies(self, evaluation):
-        return self._dependencies[evaluation]
+        return self._dependencies[evaluation.id]
 
     def member_container(self, evaluation):
         return self._containers.get(evaluation.id, evaluation)
 
     def members(self, evaluation):
-        return self._members[evaluation]
+        """Get MemberTimeline of evaluation members with member ids"""
+        return self.timelines.timeline(evaluation.id)
+
+    def member_state(self, evaluation, checkpoint):
+        evaluations = self._evaluations
+        return {
+            key: (member_checkpoint, evaluations[member_id])
+            for key, (member_checkpoint, member_id)
+            in self.members(evaluation).state(checkpoint).items()
+        }
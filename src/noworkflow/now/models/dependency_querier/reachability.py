@@ -0,0 +1,218 @@
+# Copyright (c) 2021 Universidade Federal Fluminense (UFF)
+# Copyright (c) 2021 Polytechnic Institute of New York University.
+# This file is part of noWorkflow.
+# Please, consult the license terms in the LICENSE file.
+"""Reachability index for was-derived-from queries"""
+
+from .graph_index import IndexedQuerier, load_graph_index, trial_version
+from .querier_options import QuerierOptions
+
+
+REACHABILITY_KIND = "reachability"
+REACHABILITY_FORMAT = 1
+# Bitset closures use up to count * count / 8 bytes. Larger trials
+# answer each query with a search and keep its result
+REACHABILITY_LIMIT = 20000
+MAX_LOADED = 4  # Reachability indexes kept in memory
+
+_loaded = {}  # (trial id, flags) -> (trial version, ReachabilityIndex)
+
+
+def iter_bits(value):
+    """Yield positions of set bits of int value"""
+    while value:
+        low = value & -value
+        yield low.bit_length() - 1
+        value ^= low
+
+
+class ReachabilityIndex(object):
+    """Transitive closure of the backward dependency navigation
+
+    Each evaluation has a bitset (bytes) of the dense indices of the
+    evaluations it was derived from, i.e., the evaluations found by
+    navigate_dependencies with stop_on. Bitsets are computed over the
+    strongly connected components of the navigation nodes, in reverse
+    topological order. Trials with more than limit evaluations skip the
+    closure and memoize searches instead
+    """
+
+    def __init__(self, index, options=None, limit=REACHABILITY_LIMIT):
+        self.index = index
+        self.options = options or QuerierOptions()
+        self.limit = limit
+        self.rows = None  # Dense index -> bitset bytes of ancestors
+        self.searches = {}  # Dense index -> ancestor ids, without rows
+
+    @classmethod
+    def build(cls, index, options=None, limit=REACHABILITY_LIMIT):
+        """Build reachability index of GraphIndex"""
+        result = cls(index, options, limit)
+        if len(index) <= limit:
+            result._build_rows()
+        return result
+
+    def _build_rows(self):
+        """Compute closures with an iterative Tarjan search"""
+        count = len(self.index)
+        expand = IndexedQuerier(self.index, self.options).backward
+        order = {}  # node -> discovery order
+        low = {}
+        edges = {}  # node -> neighbor nodes
+        stack = []
+        on_stack = set()
+        component_of = {}  # node -> component
+        through = []  # component -> bits of its evaluations and closure
+        rows = [0] * count
+        work = []
+
+        def discover(node):
+            """Push node to the search stacks"""
+            order[node] = low[node] = len(order)
+            edges[node] = []
+            stack.append(node)
+            on_stack.add(node)
+            work.append((node, expand(node)))
+
+        for seed_index in range(count):
+            if (seed_index, None, False) in order:
+                continue
+            discover((seed_index, None, False))
+            while work:
+                node, neighbors = work[-1]
+                for neighbor, _ in neighbors:
+                    edges[node].append(neighbor)
+                    if neighbor not in order:
+                        discover(neighbor)
+                        break
+                    if neighbor in on_stack:
+                        low[node] = min(low[node], order[neighbor])
+                else:
+                    work.pop()
+                    if work:
+                        parent = work[-1][0]
+                        low[parent] = min(low[parent], low[node])
+                    if low[node] == order[node]:
+                        self._close_component(
+                            node, stack, on_stack, edges,
+                            component_of, through, rows
+                        )
+        size = (count + 7) // 8
+        self.rows = [row.to_bytes(size, "little") for row in rows]
+
+    @staticmethod
+    def _close_component(root, stack, on_stack, edges, component_of,
+                         through, rows):
+        """Pop component of root and compute its closure"""
+        # pylint: disable=too-many-arguments
+        component = len(through)
+        members = []
+        while True:
+            member = stack.pop()
+            on_stack.discard(member)
+            component_of[member] = component
+            members.append(member)
+            if member == root:
+                break
+        bits = closure = 0
+        cyclic = False
+        for member in members:
+            bits |= 1 << member[0]
+            for neighbor in edges.pop(member):
+                reached = component_of[neighbor]
+                if reached == component:
+                    cyclic = True
+                else:
+                    closure |= through[reached]
+        if cyclic:
+            closure |= bits
+        through.append(bits | closure)
+        for member in members:
+            if member[1] is None and not member[2]:
+                rows[member[0]] = closure
+
+    def derives_from(self, evaluation_id, other_id):
+        """Check if evaluation was derived from other"""
+        positions = self.index.positions
+        if evaluation_id not in positions or other_id not in positions:
+            return False
+        position = positions[other_id]
+        if self.rows is None:
+            return other_id in self.ancestors(evaluation_id)
+        row = self.rows[positions[evaluation_id]]
+        return bool(row[position >> 3] >> (position & 7) & 1)
+
+    def ancestors(self, evaluation_id):
+        """Return set of ids of evaluations that evaluation_id derives from"""
+        positions = self.index.positions
+        if evaluation_id not in positions:
+            return set()
+        position = positions[evaluation_id]
+        ids = self.index.ids
+        if self.rows is not None:
+            return {
+                ids[bit] for bit in
+                iter_bits(int.from_bytes(self.rows[position], "little"))
+            }
+        result = self.searches.get(position)
+        if result is None:
+            querier = IndexedQuerier(self.index, self.options)
+            nodes, _ = querier.search([(position, None, False)])
+            result = self.searches[position] = {
+                ids[node[0]] for node in nodes
+                if node != (position, None, False)
+            }
+        return set(result)
+
+    def to_entry(self):
+        """Return marshal-compatible dict"""
+        return {
+            "flags": self.options.flags(), "limit": self.limit,
+            "rows": self.rows,
+        }
+
+    @classmethod
+    def from_entry(cls, index, options, entry):
+        """Create reachability index from to_entry result"""
+        result = cls(index, options, entry["limit"])
+        result.rows = entry["rows"]
+        return result
+
+
+def load_reachability_index(trial, options=None):
+    """Return ReachabilityIndex of trial
+
+    Keep the last indexes in memory while the trial does not change.
+    Store the indexes of finished trials in the analysis cache
+    """
+    from ...persistence import analysis_cache
+    options = options or QuerierOptions()
+    trial_id = getattr(trial, "id", trial)
+    flags = options.flags()
+    key = (trial_id, flags)
+    version = trial_version(trial)
+    loaded = _loaded.get(key)
+    if loaded is not None and loaded[0] == version:
+        return loaded[1]
+
+    finished = version == "finished"
+    index = load_graph_index(trial)
+    result = None
+    if finished:
+        entry = analysis_cache.load(
+            REACHABILITY_KIND, trial_id, REACHABILITY_FORMAT
+        )
+        if entry is not None and tuple(entry["flags"]) == flags:
+            result = ReachabilityIndex.from_entry(index, options, entry)
+    if result is None:
+        result = ReachabilityIndex.build(index, options)
+        if finished and result.rows is not None:
+            analysis_cache.save(
+                REACHABILITY_KIND, trial_id, REACHABILITY_FORMAT,
+                result.to_entry()
+            )
+    _loaded.pop(key, None)
+    if len(_loaded) >= MAX_LOADED:
+        _loaded.pop(next(iter(_loaded)))
+    _loaded[key] = (version, result)
+    return result
@@ -0,0 +1,126 @@
+# Copyright (c) 2021 Universidade Federal Fluminense (UFF)
+# Copyright (c) 2021 Polytechnic Institute of New York University.
+# This file is part of noWorkflow.
+# Please, consult the license terms in the LICENSE file.
+"""Memoized results of DependencyQuerier.navigate_dependencies"""
+
+import atexit
+
+from collections import OrderedDict
+
+from ...utils.metaprofiler import meta_profiler
+from .graph_index import trial_version
+
+
+SLICE_KIND = "slices"
+SLICE_FORMAT = 1
+MAX_SLICES = 256  # Slices kept per trial
+
+
+class SliceCache(object):
+    """Cache of navigation results
+
+    Keys are (options class, flags, seed ids, stop_on ids, visited nodes).
+    An entry stores the visited nodes in visit order, the node that
+    reached each of them, the found ids, and the nodes left to visit.
+    Hits replay visit_context and visit_arrow in the original order, so
+    options that collect arrows get the same calls.
+
+    Entries belong to a trial version. Slices of finished trials never
+    change and are stored in the analysis cache by flush, which runs at
+    exit for the shared slice_cache. Slices of other trials are dropped
+    when new provenance of the trial is stored
+    """
+
+    def __init__(self, max_slices=MAX_SLICES):
+        self.max_slices = max_slices
+        self.trials = {}  # trial id -> (version, OrderedDict of entries)
+        self.dirty = set()  # ids of finished trials with unsaved entries
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, options, seeds, stop_on, visited):
+        """Return cache key of navigation"""
+        return (
+            type(options).__name__, options.flags(),
+            frozenset(evaluation.id for evaluation in seeds),
+            None if stop_on is None else frozenset(
+                evaluation.id for evaluation in stop_on
+            ),
+            frozenset(node_key(context) for context in visited),
+        )
+
+    def entries(self, trial):
+        """Return entries of trial. Drop entries of old versions"""
+        from ...persistence import analysis_cache
+        trial_id = getattr(trial, "id", trial)
+        loaded = self.trials.get(trial_id)
+        if loaded is not None and loaded[0] == "finished":
+            # Finished trials do not change. Avoid querying the version
+            return loaded[1]
+        version = trial_version(trial)
+        if loaded is not None and loaded[0] == version:
+            return loaded[1]
+        entries = OrderedDict()
+        if version == "finished":
+            stored = analysis_cache.load(SLICE_KIND, trial_id, SLICE_FORMAT)
+            if stored is not None:
+                entries.update(stored["entries"])
+        self.trials[trial_id] = (version, entries)
+        return entries
+
+    def get(self, trial, key):
+        """Return entry or None"""
+        entry = self.entries(trial).get(key)
+        if entry is None:
+            self.misses += 1
+            meta_profiler.count("slice cache misses")
+        else:
+            self.hits += 1
+            meta_profiler.count("slice cache hits")
+        return entry
+
+    def put(self, trial, key, entry):
+        """Store entry"""
+        trial_id = getattr(trial, "id", trial)
+        entries = self.entries(trial)
+        entries[key] = entry
+        while len(entries) > self.max_slices:
+            entries.popitem(last=False)
+        if self.trials[trial_id][0] == "finished":
+            self.dirty.add(trial_id)
+
+    def flush(self):
+        """Save entries of finished trials in the analysis cache"""
+        from ...persistence import analysis_cache
+        for trial_id in self.dirty:
+            _, entries = self.trials[trial_id]
+            analysis_cache.save(SLICE_KIND, trial_id, SLICE_FORMAT, {
+                "entries": dict(entries)
+            })
+        self.dirty.clear()
+
+    def clear(self):
+        """Save pending entries and remove entries from memory"""
+        self.flush()
+        self.trials.clear()
+
+    def stats(self):
+        """Return dict with cache statistics"""
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "trials": len(self.trials),
+            "entries": sum(len(entries) for _, entries in self.trials.values()),
+        }
+
+
+def node_key(context):
+    """Return (evaluation id, checkpoint, is activation) of NodeContext"""
+    return (context.evaluation.id, context.checkpoint, context.is_activation)
+
+
+slice_cache = SliceCache()                                                       # pylint: disable=invalid-name
+atexit.register(slice_cache.flush)
@@ -61,8 +61,6 @@ class HistoryGraph(Graph):
 
         tmap, graph = self._summarize(tmap, graph)
 
-        self._calculate_distances(graph)
-
         nodes, scripts = self._filter_graph(tmap, graph)
 
         edges, order, children, actual_graph = self._create_edges(
@@ -117,10 +115,13 @@ class HistoryGraph(Graph):
         trial_gen -- trial generator
         """
         tmap = OrderedDict()
+        users = {
+            user.id: user.userLogin
+            for user in relational.session.query(User.m)
+        }
         id_s=1
         for trial in trial_gen:
-            user = relational.session.query(User.m).filter(User.m.id==trial.user_id).all()
-            trial_user = user[0].userLogin if (len(user)>0) else trial.user_id
+            trial_user = users.get(trial.user_id, trial.user_id)
             trial.display = str(trial.id)
             trial.level = 0
             trial.tooltip = """
@@ -143,30 +144,24 @@ class HistoryGraph(Graph):
         return tmap
 
     def _create_graph(self, trial_map):  # pylint: disable=no-self-use
-        """Create graph with initial distances
-
-        The graph is represented as a dict of dict of int
-        Int values represent the distance between two nodes
+        """Create graph of trial parents
 
         Return:
-        graph -- distance graph
+        graph -- AncestorGraph of trial ids
 
         Arguments:
         trial_map -- ordered trial map
         """
-        graph = defaultdict(lambda: defaultdict(lambda: MAX_IN_GRAPH))
+        graph = AncestorGraph()
 
         for trial in viewvalues(trial_map):
-            graph[trial.id][trial.id] = 0
-            if trial.parent_id is not None:
-                graph[trial.id][trial.parent_id] = 1
+            graph.add(trial.id, trial.parent_id)
 
         return graph
 
     def _summarize(self, trial_map, graph):  # pylint: disable=too-many-locals
         """Add display field to trials based on auto tags and summarizes"""
         node_map = OrderedDict()
-        new_graph = defaultdict(lambda: defaultdict(lambda: MAX_IN_GRAPH))
         new_tmap = {}
 
         for tag in Tag.auto_tags():
@@ -199,53 +194,24 @@ class HistoryGraph(Graph):
 
         node_map = OrderedDict(reversed(list(node_map.items())))
 
-        new_graph = defaultdict(lambda: defaultdict(lambda: MAX_IN_GRAPH))
+        new_graph = AncestorGraph()
 
         for node in viewvalues(node_map):
-            new_graph[node.id][node.id] = 0
+            new_graph.add(node.id)
 
-        for origin, distances in graph.items():
-            if origin not in new_tmap:
-                continue
-            orignode = new_tmap[origin].id
-            for target, dist in distances.items():
-                if target not in new_tmap:
-                    continue
-                targnode = new_tmap[target].id
-                new_graph[orignode][targnode] = min(
-                    new_graph[orignode][targnode], dist
-                )
+        for trial in viewvalues(trial_map):
+            node = new_tmap.get(trial.id)
+            parent = new_tmap.get(trial.parent_id)
+            if node is not None and parent is not None:
+                new_graph.add(node.id, parent.id)
 
         return node_map, new_graph
 
-    def _calculate_distances(self, graph):  # pylint: disable=no-self-use
-        """Prepare history graph
-
-
-        The graph is represented as a dict of dict of int
-        Int values represent the distance between two nodes
-        Use Floyd-Warshall algorithm to calculate distances
-
-
-        The returned graph can be used to:
-        -find parent trial after filter
-        -find previous trials in a branch line
-
-
-        Arguments:
-        graph -- distance graph
-        """
-        for k in graph:
-            for i in graph:
-                for j in graph:
-                    if graph[i][j] > graph[i][k] + graph[k][j]:
-                        graph[i][j] = graph[i][k] + graph[k][j]
-
     def _filter_graph(self, trial_map, graph):
         """Filter history graph
 
         Applies script and status filters on the graph
-        Filters remove trials that do not match the conditions from the graph
+        Filters hide trials that do not match the conditions in the graph
 
 
         Return:
@@ -255,7 +221,7 @@ class HistoryGraph(Graph):
 
         Arguments:
         trial_map -- ordered trial map
-        graph -- distance graph
+        graph -- AncestorGraph of trial ids
         """
         status = self.history.status.lower()
         script = self.history.script
@@ -264,8 +230,7 @@ class HistoryGraph(Graph):
         nid = 0
         for trial in reversed(list(trial_map.values())):
             if not trial.match_status(status) or not trial.match_script(script):
-                for tid in trial_map:
-                    graph[tid][trial.id] = MAX_IN_GRAPH
+                graph.hide(trial.id)
             else:
                 nodes.append(trial)
                 trial.nid = nid
@@ -278,7 +243,7 @@ class HistoryGraph(Graph):
         """Create edges for graph
 
         Arguments:
-        graph -- dict of dict of int with min distances between trials
+        graph -- AncestorGraph of trial ids
         nodes -- list of nodes from the oldest to the newest
         trial_map -- map of trial.id to trial node
 
@@ -312,7 +277,7 @@ class HistoryGraph(Graph):
 
 
         Arguments:
-        graph -- dict of dict of int with min distances between trials
+        graph -- AncestorGraph of trial ids
         nodes -- list of nodes from the oldest to the newest
 
         Keyword arguments:
@@ -322,13 +287,9 @@ class HistoryGraph(Graph):
             script_order = {}
 
         for trial in reversed(nodes):
-            tid = trial.id
-            target = min(
-                graph[tid],
-                key=lambda x, i=tid: float("inf") if x == i else graph[i][x]
-            )
-            if graph[tid][target] != MAX_IN_GRAPH:
-                yield (tid, target)
+            target = graph.nearest(trial.id)
+            # Trials without visible ancestors point to themselves
+            yield (trial.id, trial.id if target is None else target)
             script_order[trial.script] = 1
 
     def _set_trials_level(self, tmap, scripts, order, children, actual_graph):  # pylint: disable=no-self-use, too-many-arguments
@@ -439,6 +400,86 @@ class HistoryGraph(Graph):
         return "\n".join(lines)
 
 
+class AncestorGraph(object):
+    """Graph of nodes and their parents
+
+    Find the nearest visible ancestor of each node without computing the
+    distances between all nodes. Trial parentage is a forest, so the
+    search walks up the branch of the node and memoizes the result for
+    the hidden nodes in the way. Nodes of summarized graphs may have
+    several parents. Their nearest ancestors are found by a
+    breadth-first search
+    """
+
+    def __init__(self):
+        self.parents = OrderedDict()  # node -> list of parent nodes
+        self.hidden = set()
+        self._nearest = {}  # node -> nearest visible ancestor
+
+    def add(self, node, parent=None):
+        """Add node and an edge from node to parent"""
+        parents = self.parents.setdefault(node, [])
+        if parent is not None and parent != node and parent not in parents:
+            parents.append(parent)
+        self._nearest.clear()
+
+    def hide(self, node):
+        """Hide node. Hidden nodes are skipped by nearest"""
+        self.hidden.add(node)
+        self._nearest.clear()
+
+    def visible(self, node):
+        """Check if node is in the graph and is not hidden"""
+        return node in self.parents and node not in self.hidden
+
+    def nearest(self, node):
+        """Return nearest visible ancestor of node or None"""
+        nearest = self._nearest
+        if node in nearest:
+            return nearest[node]
+        path = [node]
+        seen = {node}
+        current = node
+        result = None
+        while True:
+            parents = self.parents.get(current, ())
+            if len(parents) > 1:
+                result = self._search(current)
+                break
+            if not parents or parents[0] in seen:
+                break
+            parent = parents[0]
+            if self.visible(parent):
+                result = parent
+                break
+            if parent in nearest:
+                result = nearest[parent]
+                break
+            path.append(parent)
+            seen.add(parent)
+            current = parent
+        for hidden in path:
+            nearest[hidden] = result
+        return result
+
+    def _search(self, node):
+        """Return nearest visible ancestor of node with a breadth-first search"""
+        frontier = [node]
+        seen = {node}
+        while frontier:
+            next_frontier = []
+            for current in frontier:
+                for parent in self.parents.get(current, ()):
+                    if parent in seen:
+                        continue
+                    if self.visible(parent):
+                        return parent
+                    seen.add(parent)
+                    next_frontier.append(parent)
+            frontier = next_frontier
+        return None
+
+
 class Node(object):
     """Node object with specific fields for graph"""
 
@@ -397,6 +397,8 @@ class TrialGraph(Graph):
 
     def __init__(self, trial):
         self.trial = weakref.proxy(trial)
+        # TrialData with read-only activations. Use it instead of the trial
+        self.data = None
 
         self.use_cache = True
         self.width = 500
@@ -410,6 +412,11 @@ class TrialGraph(Graph):
             4: self.definition_tree
         }
 
+    @property
+    def source(self):
+        """Return data source for activations: TrialData or trial"""
+        return self.trial if self.data is None else self.data
+
     def result(self, summarization):
         """Get summarization graph result"""
         return self.trial.finished, summarization.graph(
@@ -419,28 +426,28 @@ class TrialGraph(Graph):
     @cache("tree")
     def tree(self):
         """Convert tree structure into dict tree structure"""
-        return self.result(TreeSummarization(self.trial.activations))
+        return self.result(TreeSummarization(self.source.activations))
 
     @cache("no_match")
     def no_match(self):
         """Convert tree structure into dict graph without node matchings"""
-        return self.result(NoMatchSummarization(self.trial.activations))
+        return self.result(NoMatchSummarization(self.source.activations))
 
     @cache("exact_match")
     def exact_match(self):
         """Convert tree structure into dict graph and match equal calls"""
-        return self.result(StructureSummarization(self.trial.activations))
+        return self.result(StructureSummarization(self.source.activations))
 
     @cache("namespace_match")
     def namespace_match(self):
         """Convert tree structure into dict graph and match namespaces"""
-        return self.result(LineNameSummarization(self.trial.activations))
+        return self.result(LineNameSummarization(self.source.activations))
 
     @cache("definition_tree")
     def definition_tree(self):
         """Convert tree structure into dict tree structure based from code_components"""
         from ...persistence.models.code_component import CodeComponent
-        return self.result(DefinitionSummarization(self.trial.code_components, CodeComponent.ast_compositions(self.trial.id)))
+        return self.result(DefinitionSummarization(self.source.code_components, CodeComponent.ast_compositions(self.trial.id)))
 
     def _ipython_display_(self):
         from IPython.display import display
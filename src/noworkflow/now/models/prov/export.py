@@ -1,6 +1,8 @@
 from collections import Counter
 from itertools import groupby
+from operator import attrgetter
 
+from ...persistence.member_timeline import member_timelines
 from .save_output import SaveOutput
 
 OPERATIONS = ("add", "sub", "mult", "div", "mod", "pow", "floordiv", # arithmetic operators
@@ -64,63 +66,81 @@ def is_float(value):
         return False
         
 
-def export_prov(trial, name="temp", formats="svg"):
+def export_prov(trial, name="temp", formats="svg", data=None):
+    """Export trial to PROV-N
+
+    Use data (TrialData) instead of the trial relationships, if it is set.
+    Evaluations and dependencies are emitted by id in both cases
+    """
+    source = trial if data is None else data
+    evaluations = sorted(source.evaluations, key=attrgetter("id"))
+    dependencies = sorted(source.dependencies, key=attrgetter("id"))
     output = SaveOutput(name=name, formats=formats)
     output("prefix script <https://dew-uff.github.io/versioned-prov/ns/script#>")
     output("prefix version <https://dew-uff.github.io/versioned-prov/ns#>\n")
-    ckpt_list = []
+    ckpt_set = set()
     assignments = {}
     entity_generated_by_activity = []
+    if data is None:
+        find_evaluation = {ev.id: ev for ev in evaluations}.get
+    else:
+        find_evaluation = data.evaluations.get
+    value_dependencies = {}
+    members = member_timelines(trial, data)
 
     def insert_ckpt(ckpt):
-        if ckpt not in ckpt_list:
-            ckpt_list.append(ckpt)
+        ckpt_set.add(ckpt)
     
     def get_ckpt_order(ckpt):
-        return ckpt_list.index(ckpt) + 1
+        return ckpt_order[ckpt]
 
     def entity_name_by_id(evaluation_id):
-        for ev in trial.evaluations:
-            if ev.id == evaluation_id:
-                return entity_name(ev)
+        ev = find_evaluation(evaluation_id)
+        if ev is not None:
+            return entity_name(ev)
 
     def activity_name(evaluation_id):
-        for ev in trial.evaluations:
-            if ev.id == evaluation_id:
-                return ev.code_component.type
+        ev = find_evaluation(evaluation_id)
+        if ev is not None:
+            return ev.code_component.type
     
     def activity_label(evaluation_id):
-        for ev in trial.evaluations:
-            if ev.id == evaluation_id:
-                return ev.code_component.name.split("(")[0]
+        ev = find_evaluation(evaluation_id)
+        if ev is not None:
+            return ev.code_component.name.split("(")[0]
 
     def get_ckpt_by_id(evaluation_id):
-        for ev in trial.evaluations:
-            if ev.id == evaluation_id:
-                return ev.checkpoint
+        ev = find_evaluation(evaluation_id)
+        if ev is not None:
+            return ev.checkpoint
 
     def find_collection_name(evaluation_id):
-        for dep in trial.dependencies:
-            if dep.dependent_id == evaluation_id and dep.type == "value":
-                dependency = entity_name(dep.dependency)
-                if dependency in assignments:
-                    dependency = assignments[dependency]  
-                return dependency    
+        dep = value_dependencies.get(evaluation_id)
+        if dep is not None:
+            dependency = entity_name(dep.dependency)
+            if dependency in assignments:
+                dependency = assignments[dependency]  
+            return dependency    
         return None
 
-    for act in trial.activations:
+    for act in source.activations:
         insert_ckpt(act.start_checkpoint)
         
-    for ev in trial.evaluations:
+    for ev in evaluations:
         insert_ckpt(ev.checkpoint)
         
-    for mem in trial.members:
+    for mem in members:
         insert_ckpt(mem.checkpoint)
 
-    ckpt_list.sort()
+    for dep in dependencies:
+        if dep.type == "value":
+            value_dependencies.setdefault(dep.dependent_id, dep)
+
+    ckpt_list = sorted(ckpt_set)
+    ckpt_order = {ckpt: index + 1 for index, ckpt in enumerate(ckpt_list)}
     counter = Counter()
 
-    for ev in trial.evaluations:
+    for ev in evaluations:
         if ev.activation_id != 0 and not(ev.code_component.type == "name" and ev.code_component.mode == "r"):
             value = ev.repr
             
@@ -146,7 +166,7 @@ def export_prov(trial, name="temp", formats="svg"):
     previous_dep_id = 0
     previous_type = ""
     previous_activity = ""
-    groups = groupby(trial.dependencies, key=lambda x: (x.dependent_id, x.type))
+    groups = groupby(dependencies, key=lambda x: (x.dependent_id, x.type))
     for (dep_id, type_), group in groups:
         if type_ == "assignment":
             for dep in group:
@@ -291,7 +311,7 @@ def export_prov(trial, name="temp", formats="svg"):
         previous_dep_id = dep_id
         previous_type = type_
 
-    for mem in trial.members:
+    for mem in members:
         if mem.collection_activation_id and mem.member_activation_id:        
             member = entity_name(mem.member)
                 
@@ -6,25 +6,36 @@
 from __future__ import (absolute_import, print_function,
                         division)
 
+from .analysis_cache import AnalysisCache
+from .code_cache import CodeCache
 from .config import PersistenceConfig
 from .content_database import ContentDatabase
+from .file_hash_cache import FileHashCache
 from .relational_database import RelationalDatabase
 
 persistence_config = PersistenceConfig()                                         # pylint: disable=invalid-name
 content = ContentDatabase(persistence_config)                                    # pylint: disable=invalid-name
 relational = RelationalDatabase(persistence_config)                              # pylint: disable=invalid-name
+code_cache = CodeCache(persistence_config)                                       # pylint: disable=invalid-name
+file_hashes = FileHashCache(persistence_config, content)                         # pylint: disable=invalid-name
+analysis_cache = AnalysisCache(persistence_config)                               # pylint: disable=invalid-name
 
 
 def get_serializer(arg):                                                         # pylint: disable=unused-argument
     """Select serializer according to argument"""
     from .serializers import jsonpickle_serializer, jsonpickle_content
     from .serializers import repr_serializer, SimpleSerializer
+    from .serializers import ScientificSerializer
     if arg.serializer == "jsonpickle_content":
         return jsonpickle_content
     elif arg.serializer == "jsonpickle":
         return jsonpickle_serializer
     elif arg.serializer == "simple":
         return SimpleSerializer().serialize
+    elif arg.serializer == "scientific":
+        return ScientificSerializer().serialize
+    elif arg.serializer == "scientific_content":
+        return ScientificSerializer(store_content=True).serialize
     
     # else: # arg.serializer == "repr":
     return repr_serializer
@@ -34,5 +45,8 @@ __all__ = [
     "persistence_config",
     "content",
     "relational",
+    "code_cache",
+    "file_hashes",
+    "analysis_cache",
     "get_serializer"
 ]
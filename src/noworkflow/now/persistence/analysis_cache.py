@@ -0,0 +1,94 @@
+# Copyright (c) 2016 Universidade Federal Fluminense (UFF)
+# Copyright (c) 2016 Polytechnic Institute of New York University.
+# This file is part of noWorkflow.
+# Please, consult the license terms in the LICENSE file.
+"""Analysis Cache. Store indexes computed from finished trials"""
+from __future__ import (absolute_import, print_function,
+                        division, unicode_literals)
+
+import marshal
+import os
+
+from os.path import join, exists
+
+from .content.safeopen import std_open
+
+
+CACHE_DIRNAME = "analysis_cache"
+
+
+class AnalysisCache(object):
+    """Analysis Cache deal with trial indexes in disk
+
+    Entries are marshal dumps keyed by kind and trial id. Each kind
+    defines its format. Only store entries of finished trials, since
+    the provenance of other trials may still change.
+    """
+
+    def __init__(self, persistence_config):
+        self.cache_path = None  # Base path for storing indexes
+        persistence_config.add(self)
+
+    def set_path(self, config):
+        """Set cache_path"""
+        self.cache_path = join(config.provenance_path, CACHE_DIRNAME)
+
+    def mock(self, config):                                                      # pylint: disable=unused-argument
+        """Disable cache for tests"""
+        self.cache_path = None
+
+    def connect(self, config):
+        """Disable cache if persistence is mocked"""
+        if config.should_mock:
+            self.cache_path = None
+
+    @property
+    def enabled(self):
+        """Check if cache has a path"""
+        return self.cache_path is not None
+
+    def load(self, kind, trial_id, fmt):
+        """Return cached entry of kind with format fmt or None"""
+        if not self.enabled:
+            return None
+        path = join(self.cache_path, kind, str(trial_id))
+        try:
+            with std_open(path, "rb") as cache_file:
+                entry = marshal.load(cache_file)
+        except (IOError, OSError, EOFError, ValueError, TypeError):
+            return None
+        if not isinstance(entry, dict) or entry.get("format") != fmt:
+            return None
+        return entry
+
+    def save(self, kind, trial_id, fmt, entry):
+        """Store entry with format fmt. Ignore failures"""
+        if not self.enabled:
+            return False
+        directory = join(self.cache_path, kind)
+        path = join(directory, str(trial_id))
+        temp = "{}.{}.tmp".format(path, os.getpid())
+        entry = dict(entry, format=fmt)
+        try:
+            if not exists(directory):
+                os.makedirs(directory)
+            with std_open(temp, "wb") as cache_file:
+                marshal.dump(entry, cache_file)
+            if exists(path):
+                os.remove(path)
+            os.rename(temp, path)
+            return True
+        except (IOError, OSError, ValueError):
+            if exists(temp):
+                os.remove(temp)
+            return False
+
+    def remove(self, kind, trial_id):
+        """Remove cached entry of kind. Ignore failures"""
+        if not self.enabled:
+            return
+        path = join(self.cache_path, kind, str(trial_id))
+        try:
+            os.remove(path)
+        except (IOError, OSError):
+            pass
@@ -0,0 +1,133 @@
+# Copyright (c) 2016 Universidade Federal Fluminense (UFF)
+# Copyright (c) 2016 Polytechnic Institute of New York University.
+# This file is part of noWorkflow.
+# Please, consult the license terms in the LICENSE file.
+"""Code Cache. Store transformed code objects and definition provenance"""
+from __future__ import (absolute_import, print_function,
+                        division, unicode_literals)
+
+import hashlib
+import marshal
+import os
+import sys
+
+from os.path import join, exists, isdir
+
+from .content.safeopen import std_open
+from ..utils.functions import version
+
+
+CACHE_DIRNAME = "code_cache"
+CACHE_FORMAT = 1
+CACHE_ENTRIES = 512  # Keep at most X entries. Evict least recently used
+
+
+class CodeCache(object):
+    """Code Cache deal with transformed code objects in disk
+
+    Entries are keyed by source hash, noWorkflow version, Python version,
+    and transformer options. Each entry is a marshal dump of the compiled
+    code object and the definition provenance rows (code components,
+    code blocks, and compositions) created by the transformer.
+    Loads touch entries. Saves evict the least recently used ones above
+    max_entries
+    """
+
+    def __init__(self, persistence_config):
+        self.cache_path = None  # Base path for storing code objects
+        self.max_entries = CACHE_ENTRIES
+        self._version = None
+        persistence_config.add(self)
+
+    def set_path(self, config):
+        """Set cache_path"""
+        self.cache_path = join(config.provenance_path, CACHE_DIRNAME)
+
+    def mock(self, config):                                                      # pylint: disable=unused-argument
+        """Disable cache for tests"""
+        self.cache_path = None
+
+    def connect(self, config):
+        """Disable cache if persistence is mocked"""
+        if config.should_mock:
+            self.cache_path = None
+
+    @property
+    def enabled(self):
+        """Check if cache has a path"""
+        return self.cache_path is not None
+
+    def key(self, source, *options):
+        """Return cache key for source and transformer options"""
+        if self._version is None:
+            self._version = version()
+        if not isinstance(source, bytes):
+            source = source.encode("utf-8")
+        digest = hashlib.sha1(source)
+        digest.update(repr((
+            CACHE_FORMAT, self._version, sys.version, options
+        )).encode("utf-8"))
+        return digest.hexdigest()
+
+    def load(self, key):
+        """Return cached entry or None"""
+        if not self.enabled:
+            return None
+        path = join(self.cache_path, key[:2], key[2:])
+        try:
+            with std_open(path, "rb") as cache_file:
+                entry = marshal.load(cache_file)
+            os.utime(path, None)
+            return entry
+        except (IOError, OSError, EOFError, ValueError, TypeError):
+            return None
+
+    def save(self, key, entry):
+        """Store entry. Ignore failures"""
+        if not self.enabled:
+            return False
+        directory = join(self.cache_path, key[:2])
+        path = join(directory, key[2:])
+        temp = "{}.{}.tmp".format(path, os.getpid())
+        try:
+            if not exists(directory):
+                os.makedirs(directory)
+            with std_open(temp, "wb") as cache_file:
+                marshal.dump(entry, cache_file)
+            if exists(path):
+                os.remove(path)
+            os.rename(temp, path)
+        except (IOError, OSError, ValueError):
+            if exists(temp):
+                os.remove(temp)
+            return False
+        self.prune()
+        return True
+
+    def prune(self):
+        """Remove least recently used entries above max_entries
+        Return number of removed entries"""
+        if not self.enabled or not isdir(self.cache_path):
+            return 0
+        entries = []
+        for dirname in os.listdir(self.cache_path):
+            directory = join(self.cache_path, dirname)
+            if not isdir(directory):
+                continue
+            for name in os.listdir(directory):
+                if name.endswith(".tmp"):
+                    continue
+                path = join(directory, name)
+                try:
+                    entries.append((os.stat(path).st_mtime, path))
+                except OSError:
+                    pass
+        entries.sort()
+        removed = 0
+        for _, path in entries[:max(len(entries) - self.max_entries, 0)]:
+            try:
+                os.remove(path)
+                removed += 1
+            except OSError:
+                pass
+        return removed
@@ -11,6 +11,8 @@ import sys
 from os.path import join, isdir
 
 from ..utils.io import print_msg
+from .content.cache import CONTENT_CACHE_SIZE
+from .content.compression import COMPRESSION_THRESHOLD
 
 
 PROVENANCE_DIRNAME = ".noworkflow"
@@ -26,6 +28,12 @@ class PersistenceConfig(object):
         self.should_mock = False
         self.content_dir = None
         self.content_engine = None # Force a content engine
+        self.content_compression = None  # Blob compression codec
+        self.compression_threshold = COMPRESSION_THRESHOLD  # Minimum size
+        self.content_workers = None  # Threads of threading content engines
+        self.content_queue_limit = None  # Bytes waiting for content threads
+        self.content_cache_size = CONTENT_CACHE_SIZE  # Bytes of cached reads
+        self.storage_profile = None  # SQLite storage profile
 
         if path:
             self.path = path
@@ -6,6 +6,9 @@ import hashlib
 
 from contextlib import contextmanager
 from . import safeopen
+from . import compression
+
+CHUNK_SIZE = 1 << 20
 
 class ContentDatabaseEngine(object):
     def __init__(self, config):
@@ -14,7 +17,10 @@ class ContentDatabaseEngine(object):
         self.io_open = io.open  # Original Python open function in Python 3
         self.codecs_open = codecs.open  # Alternative open function
         self.os_open = os.open  # Low level open function
+        self.compression = None  # Compression codec name
+        self.compression_threshold = compression.COMPRESSION_THRESHOLD
         self.set_path(config)
+        self.set_compression(config)
         self._use_default = False
 
     def restore_open(self):
@@ -33,8 +39,24 @@ class ContentDatabaseEngine(object):
             """Mock get"""
             return self.temp[content_hash]
 
+        def put_file(path, filename="generic"):
+            """Mock put_file"""
+            with self.std_open(path, "rb") as fil:
+                return put(fil.read(), filename)
+
         self.put = put
         self.get = get
+        self.put_file = put_file
+
+    def set_compression(self, config):
+        """Set compression codec and threshold from config"""
+        name = getattr(config, "content_compression", None)
+        compression.get_codec(name)  # Check that the codec is available
+        self.compression = None if name == "none" else name
+        self.compression_threshold = getattr(
+            config, "compression_threshold",
+            compression.COMPRESSION_THRESHOLD
+        )
 
     def connect(self, config):
         """Connect to content database"""
@@ -52,14 +74,62 @@ class ContentDatabaseEngine(object):
         """Get file from database"""
         raise NotImplementedError("Implement in subclass")
 
+    def put_file(self, path, filename="generic"):  # pylint: disable=method-hidden
+        """Put content of file into database"""
+        with self.std_open(path, "rb") as fil:
+            return self.put(fil.read(), filename)
+
+    def hash_header(self, size):  # pylint: disable=unused-argument
+        """Return prefix used for hashing content of the given size"""
+        return b""
+
+    def _get_hash_from_content(self, content):
+        """Calculate hash from content"""
+        digest = hashlib.sha1(self.hash_header(len(content)))
+        digest.update(content)
+        return digest.hexdigest()
+
+    def hashed_put_attr(self, content, filename, content_hash):  # pylint: disable=unused-argument
+        """Return attributes for the do_put operation of content
+        that was already hashed"""
+        return self.put_attr(content, filename)
+
+    def hash_file(self, path):
+        """Return content hash of file without storing it
+        Read the file in chunks"""
+        digest = hashlib.sha1(self.hash_header(os.path.getsize(path)))
+        with self.std_open(path, "rb") as fil:
+            for chunk in iter(lambda: fil.read(CHUNK_SIZE), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def register(self, content_hash, filename):
+        """Register stored content under filename without reading it again"""
+        pass  # do nothing by default
+
     def find_subhash(self, content_hash):
         """Find hash in database"""
         raise NotImplementedError("Implement in subclass")
 
+    def list_hashes(self):
+        """List hashes of the content directory"""
+        files = []
+        for r,d, f in os.walk(self.content_path):
+            for file in f:
+                fileName=os.path.basename(r)
+                fileName+=file
+                files.append(fileName)
+        return files
+
     def gc(self, content_hash):
         """Collect garbage from database"""
         raise NotImplementedError("Implement in subclass")
 
+    def recompress(self):
+        """Rewrite stored blobs with the current compression settings
+        Return (number of blobs, bytes before, bytes after)"""
+        raise NotImplementedError("Implement in subclass")
+
     def commit_content(self, message):
         """Commit content"""
         raise NotImplementedError("Implement in subclass")
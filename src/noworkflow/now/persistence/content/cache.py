@@ -0,0 +1,79 @@
+"""Size-bounded LRU cache of content database reads
+
+Contents are addressed by their hashes and never change.
+Thus, entries never need to be invalidated, only evicted
+"""
+import threading
+
+from collections import OrderedDict
+
+from ...utils.metaprofiler import meta_profiler
+
+
+CONTENT_CACHE_SIZE = 64 << 20  # Default byte budget
+
+
+class ContentCache(object):
+    """LRU cache of contents by hash with a byte budget"""
+
+    def __init__(self, max_bytes=CONTENT_CACHE_SIZE):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.size = 0  # Bytes of cached contents
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = threading.Lock()  # The vis server reads from threads
+
+    def get(self, content_hash):
+        """Return cached content or None"""
+        with self.lock:
+            content = self.entries.get(content_hash)
+            if content is None:
+                self.misses += 1
+                meta_profiler.count("content cache misses")
+                return None
+            self.entries.move_to_end(content_hash)
+            self.hits += 1
+        meta_profiler.count("content cache hits")
+        return content
+
+    def put(self, content_hash, content):
+        """Cache content. Skip contents that do not fit the budget"""
+        size = len(content)
+        with self.lock:
+            if size > self.max_bytes or content_hash in self.entries:
+                return
+            self.entries[content_hash] = content
+            self.size += size
+            self._evict()
+
+    def resize(self, max_bytes):
+        """Change byte budget. Evict entries that no longer fit"""
+        with self.lock:
+            self.max_bytes = max_bytes
+            self._evict()
+
+    def _evict(self):
+        """Remove least recently used entries until the budget fits"""
+        while self.size > self.max_bytes:
+            _, evicted = self.entries.popitem(last=False)
+            self.size -= len(evicted)
+            self.evictions += 1
+            meta_profiler.count("content cache evictions")
+
+    def clear(self):
+        """Remove all entries"""
+        with self.lock:
+            self.entries.clear()
+            self.size = 0
+
+    def stats(self):
+        """Return dict with cache statistics"""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": len(self.entries),
+            "bytes": self.size,
+        }
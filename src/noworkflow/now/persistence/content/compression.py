@@ -0,0 +1,149 @@
+"""Per-blob compression for content database engines
+
+Compressed blobs start with a header: MAGIC followed by the codec id.
+Blobs without the header are raw. Raw blobs that happen to start with
+MAGIC are stored with the "none" codec id to keep get unambiguous.
+Content hashes always refer to the raw content
+"""
+import zlib
+
+from collections import namedtuple
+
+
+MAGIC = b"\x89NWC"
+COMPRESSION_THRESHOLD = 1024  # Blobs smaller than it stay raw
+ZLIB_LEVEL = 6
+
+Codec = namedtuple("Codec", "name id compress decompress compressor")
+
+
+class ChunkCompressor(object):
+    """Compressor with compress/flush methods for codecs without it"""
+
+    def __init__(self, compress):
+        self.chunks = []
+        self.function = compress
+
+    def compress(self, chunk):
+        """Accumulate chunk"""
+        self.chunks.append(chunk)
+        return b""
+
+    def flush(self):
+        """Compress accumulated chunks"""
+        return self.function(b"".join(self.chunks))
+
+
+def _zlib():
+    """Create zlib codec"""
+    return Codec(
+        "zlib", 1,
+        lambda data: zlib.compress(data, ZLIB_LEVEL),
+        zlib.decompress,
+        lambda: zlib.compressobj(ZLIB_LEVEL),
+    )
+
+
+def _zstd():
+    """Create zstd codec. Requires zstandard"""
+    import zstandard
+    compressor = zstandard.ZstdCompressor()
+    decompressor = zstandard.ZstdDecompressor()
+    return Codec(
+        "zstd", 2,
+        compressor.compress,
+        lambda data: decompressor.decompressobj().decompress(data),
+        compressor.compressobj,
+    )
+
+
+def _lz4():
+    """Create lz4 codec. Requires lz4"""
+    import lz4.frame
+    return Codec(
+        "lz4", 3,
+        lz4.frame.compress,
+        lz4.frame.decompress,
+        lambda: ChunkCompressor(lz4.frame.compress),
+    )
+
+
+CODEC_FACTORIES = {
+    "zlib": _zlib,
+    "zstd": _zstd,
+    "lz4": _lz4,
+}
+CODEC_NAMES = {1: "zlib", 2: "zstd", 3: "lz4"}
+CODECS = {}
+
+
+def get_codec(name):
+    """Return codec by name. Return None for "none" or None
+    Raise ValueError if the codec is unknown or its module is missing"""
+    if name is None or name == "none":
+        return None
+    codec = CODECS.get(name)
+    if codec is None:
+        if name not in CODEC_FACTORIES:
+            raise ValueError("Unknown compression codec {}".format(name))
+        try:
+            codec = CODECS[name] = CODEC_FACTORIES[name]()
+        except ImportError:
+            raise ValueError(
+                "Compression codec {} requires a module that is not "
+                "installed".format(name)
+            )
+    return codec
+
+
+def header(codec):
+    """Return blob header of codec"""
+    return MAGIC + bytes(bytearray([codec.id if codec else 0]))
+
+
+def encode(content, codec, threshold=COMPRESSION_THRESHOLD):
+    """Return stored representation of content
+
+    Keep content raw when it is smaller than threshold or when
+    compression does not reduce its size
+    """
+    if codec is not None and len(content) >= threshold:
+        compressed = codec.compress(content)
+        if len(compressed) + len(MAGIC) + 1 < len(content):
+            return header(codec) + compressed
+    if bytes(content[:len(MAGIC)]) == MAGIC:
+        return header(None) + bytes(content)
+    return content
+
+
+def write_encoded(chunks, output, codec, size,
+                  threshold=COMPRESSION_THRESHOLD):
+    """Write stored representation of content chunks to output file
+    Content with size >= threshold is always compressed"""
+    chunks = iter(chunks)
+    if codec is not None and size >= threshold:
+        compressor = codec.compressor()
+        output.write(header(codec))
+        for chunk in chunks:
+            output.write(compressor.compress(chunk))
+        output.write(compressor.flush())
+        return
+    first = next(chunks, b"")
+    if first[:len(MAGIC)] == MAGIC:
+        output.write(header(None))
+    output.write(first)
+    for chunk in chunks:
+        output.write(chunk)
+
+
+def decode(data):
+    """Return raw content of stored representation"""
+    if data[:len(MAGIC)] != MAGIC:
+        return data
+    codec_id = bytearray(data[len(MAGIC):len(MAGIC) + 1])[0]
+    payload = data[len(MAGIC) + 1:]
+    if codec_id == 0:
+        return payload
+    if codec_id not in CODEC_NAMES:
+        raise ValueError("Unknown compression codec id {}".format(codec_id))
+    return get_codec(CODEC_NAMES[codec_id]).decompress(payload)
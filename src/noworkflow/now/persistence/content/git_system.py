@@ -49,6 +49,25 @@ def update_index(mode, content_hash, filename, git_path):
     return execute(cmd, cwd=git_path)
 
 
+def update_index_info(entries, git_path):
+    """Add (mode, content_hash, filename) entries to the index at once"""
+    if not entries:
+        return b""
+    cmd = ["git", "update-index", "--index-info"]
+    p = subprocess.Popen(
+        cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+        stdin=subprocess.PIPE, cwd=git_path)
+    out = p.communicate("".join(
+        "{} blob {}\t{}\n".format(mode, content_hash, filename)
+        for mode, content_hash, filename in entries
+    ).encode("utf-8"))[0]
+    returncode = p.wait()
+    if returncode != 0:
+        print(out)
+        raise subprocess.CalledProcessError(returncode, cmd)
+    return out
+
+
 def write_tree(git_path):
     cmd = ["git", "write-tree"]
     return execute(cmd, cwd=git_path).decode().replace("\n", "")
@@ -81,6 +100,8 @@ def commit_tree(tree_hash, commit_message, git_path, author=None, parent=None):
     if author:
         env = env.copy()
         env["GIT_AUTHOR_NAME"], env["GIT_AUTHOR_EMAIL"] = author
+        env.setdefault("GIT_COMMITTER_NAME", author[0])
+        env.setdefault("GIT_COMMITTER_EMAIL", author[1])
     return execute(cmd, cwd=git_path, env=env).decode().replace("\n", "")
 
 
@@ -1,5 +1,4 @@
 import os
-import hashlib
 
 from collections import Counter
 
@@ -23,6 +22,9 @@ class GitContentDatabaseEngine(ContentDatabaseEngine):
         self.user_path = os.path.expanduser("~")
         self._max_filename_size = 4096
         self.object_hashes = {}
+        self._committed = {}  # object_hashes of the previous commit
+        self._tree_entries = {}  # dirname -> {basename: (is tree, hash)}
+        self._tree_hashes = {}  # dirname -> tree hash of the previous commit
 
     def set_path(self, config):
         """Set content path"""
@@ -33,24 +35,57 @@ class GitContentDatabaseEngine(ContentDatabaseEngine):
         git_system.garbage_collection(self.content_path, aggressive)
 
     def commit_content(self, message):
-        """Commit the current files of content database"""
+        """Commit the current files of content database
+        Rewrite only the trees of directories with new or changed files
+        since the previous commit of this engine. The first commit of a
+        process writes all trees. Thus, only processes with several
+        commits, such as the Jupyter kernel, reuse trees"""
         self.close()
-        trees = {'': self.new_tree('')}
-
-        for key, value in self.object_hashes.items():
+        changed = self.object_hashes.items() - self._committed.items()
+        self._committed.update(changed)
+        entries = self._tree_entries
+        dirty = {}  # dirname -> changed basenames
+        for key, value in changed:
+            dirname = os.path.dirname(key)
             basename = os.path.basename(key)
-            self.insert_blob(self._get_tree(trees, key), basename, value)
-
-        tree_hashes = {}
-        tree_keys = sorted(list(trees.keys()), key=len, reverse=True)
-        for tree in tree_keys:
-            dirname = os.path.dirname(tree)
-            basename = os.path.basename(tree)
-            tree_hashes[tree] = value = self.write_tree(trees[tree])
-            if basename != '':
-                self.insert_tree(trees[dirname], basename, value)
-
-        return self.create_commit_object(message, tree_hashes[''])
+            entries.setdefault(dirname, {})[basename] = (False, value)
+            while True:
+                dirty.setdefault(dirname, set()).add(basename)
+                if dirname == '':
+                    break
+                dirname, basename = (
+                    os.path.dirname(dirname), os.path.basename(dirname)
+                )
+                entries.setdefault(dirname, {}).setdefault(
+                    basename, (True, None)
+                )
+
+        if '' not in self._tree_hashes:
+            dirty.setdefault('', set())
+        for tree in sorted(dirty, key=len, reverse=True):
+            value = self.update_tree(tree, entries.get(tree, {}), dirty[tree])
+            self._tree_hashes[tree] = value
+            if tree != '':
+                entries[os.path.dirname(tree)][os.path.basename(tree)] = (
+                    True, value
+                )
+
+        return self.create_commit_object(message, self._tree_hashes[''])
+
+    def update_tree(self, dirname, entries, changed):  # pylint: disable=unused-argument
+        """Write tree of dirname. Return tree hash
+
+        Arguments:
+        entries -- dict of basename -> (is tree, hash) of the directory
+        changed -- basenames that changed since the previous commit
+        """
+        tree = self.new_tree(dirname)
+        for basename, (is_tree, value) in sorted(entries.items()):
+            if is_tree:
+                self.insert_tree(tree, basename, value)
+            else:
+                self.insert_blob(tree, basename, value)
+        return self.write_tree(tree)
 
     def _increment(self, filename):
         """Increment filename to avoid collisions"""
@@ -82,19 +117,13 @@ class GitContentDatabaseEngine(ContentDatabaseEngine):
                 result = self._increment(filename)
         return result
 
-    def _get_hash_from_content(self, content):
-        """Calculate hash from content"""
-        git_content = bytes_string('blob {}'.format((len(content)))) + b'\0'
-        hash = hashlib.sha1(git_content + content).hexdigest()
-        return hash
-
-    def _get_tree(self, trees, key):
-        """Build git tree recursively"""
-        original = dirname = os.path.dirname(key)
-        while dirname not in trees:
-            trees[dirname] = self.new_tree(dirname)
-            dirname = os.path.dirname(dirname)
-        return trees[original]
+    def hash_header(self, size):
+        """Return git blob header"""
+        return bytes_string('blob {}'.format(size)) + b'\0'
+
+    def register(self, content_hash, filename):
+        """Add stored blob to the next commit tree"""
+        self.object_hashes[self._inc_name(filename)] = content_hash
 
     def create_initial_commit(self):
         """Create the initial commit of the git repository"""
@@ -0,0 +1,538 @@
+"""Content database engine that appends blobs to pack files
+
+Layout of the content.pack directory:
+    pack-NNNNNN.pack -- sequence of blobs. Each blob starts with a header
+                        (20 bytes sha1, 8 bytes size) followed by its content
+    index            -- magic followed by fixed size records
+                        (sha1, pack number, offset, size) sorted by sha1.
+                        It is mapped in memory for binary search
+    journal          -- unsorted records appended after the last merge
+    lock             -- appenders hold an exclusive lock on this file
+
+Appenders of several processes share the pack files. Each put holds the
+exclusive lock while it appends the blob and its journal record.
+The journal is merged into the index by commit_content and gc
+"""
+import hashlib
+import heapq
+import mmap
+import os
+import shutil
+import struct
+import tempfile
+import threading
+
+from binascii import hexlify, unhexlify
+from contextlib import contextmanager
+from os.path import join, isdir, isfile
+from string import hexdigits
+
+from .base import ContentDatabaseEngine, CHUNK_SIZE
+from . import safeopen
+from .compression import MAGIC, get_codec, encode, decode, write_encoded
+
+try:
+    import fcntl
+except ImportError:  # Windows. Only a single appender process is supported
+    fcntl = None
+
+PACK_DATABASE_DIR = 'content.pack'
+INDEX_MAGIC = b"NOWPIDX1"
+PACK_SIZE = 1 << 30  # Start a new pack file after 1 GiB
+JOURNAL_LIMIT = 1 << 16  # Merge journal into the index after 65536 blobs
+
+BLOB_HEADER = struct.Struct(">20sQ")  # sha1, size
+RECORD = struct.Struct(">20sIQQ")  # sha1, pack number, offset, size
+
+
+class FileLock(object):
+    """Inter-process lock based on flock. Reentrant for the same thread"""
+
+    def __init__(self, path):
+        self.path = path
+        self.thread_lock = threading.RLock()
+        self.descriptor = None
+        self.mode = None
+        self.depth = 0
+
+    @contextmanager
+    def hold(self, exclusive=True):
+        """Hold lock. A shared lock is upgraded by nested exclusive holds"""
+        with self.thread_lock:
+            if self.descriptor is None:
+                self.descriptor = safeopen.os_open(
+                    self.path, os.O_RDWR | os.O_CREAT
+                )
+            previous = self.mode if self.depth else None
+            mode = fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH
+            if previous != fcntl.LOCK_EX and previous != mode:
+                fcntl.flock(self.descriptor, mode)
+                self.mode = mode
+            self.depth += 1
+            try:
+                yield
+            finally:
+                self.depth -= 1
+                if not self.depth:
+                    fcntl.flock(self.descriptor, fcntl.LOCK_UN)
+                elif previous is not None and previous != self.mode:
+                    fcntl.flock(self.descriptor, previous)
+                    self.mode = previous
+
+    def close(self):
+        """Close lock file"""
+        with self.thread_lock:
+            if self.descriptor is not None:
+                os.close(self.descriptor)
+                self.descriptor = None
+
+
+class ThreadLock(object):
+    """Lock for platforms without flock. Reentrant for the same thread"""
+
+    def __init__(self, path):  # pylint: disable=unused-argument
+        self.thread_lock = threading.RLock()
+
+    @contextmanager
+    def hold(self, exclusive=True):  # pylint: disable=unused-argument
+        """Hold lock"""
+        with self.thread_lock:
+            yield
+
+    def close(self):
+        """Do nothing"""
+        pass
+
+
+class PackEngine(ContentDatabaseEngine):
+    """Store blobs in pack files with a sorted sha1 index"""
+    # put writes buffer objects (e.g., memoryview) before returning
+    accepts_buffers = True
+
+    def __init__(self, config):
+        super(PackEngine, self).__init__(config)
+        self.lock = ThreadLock(None)
+        self._index = None  # mmap of index file
+        self._index_count = 0
+        self._index_id = None
+        self._journal = {}  # sha1 -> (pack, offset, size)
+        self._journal_position = 0
+        self._pack = None  # (pack number, append handle)
+        self._readers = {}  # pack number -> read handle
+
+    def connect(self, config):
+        """Create pack directory"""
+        if not config.should_mock and not isdir(self.content_path):
+            os.makedirs(self.content_path)
+        if not config.should_mock:
+            self.lock = (FileLock if fcntl else ThreadLock)(
+                join(self.content_path, "lock")
+            )
+
+    def set_path(self, config):
+        """Set content path"""
+        self.content_path = join(config.provenance_path, PACK_DATABASE_DIR)
+
+    @property
+    def index_path(self):
+        """Return path of sorted index"""
+        return join(self.content_path, "index")
+
+    @property
+    def journal_path(self):
+        """Return path of journal"""
+        return join(self.content_path, "journal")
+
+    def pack_path(self, number):
+        """Return path of pack file"""
+        return join(self.content_path, "pack-{:06d}.pack".format(number))
+
+    # Lookup
+
+    def _map_index(self):
+        """Map index file in memory if it was replaced
+        Return True if it was replaced"""
+        try:
+            stat = os.stat(self.index_path)
+        except OSError:
+            stat = None
+        index_id = stat and (stat.st_ino, stat.st_size, stat.st_mtime)
+        if index_id == self._index_id:
+            return False
+        if self._index is not None:
+            self._index.close()
+        self._index, self._index_count, self._index_id = None, 0, index_id
+        if stat is None or stat.st_size <= len(INDEX_MAGIC):
+            return True
+        with self.std_open(self.index_path, "rb") as index_file:
+            self._index = mmap.mmap(
+                index_file.fileno(), 0, access=mmap.ACCESS_READ
+            )
+        if self._index[:len(INDEX_MAGIC)] != INDEX_MAGIC:
+            raise ValueError("Invalid pack index {}".format(self.index_path))
+        self._index_count = (
+            (stat.st_size - len(INDEX_MAGIC)) // RECORD.size
+        )
+        return True
+
+    def _read_journal(self):
+        """Read journal records appended since the last read"""
+        try:
+            stat = os.stat(self.journal_path)
+        except OSError:
+            return
+        if stat.st_size - self._journal_position < RECORD.size:
+            return
+        with self.std_open(self.journal_path, "rb") as journal_file:
+            journal_file.seek(self._journal_position)
+            data = journal_file.read()
+        end = len(data) - len(data) % RECORD.size
+        journal = self._journal
+        for sha, pack, offset, size in RECORD.iter_unpack(data[:end]):
+            journal[sha] = (pack, offset, size)
+        self._journal_position += end
+
+    def _sync(self):
+        """Load index and journal changes. Hold the lock while calling it
+        A new index means that the journal was merged and replaced"""
+        if self._map_index():
+            self._journal, self._journal_position = {}, 0
+        self._read_journal()
+
+    def _refresh(self):
+        """Load changes of other appenders"""
+        with self.lock.hold(exclusive=False):
+            self._sync()
+
+    def _index_key(self, position):
+        """Return sha1 of index record"""
+        start = len(INDEX_MAGIC) + position * RECORD.size
+        return self._index[start:start + 20]
+
+    def _index_record(self, position):
+        """Return index record"""
+        return RECORD.unpack_from(
+            self._index, len(INDEX_MAGIC) + position * RECORD.size
+        )
+
+    def _bisect(self, sha):
+        """Return position of the first index record >= sha"""
+        low, high = 0, self._index_count
+        while low < high:
+            middle = (low + high) // 2
+            if self._index_key(middle) < sha:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def _find(self, sha):
+        """Return (pack, offset, size) of sha or None"""
+        location = self._journal.get(sha)
+        if location is not None:
+            return location
+        position = self._bisect(sha)
+        if position < self._index_count and self._index_key(position) == sha:
+            return self._index_record(position)[1:]
+        return None
+
+    def lookup(self, sha):
+        """Return (pack, offset, size) of sha. Refresh if it is missing"""
+        location = self._find(sha)
+        if location is None:
+            self._refresh()
+            location = self._find(sha)
+        return location
+
+    def __contains__(self, content_hash):
+        return self.lookup(unhexlify(content_hash)) is not None
+
+    # Append
+
+    def _append_handle(self):
+        """Return (pack number, handle) of pack that accepts appends
+        Reopen it if it was removed by the recompress of another process"""
+        number, handle = self._pack or (None, None)
+        if handle is not None:
+            stat = os.fstat(handle.fileno())
+            if stat.st_nlink and stat.st_size < PACK_SIZE:
+                return number, handle
+        if handle is not None:
+            handle.close()
+        numbers = [
+            int(name[5:-5]) for name in os.listdir(self.content_path)
+            if name.startswith("pack-") and name.endswith(".pack")
+        ]
+        number = max(numbers) if numbers else 0
+        path = self.pack_path(number)
+        if isfile(path) and os.path.getsize(path) >= PACK_SIZE:
+            number += 1
+        handle = self.std_open(self.pack_path(number), "ab")
+        self._pack = (number, handle)
+        return number, handle
+
+    @contextmanager
+    def _append(self, sha, size):
+        """Append blob header and yield pack handle for writing content.
+        Yield None if the blob already exists"""
+        with self.lock.hold():
+            self._sync()
+            if self._find(sha) is not None:
+                yield None
+                return
+            number, handle = self._append_handle()
+            handle.seek(0, os.SEEK_END)
+            offset = handle.tell() + BLOB_HEADER.size
+            handle.write(BLOB_HEADER.pack(sha, size))
+            yield handle
+            handle.flush()
+            record = RECORD.pack(sha, number, offset, size)
+            with self.std_open(self.journal_path, "ab") as journal_file:
+                journal_file.write(record)
+            self._read_journal()
+            if len(self._journal) >= JOURNAL_LIMIT:
+                self.merge()
+
+    def do_put(self, content):
+        """Append content to pack if it does not exist"""
+        digest = hashlib.sha1(content)
+        sha = digest.digest()
+        if self._find(sha) is None:
+            data = encode(
+                content, get_codec(self.compression), self.compression_threshold
+            )
+            with self._append(sha, len(data)) as handle:
+                if handle is not None:
+                    handle.write(data)
+        return digest.hexdigest()
+
+    def put_attr(self, content, filename):
+        """Return attributes for the do_put operation"""
+        return (content,)
+
+    def put(self, content, filename="generic"):  # pylint: disable=method-hidden
+        """Put content in the content database"""
+        return self.do_put(*self.put_attr(content, filename))
+
+    def put_file(self, path, filename="generic"):  # pylint: disable=method-hidden
+        """Put content of file in the content database
+        Hash the file before copying it in chunks. The stored representation
+        is spooled first, since the blob header has its size"""
+        content_hash = self.hash_file(path)
+        sha = unhexlify(content_hash)
+        if self._find(sha) is not None:
+            return content_hash
+        with safeopen.use_safe_open():
+            with self.std_open(path, "rb") as fil:
+                with tempfile.SpooledTemporaryFile(CHUNK_SIZE) as spool:
+                    write_encoded(
+                        iter(lambda: fil.read(CHUNK_SIZE), b""), spool,
+                        get_codec(self.compression),
+                        os.fstat(fil.fileno()).st_size,
+                        self.compression_threshold
+                    )
+                    size = spool.tell()
+                    spool.seek(0)
+                    with self._append(sha, size) as handle:
+                        if handle is not None:
+                            shutil.copyfileobj(spool, handle, CHUNK_SIZE)
+        return content_hash
+
+    def get(self, content_hash):  # pylint: disable=method-hidden
+        """Get content from the content database"""
+        location = self.lookup(unhexlify(content_hash))
+        if location is None:
+            raise KeyError(content_hash)
+        number, offset, size = location
+        reader = self._readers.get(number)
+        if reader is None:
+            reader = self._readers[number] = self.std_open(
+                self.pack_path(number), "rb"
+            )
+        with self.lock.thread_lock:
+            reader.seek(offset)
+            data = reader.read(size)
+        return decode(data)
+
+    def find_subhash(self, content_hash):
+        """Get hash that starts by content_hash"""
+        prefix = content_hash.lower()
+        if not all(char in hexdigits for char in prefix):
+            return None
+        self._refresh()
+        lower = unhexlify(prefix + "0" * (len(prefix) % 2))
+        result = [
+            name for name in (
+                hexlify(sha).decode("ascii") for sha in self._journal
+            ) if name.startswith(prefix)
+        ]
+        position = self._bisect(lower)
+        if position < self._index_count:
+            name = hexlify(self._index_key(position)).decode("ascii")
+            if name.startswith(prefix):
+                result.append(name)
+        return min(result) if result else None
+
+    def list_hashes(self):
+        """Return hashes of all stored blobs"""
+        self._refresh()
+        result = [
+            hexlify(self._index_key(position)).decode("ascii")
+            for position in range(self._index_count)
+        ]
+        result.extend(
+            hexlify(sha).decode("ascii") for sha in self._journal
+            if self._find_in_index(sha) is None
+        )
+        return result
+
+    def _find_in_index(self, sha):
+        """Return index position of sha or None"""
+        position = self._bisect(sha)
+        if position < self._index_count and self._index_key(position) == sha:
+            return position
+        return None
+
+    # Maintenance
+
+    def merge(self):
+        """Merge journal into the sorted index"""
+        with self.lock.hold():
+            self._sync()
+            if not self._journal:
+                return
+            journal = sorted(
+                (sha,) + location for sha, location in self._journal.items()
+                if self._find_in_index(sha) is None
+            )
+            index = (
+                self._index_record(position)
+                for position in range(self._index_count)
+            )
+            temp = self.index_path + ".tmp"
+            with self.std_open(temp, "wb") as index_file:
+                index_file.write(INDEX_MAGIC)
+                buffer = []
+                for record in heapq.merge(index, journal):
+                    buffer.append(RECORD.pack(*record))
+                    if len(buffer) >= CHUNK_SIZE // RECORD.size:
+                        index_file.write(b"".join(buffer))
+                        buffer = []
+                index_file.write(b"".join(buffer))
+            with self.std_open(temp + ".journal", "wb"):
+                pass
+            os.replace(temp, self.index_path)
+            os.replace(temp + ".journal", self.journal_path)
+            self._sync()
+
+    def import_plain(self, plain_path, remove=True):
+        """Import blobs of plain content directory. Return number of blobs
+
+        Keyword arguments:
+        remove -- remove plain blobs after merging them (default=True)
+        """
+        imported = []
+        for dirname in sorted(os.listdir(plain_path)):
+            directory = join(plain_path, dirname)
+            if len(dirname) != 2 or not isdir(directory):
+                continue
+            for name in sorted(os.listdir(directory)):
+                path = join(directory, name)
+                with self.std_open(path, "rb") as fil:
+                    is_encoded = fil.read(len(MAGIC)) == MAGIC
+                if is_encoded:
+                    with self.std_open(path, "rb") as fil:
+                        self.put(decode(fil.read()))
+                else:
+                    self.put_file(path)
+                imported.append(path)
+        self.merge()
+        if remove:
+            for path in imported:
+                os.remove(path)
+            for dirname in os.listdir(plain_path):
+                directory = join(plain_path, dirname)
+                if isdir(directory) and not os.listdir(directory):
+                    os.rmdir(directory)
+            if not os.listdir(plain_path):
+                os.rmdir(plain_path)
+        return len(imported)
+
+    def recompress(self):
+        """Rewrite blobs into new packs with the current compression settings
+        Hold the lock during the rewrite. Return (number of blobs, bytes
+        before, bytes after)"""
+        codec = get_codec(self.compression)
+        with self.lock.hold():
+            self.merge()
+            old_numbers = [
+                int(name[5:-5]) for name in os.listdir(self.content_path)
+                if name.startswith("pack-") and name.endswith(".pack")
+            ]
+            number = max(old_numbers) + 1 if old_numbers else 0
+            handle = self.std_open(self.pack_path(number), "wb")
+            before = after = 0
+            records = []
+            try:
+                for position in range(self._index_count):
+                    sha, old_number, offset, size = self._index_record(position)
+                    reader = self._readers.get(old_number)
+                    if reader is None:
+                        reader = self._readers[old_number] = self.std_open(
+                            self.pack_path(old_number), "rb"
+                        )
+                    reader.seek(offset)
+                    data = reader.read(size)
+                    new_data = encode(
+                        decode(data), codec, self.compression_threshold
+                    )
+                    if handle.tell() >= PACK_SIZE:
+                        handle.close()
+                        number += 1
+                        handle = self.std_open(self.pack_path(number), "wb")
+                    handle.write(BLOB_HEADER.pack(sha, len(new_data)))
+                    records.append(RECORD.pack(
+                        sha, number, handle.tell(), len(new_data)
+                    ))
+                    handle.write(new_data)
+                    before += size
+                    after += len(new_data)
+            finally:
+                handle.close()
+            temp = self.index_path + ".tmp"
+            with self.std_open(temp, "wb") as index_file:
+                index_file.write(INDEX_MAGIC)
+                index_file.write(b"".join(records))
+            self._close_handles()
+            os.replace(temp, self.index_path)
+            for old_number in old_numbers:
+                os.remove(self.pack_path(old_number))
+            self._refresh()
+        return len(records), before, after
+
+    def gc(self, aggressive=False):  # pylint: disable=unused-argument
+        """Merge journal into the sorted index"""
+        self.merge()
+
+    def commit_content(self, message):
+        """Merge journal into the sorted index"""
+        self.merge()
+
+    def _close_handles(self):
+        """Close pack handles and index"""
+        with self.lock.thread_lock:
+            if self._pack is not None:
+                self._pack[1].close()
+                self._pack = None
+            for reader in self._readers.values():
+                reader.close()
+            self._readers = {}
+            if self._index is not None:
+                self._index.close()
+            self._index, self._index_count, self._index_id = None, 0, None
+            self._journal, self._journal_position = {}, 0
+
+    def close(self):
+        """Close pack handles, index, and lock"""
+        self._close_handles()
+        self.lock.close()
@@ -3,145 +3,468 @@
 # This file is part of noWorkflow.
 # Please, consult the license terms in the LICENSE file.
 """Content database engine parallel generics"""
+import os
+import tempfile
+import threading
+import traceback
+
+from collections import deque
+from contextlib import contextmanager
+
+from ...utils.io import print_msg
+
+try:
+    from multiprocessing import shared_memory
+except ImportError:  # Python < 3.8
+    shared_memory = None
+
+# Shared memory segments are destroyed with their last handle on Windows
+USE_SHARED_MEMORY = shared_memory is not None and os.name != "nt"
+SHARED_PAYLOAD_THRESHOLD = 256 << 10  # Smaller contents are pickled
+TASK_BATCH = 64  # Tasks sent to the pool at once
+RESULT_BATCH = 1024  # Object hashes sent back by worker processes at once
+
+
+class Marker(object):
+    """Placeholder of put_attr values that worker processes replace
+    It is pickled by reference"""
+
+    def __init__(self, name):
+        self.name = name
+
+    def __reduce__(self):
+        return self.name
+
+    def __repr__(self):
+        return self.name
+
+
+OBJECT_HASHES = Marker("OBJECT_HASHES")
+LOCK = Marker("LOCK")
+
+
+class SharedPayload(object):
+    """Handle of content sent to worker processes out of band
+
+    Content is copied once into shared memory, or into a temporary file when
+    shared memory is not available. Only the handle is pickled.
+    The worker releases the payload after using it
+    """
+    __slots__ = ("name", "size")
+
+    def __init__(self, content):
+        self.size = len(content)
+        if USE_SHARED_MEMORY:
+            memory = shared_memory.SharedMemory(
+                create=True, size=max(self.size, 1)
+            )
+            memory.buf[:self.size] = content
+            self.name = memory.name
+            memory.close()
+        else:
+            descriptor, self.name = tempfile.mkstemp(prefix="noworkflow-")
+            with os.fdopen(descriptor, "wb") as payload_file:
+                payload_file.write(content)
+
+    def __getstate__(self):
+        return (self.name, self.size)
+
+    def __setstate__(self, state):
+        self.name, self.size = state
+
+    @contextmanager
+    def open(self, buffers=True):
+        """Yield content and release payload
+
+        Keyword arguments:
+        buffers -- yield a memoryview of the shared memory instead of bytes
+        """
+        if not USE_SHARED_MEMORY:
+            from . import safeopen
+            with safeopen.std_open(self.name, "rb") as payload_file:
+                content = payload_file.read()
+            os.remove(self.name)
+            yield content
+            return
+        memory = shared_memory.SharedMemory(name=self.name)
+        view = memory.buf[:self.size]
+        try:
+            yield view if buffers else bytes(view)
+        finally:
+            view.release()
+            memory.close()
+            memory.unlink()
+
+
+def start_transport():
+    """Start the shared memory tracker before forking workers
+    Workers share it with the parent, which registers payloads that
+    workers unlink"""
+    if USE_SHARED_MEMORY:
+        from multiprocessing import resource_tracker
+        resource_tracker.ensure_running()
+
+
+def pack_task(engine, attrs, content):
+    """Replace content, object hashes, and lock of put_attr by handles"""
+    shared = content
+    if len(content) >= SHARED_PAYLOAD_THRESHOLD:
+        shared = SharedPayload(content)
+    markers = [
+        (value, replacement) for value, replacement in [
+            (content, shared),
+            (getattr(engine, "object_hashes", None), OBJECT_HASHES),
+            (getattr(engine, "lock", None), LOCK),
+        ] if value is not None
+    ]
+    task = []
+    for attr in attrs:
+        for value, replacement in markers:
+            if attr is value:
+                attr = replacement
+                break
+        task.append(attr)
+    return tuple(task)
+
+
+@contextmanager
+def unpack_task(task, object_hashes, lock, buffers):
+    """Yield put_attr of task with local object hashes and lock"""
+    payloads = [attr for attr in task if isinstance(attr, SharedPayload)]
+    if not payloads:
+        yield tuple(
+            object_hashes if attr is OBJECT_HASHES else
+            lock if attr is LOCK else attr
+            for attr in task
+        )
+        return
+    with payloads[0].open(buffers) as content:
+        yield tuple(
+            object_hashes if attr is OBJECT_HASHES else
+            lock if attr is LOCK else
+            content if attr is payloads[0] else attr
+            for attr in task
+        )
+
+
+def run_task(do_put, task, object_hashes, lock, buffers):
+    """Run do_put of task. Report errors instead of stopping the worker"""
+    try:
+        with unpack_task(task, object_hashes, lock, buffers) as attrs:
+            do_put(*attrs)
+    except Exception as exc:  # pylint: disable=broad-except
+        print_msg("content storage failed: {}".format(exc), True)
+        traceback.print_exc()
+
+
+POOL_WORKER = {}  # Lock and buffer support of pool worker process
+
+
+def init_pool_worker(lock, buffers):
+    """Initialize pool worker process"""
+    POOL_WORKER["lock"] = lock
+    POOL_WORKER["buffers"] = buffers
+
+
+def run_pool_batch(do_put, tasks):
+    """Run batch of tasks in pool worker. Return new object hashes"""
+    object_hashes = {}
+    for task in tasks:
+        run_task(
+            do_put, task, object_hashes,
+            POOL_WORKER["lock"], POOL_WORKER["buffers"]
+        )
+    return list(object_hashes.items())
+
 
 def create_distributed(cls, name=None):
-    from multiprocessing import Process, JoinableQueue, cpu_count, Manager, Lock
+    from multiprocessing import Process, JoinableQueue, Queue, cpu_count, RLock
     from . import safeopen
+    buffers = cls.accepts_buffers
+
     class Worker(Process):
 
-        def __init__(self, task_queue, engine):
+        def __init__(self, task_queue, result_queue, engine):
             with safeopen.use_safe_open():
                 Process.__init__(self)
                 self.task_queue = task_queue
+                self.result_queue = result_queue
                 self.engine = engine
-            
 
         def run(self):
+            object_hashes = {}
             while True:
-                queue_content = self.task_queue.get()
-                if queue_content is None:
+                task = self.task_queue.get()
+                if task is None:
                     # Poison pill means shutdown
+                    self.result_queue.put(list(object_hashes.items()))
+                    self.result_queue.put(None)
                     self.task_queue.task_done()
                     break
-
-                self.engine.do_put(*queue_content)
+                run_task(
+                    self.engine.do_put, task, object_hashes,
+                    self.engine.lock, buffers
+                )
                 self.task_queue.task_done()
+                if len(object_hashes) >= RESULT_BATCH:
+                    self.result_queue.put(list(object_hashes.items()))
+                    object_hashes = {}
 
 
     class Distributed(cls):
+        # put sends the content to workers after returning
+        accepts_buffers = False
 
         def __init__(self, config):
             super(Distributed, self).__init__(config)
             self.tasks = None
+            self.results = None
             self.consumers = []
             self.num_consumers = None
             self.processes_started = False
-            self.manager = Manager()
-            self.object_hashes = self.manager.dict()
-            self.lock = self.manager.RLock()
+            self.lock = RLock()
 
         def start_processes(self):
             """Start processes"""
             self.tasks = JoinableQueue()
-            self.object_hashes = self.manager.dict()
+            self.results = Queue()
             self.num_consumers = cpu_count()
             self.processes_started = True
             self.consumers = []
+            start_transport()
             with safeopen.use_safe_open():
                 for _ in range(self.num_consumers):
-                    consumer = Worker(self.tasks, self)
+                    consumer = Worker(self.tasks, self.results, self)
                     self.consumers.append(consumer)
                     consumer.start()
 
         def put(self, content, filename="generic"):  # pylint: disable=method-hidden
-            """Put content in the content database"""
+            """Put content in the content database
+            Large contents are sent to workers out of band"""
             if not self.processes_started:
                 self.start_processes()
 
-            self.tasks.put(self.put_attr(content, filename))
             content_hash = self._get_hash_from_content(content)
+            self.tasks.put(pack_task(self, self.hashed_put_attr(
+                content, filename, content_hash
+            ), content))
             return content_hash
 
         def close(self):
-            """Join and close processes"""
+            """Join and close processes. Collect object hashes"""
             if self.processes_started:
                 # Add a poison pill for each consumer
                 for _ in range(self.num_consumers):
                     self.tasks.put(None)
 
+                finished = 0
+                while finished < self.num_consumers:
+                    batch = self.results.get()
+                    if batch is None:
+                        finished += 1
+                    elif hasattr(self, "object_hashes"):
+                        self.object_hashes.update(batch)
+
                 # Wait for all of the tasks to finish
                 self.tasks.join()
+                for consumer in self.consumers:
+                    consumer.join()
                 self.processes_started = False
-        
+            super(Distributed, self).close()
+
     Distributed.__name__ = name or ("Distributed" + cls.__name__)
     return Distributed
 
 
 def create_pool(cls, name=None):
-    from multiprocessing import cpu_count, Manager, Pool, Lock
+    from multiprocessing import cpu_count, Pool, RLock
     from . import safeopen
+    buffers = cls.accepts_buffers
 
     class ProcessingPool(cls):
+        # put sends the content to workers after returning
+        accepts_buffers = False
 
         def __init__(self, config):
             super(ProcessingPool, self).__init__(config)
             self.pool = None
-            self.manager = Manager()
-            self.object_hashes = self.manager.dict()
+            self.batch = []
             self.processes_started = False
-            self.lock = self.manager.RLock()
+            self.lock = RLock()
 
         def start_processes(self):
             """Start processes"""
+            start_transport()
             with safeopen.use_safe_open():
-                self.object_hashes = self.manager.dict()
-                self.pool = Pool(cpu_count())
+                self.pool = Pool(
+                    cpu_count(), initializer=init_pool_worker,
+                    initargs=(self.lock, buffers)
+                )
                 self.processes_started = True
 
         def put(self, content, filename="generic"):  # pylint: disable=method-hidden
-            """Put content in the content database"""
+            """Put content in the content database
+            Tasks are sent to the pool in batches. Large contents are sent
+            out of band"""
             if not self.processes_started:
                 self.start_processes()
 
-            self.pool.apply_async(self.do_put, self.put_attr(content, filename))
             content_hash = self._get_hash_from_content(content)
+            self.batch.append(pack_task(self, self.hashed_put_attr(
+                content, filename, content_hash
+            ), content))
+            if len(self.batch) >= TASK_BATCH:
+                self.flush()
             return content_hash
 
+        def flush(self):
+            """Send batch of tasks to the pool"""
+            if self.batch:
+                self.pool.apply_async(
+                    run_pool_batch, (self.do_put, self.batch),
+                    callback=self.collect
+                )
+                self.batch = []
+
+        def collect(self, object_hashes):
+            """Collect object hashes of batch"""
+            if hasattr(self, "object_hashes"):
+                self.object_hashes.update(object_hashes)
+
         def close(self):
             """Join and close processes"""
             if self.processes_started:
+                self.flush()
                 self.pool.close()
                 self.pool.join()
                 self.processes_started = False
-        
+            super(ProcessingPool, self).close()
+
     ProcessingPool.__name__ = name or ("Pool" + cls.__name__)
     return ProcessingPool
 
 
+def default_workers():
+    """Return default number of content threads"""
+    import multiprocessing
+    return min(32, multiprocessing.cpu_count() + 4)
+
+
+class BoundedThreadPool(object):
+    """Run tasks in a fixed number of threads
+
+    submit blocks while queued and running tasks hold more than max_bytes
+    of content (backpressure). A task larger than max_bytes runs alone
+    """
+
+    def __init__(self, workers, max_bytes, name="noworkflow-content"):
+        self.workers = workers
+        self.max_bytes = max_bytes
+        self.name = name
+        self.condition = threading.Condition()
+        self.tasks = deque()
+        self.pending_bytes = 0  # content of queued and running tasks
+        self.closing = False
+        self.threads = []
+
+    def start(self):
+        """Start worker threads"""
+        for index in range(self.workers):
+            thread = threading.Thread(
+                target=self._run, name="{}-{}".format(self.name, index)
+            )
+            thread.daemon = True
+            thread.start()
+            self.threads.append(thread)
+        return self
+
+    def submit(self, size, func, *args):
+        """Enqueue func(*args) holding size bytes of content"""
+        with self.condition:
+            while self.pending_bytes and (
+                    self.pending_bytes + size > self.max_bytes):
+                self.condition.wait()
+            self.tasks.append((size, func, args))
+            self.pending_bytes += size
+            self.condition.notify_all()
+
+    def _run(self):
+        """Worker thread loop"""
+        while True:
+            with self.condition:
+                while not self.tasks and not self.closing:
+                    self.condition.wait()
+                if not self.tasks:
+                    return
+                size, func, args = self.tasks.popleft()
+            try:
+                func(*args)
+            except Exception as exc:  # pylint: disable=broad-except
+                print_msg("content storage failed: {}".format(exc), True)
+                traceback.print_exc()
+            finally:
+                with self.condition:
+                    self.pending_bytes -= size
+                    self.condition.notify_all()
+
+    def close(self):
+        """Run remaining tasks and stop worker threads"""
+        with self.condition:
+            self.closing = True
+            self.condition.notify_all()
+        for thread in self.threads:
+            thread.join()
+        self.threads = []
+
+
+CONTENT_QUEUE_LIMIT = 64 << 20  # Bytes of content waiting for threads
+
+
 def create_threading(cls, name=None):
-    import threading
-    import sys
     class Threading(cls):
+        # put sends the content to workers after returning
+        accepts_buffers = False
 
         def __init__(self, config):
             super(Threading, self).__init__(config)
-            self.persistence_threads = []
-            self.lock = threading.Lock()
+            self.pool = None
+            self.workers = None
+            self.queue_limit = None
+            self.set_workers(config)
+
+        def set_workers(self, config):
+            """Set number of threads and queue memory limit from config"""
+            self.workers = (
+                getattr(config, "content_workers", None) or default_workers()
+            )
+            self.queue_limit = (
+                getattr(config, "content_queue_limit", None) or
+                CONTENT_QUEUE_LIMIT
+            )
+
+        def connect(self, config):
+            """Connect to content database"""
+            self.set_workers(config)
+            super(Threading, self).connect(config)
 
         def put(self, content, filename="generic"):  # pylint: disable=method-hidden
             """Put content in the content database"""
-            t = threading.Thread(target=self.do_put, args=self.put_attr(content, filename))
-            self.persistence_threads.append(t)
-            t.start()
+            if self.pool is None:
+                self.pool = BoundedThreadPool(
+                    self.workers, self.queue_limit
+                ).start()
             content_hash = self._get_hash_from_content(content)
+            self.pool.submit(len(content), self.do_put, *self.hashed_put_attr(
+                content, filename, content_hash
+            ))
             return content_hash
 
         def close(self):
-            """Join and close threads"""
-            for t in self.persistence_threads:
-                t.join()
-            
-            self.persistence_threads = []
+            """Wait queued contents and stop threads"""
+            if self.pool is not None:
+                self.pool.close()
+                self.pool = None
+            super(Threading, self).close()
 
     Threading.__name__ = name or ("Threading" + cls.__name__)
     return Threading
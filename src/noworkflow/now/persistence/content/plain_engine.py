@@ -1,15 +1,20 @@
 import hashlib
 import os
+import tempfile
 from os.path import join, isdir, isfile
 
-from .base import ContentDatabaseEngine
+from .base import ContentDatabaseEngine, CHUNK_SIZE
 from .parallel import create_distributed, create_pool, create_threading
 from . import safeopen
+from .compression import get_codec, encode, decode, write_encoded
 
 STANDARD_DATABASE_DIR = 'content'
 
 
 class PlainEngine(ContentDatabaseEngine):
+    # put writes buffer objects (e.g., memoryview) before returning
+    accepts_buffers = True
+
     def __init__(self, config):
         super(PlainEngine, self).__init__(config)
 
@@ -23,33 +28,72 @@ class PlainEngine(ContentDatabaseEngine):
         self.content_path = os.path.join(config.provenance_path, STANDARD_DATABASE_DIR)
 
     @staticmethod
-    def do_put(content_path, content):
+    def do_put(content_path, content, compression=None, threshold=0,
+               content_hash=None):
         """Perform put operation. This is used in the distributed wrapper"""
-        content_hash = hashlib.sha1(content).hexdigest()
+        content_hash = content_hash or hashlib.sha1(content).hexdigest()
         content_dirname = join(content_path, content_hash[:2])
         if not isdir(content_dirname):
             os.makedirs(content_dirname)
         content_filename = join(content_dirname, content_hash[2:])
         if not isfile(content_filename):
             with safeopen.std_open(content_filename, "wb") as content_file:
-                content_file.write(content)
+                content_file.write(
+                    encode(content, get_codec(compression), threshold)
+                )
         return content_hash
 
     def put_attr(self, content, filename):
         """Return attributes for the do_put operation"""
-        return (self.content_path, content)
+        return (
+            self.content_path, content,
+            self.compression, self.compression_threshold
+        )
+
+    def hashed_put_attr(self, content, filename, content_hash):
+        """Return attributes for the do_put operation with content_hash"""
+        return self.put_attr(content, filename) + (content_hash,)
 
     def put(self, content, filename):  # pylint: disable=method-hidden
         """Put content in the content database"""
         return self.do_put(*self.put_attr(content, filename))
 
+    def put_file(self, path, filename="generic"):  # pylint: disable=method-hidden
+        """Put content of file in the content database
+        Copy the file in chunks while hashing it"""
+        digest = hashlib.sha1()
+        descriptor, temp = tempfile.mkstemp(dir=self.content_path, suffix=".tmp")
+
+        def chunks(fil):
+            """Read file in chunks while hashing it"""
+            for chunk in iter(lambda: fil.read(CHUNK_SIZE), b""):
+                digest.update(chunk)
+                yield chunk
+
+        with safeopen.std_open(path, "rb") as fil:
+            with os.fdopen(descriptor, "wb") as temp_file:
+                write_encoded(
+                    chunks(fil), temp_file, get_codec(self.compression),
+                    os.fstat(fil.fileno()).st_size, self.compression_threshold
+                )
+        content_hash = digest.hexdigest()
+        content_dirname = join(self.content_path, content_hash[:2])
+        if not isdir(content_dirname):
+            os.makedirs(content_dirname)
+        content_filename = join(content_dirname, content_hash[2:])
+        if isfile(content_filename):
+            os.remove(temp)
+        else:
+            os.rename(temp, content_filename)
+        return content_hash
+
     def get(self, content_hash):  # pylint: disable=method-hidden
         """Get content from the content database"""
         content_filename = join(self.content_path,
                                 content_hash[:2],
                                 content_hash[2:])
         with self.std_open(content_filename, "rb") as content_file:
-            return content_file.read()
+            return decode(content_file.read())
 
     def find_subhash(self, content_hash):
         """Get hash that starts by content_hash"""
@@ -64,13 +108,41 @@ class PlainEngine(ContentDatabaseEngine):
                     return content_dirname + name
         return None
 
-    def gc(self, content_hash):
+    def gc(self, aggressive=False):
         """Do nothing for plain storage"""
         pass
 
+    def recompress(self):
+        """Rewrite blobs with the current compression settings
+        Return (number of blobs, bytes before, bytes after)"""
+        codec = get_codec(self.compression)
+        count = before = after = 0
+        for dirname in os.listdir(self.content_path):
+            content_dirname = join(self.content_path, dirname)
+            if len(dirname) != 2 or not isdir(content_dirname):
+                continue
+            for name in os.listdir(content_dirname):
+                content_filename = join(content_dirname, name)
+                with self.std_open(content_filename, "rb") as content_file:
+                    data = content_file.read()
+                new_data = encode(
+                    decode(data), codec, self.compression_threshold
+                )
+                count += 1
+                before += len(data)
+                after += len(new_data)
+                if new_data != data:
+                    descriptor, temp = tempfile.mkstemp(
+                        dir=self.content_path, suffix=".tmp"
+                    )
+                    with os.fdopen(descriptor, "wb") as temp_file:
+                        temp_file.write(new_data)
+                    os.replace(temp, content_filename)
+        return count, before, after
+
     def commit_content(self, message):
-        """Do nothing for plain storage"""
-        pass
+        """Wait for pending puts. Plain storage has no commits"""
+        self.close()
 
 
 DistributedPlainEngine = create_distributed(PlainEngine)
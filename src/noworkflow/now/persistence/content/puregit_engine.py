@@ -11,6 +11,8 @@ class PureGitEngine(GitContentDatabaseEngine):
 
     def __init__(self, config):
         super(PureGitEngine, self).__init__(config)
+        self._index_ready = False  # Index was cleared for this engine
+        self._index_entries = []  # Changed blobs of dirty directories
 
     def connect(self, config):
         """Create content directory"""
@@ -72,41 +74,19 @@ class PureGitEngine(GitContentDatabaseEngine):
         git_system.update_ref(self._commit_ref, result, self.content_path)
         return result
 
-    def new_tree(self, parent):
-        if parent == '':
-            git_system.rm_all(self.content_path)
-        return Tree(parent, self.content_path)
-
-    def insert_blob(self, tree, basename, value):
-        """Insert blob into tree"""
-        tree.insert_blob(basename, value)
-    
-    def insert_tree(self, tree, basename, value):
-        """Pure-git commands to update tree allow paths on insert-blob. We do not need to break down trees"""
-        pass
-
-    def write_tree(self, tree):
-        """Write tree to git directory"""
-        return tree.write()
-
-class Tree(object):
-
-    def __init__(self, dirname, content_path):
-        self.operations = []
-        self.dirname = dirname
-        self.content_path = os.path.join(content_path)
-
-    def insert_blob(self, basename, value):
-        self.operations.append((
-            git_system.update_index,
-            ("100644", value, os.path.join(self.dirname, basename), self.content_path)
-        ))
-
-    def write(self):
-        for op, args in self.operations:
-            op(*args)
-        result = "auto"
-        if self.dirname == '':
-            result = git_system.write_tree(self.content_path)
+    def update_tree(self, dirname, entries, changed):
+        """Collect changed blobs. Root comes last: add all of them to the
+        git index at once and write its tree.
+        The index keeps the entries of the previous commit"""
+        self._index_entries.extend(
+            ("100644", entries[basename][1], os.path.join(dirname, basename))
+            for basename in sorted(changed) if not entries[basename][0]
+        )
+        if dirname != '':
+            return "auto"
+        if not self._index_ready:
             git_system.rm_all(self.content_path)
-        return result
+            self._index_ready = True
+        index_entries, self._index_entries = self._index_entries, []
+        git_system.update_index_info(index_entries, self.content_path)
+        return git_system.write_tree(self.content_path)
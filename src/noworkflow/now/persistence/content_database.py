@@ -10,8 +10,10 @@ import importlib
 import os
 from os.path import join, isdir
 from .content.plain_engine import STANDARD_DATABASE_DIR
+from .content.pack_engine import PACK_DATABASE_DIR
 from ..utils.io import print_msg
 from .content import safeopen
+from .content.cache import ContentCache
 
 class ContentDatabase(object):
     """Content Database deal with storage of file content in disk"""
@@ -20,13 +22,16 @@ class ContentDatabase(object):
         self.content_path = None  # Base path for storing content of files
         persistence_config.add(self)
         self.content_database_engine = None
+        self.cache = ContentCache()  # LRU cache of get results
 
         self.content_engines = {
             "plain": "noworkflow.now.persistence.content.plain_engine.PlainEngine",
             "sequential_plain": "noworkflow.now.persistence.content.plain_engine.PlainEngine",
-            "distributed_plain": "noworkflow.now.persistence.content.plain_engine.PlainEngine",
-            "pool_plain": "noworkflow.now.persistence.content.plain_engine.PlainEngine",
-            "threading_plain": "noworkflow.now.persistence.content.plain_engine.PlainEngine",
+            "distributed_plain": "noworkflow.now.persistence.content.plain_engine.DistributedPlainEngine",
+            "pool_plain": "noworkflow.now.persistence.content.plain_engine.PoolPlainEngine",
+            "threading_plain": "noworkflow.now.persistence.content.plain_engine.ThreadingPlainEngine",
+            "pack": "noworkflow.now.persistence.content.pack_engine.PackEngine",
+            "sequential_pack": "noworkflow.now.persistence.content.pack_engine.PackEngine",
             "pygit": "noworkflow.now.persistence.content.pygit_engine.DistributedPyGitEngine",
             "sequential_pygit": "noworkflow.now.persistence.content.pygit_engine.PyGitEngine",
             "distributed_pygit": "noworkflow.now.persistence.content.pygit_engine.DistributedPyGitEngine",
@@ -44,6 +49,9 @@ class ContentDatabase(object):
     def define_engine(self, config):
         if config.content_engine is not None:
             engine = config.content_engine
+        elif isdir(join(config.provenance_path, PACK_DATABASE_DIR)):
+            # Use pack files
+            engine = "pack"
         elif isdir(join(config.provenance_path, STANDARD_DATABASE_DIR)):
             # Use plain directory
             engine = "plain"
@@ -73,21 +81,26 @@ class ContentDatabase(object):
     def __getattr__(self, attr):
         return getattr(self.content_database_engine, attr)
 
+    def get(self, content_hash):
+        """Return content by hash. Read it from the cache when possible"""
+        content = self.cache.get(content_hash)
+        if content is None:
+            content = self.content_database_engine.get(content_hash)
+            self.cache.put(content_hash, content)
+        return content
+
     def set_path(self, config):
         if self.content_database_engine is None:
             self.define_engine(config)
+        self.cache.clear()
         self.content_database_engine.set_path(config)
 
     def connect(self, config):
         if self.content_database_engine is None:
             self.define_engine(config)
+        self.cache.resize(config.content_cache_size)
+        self.content_database_engine.set_compression(config)
         self.content_database_engine.connect(config)
     
     def listAll(self):
-        files = []
-        for r,d, f in os.walk(self.__getattr__("content_path")):
-            for file in f:
-                fileName=os.path.basename(r)
-                fileName+=file
-                files.append(fileName)
-        return files
+        return self.content_database_engine.list_hashes()
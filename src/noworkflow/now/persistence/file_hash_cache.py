@@ -0,0 +1,138 @@
+# Copyright (c) 2016 Universidade Federal Fluminense (UFF)
+# Copyright (c) 2016 Polytechnic Institute of New York University.
+# This file is part of noWorkflow.
+# Please, consult the license terms in the LICENSE file.
+"""File Hash Cache. Avoid reading files that did not change"""
+from __future__ import (absolute_import, print_function,
+                        division, unicode_literals)
+
+import marshal
+import os
+import time
+
+from os.path import join, exists, abspath
+
+from .content.safeopen import std_open
+
+
+CACHE_FILENAME = "file_hashes"
+CACHE_FORMAT = 2
+# Files modified less than RACY_WINDOW seconds before hashing may change
+# again without changing their mtime. Do not cache them
+RACY_WINDOW = 2
+MAX_ENTRIES = 100000
+
+
+class FileHashCache(object):
+    """File Hash Cache keep content hashes of accessed files
+
+    Entries are keyed by (path, inode, size, mtime_ns) and are valid for
+    a single content engine. Files larger than size_limit are hashed in
+    chunks, but their content is not stored. Entries record whether the
+    content was stored, so a later access without the limit stores it
+    """
+
+    def __init__(self, persistence_config, content):
+        self.content = content
+        self.cache_path = None  # Path of the cache file
+        self.hashes = None  # (path, inode, size, mtime_ns) -> (hash, stored)
+        self.engine = None
+        self.changed = False
+        persistence_config.add(self)
+
+    def set_path(self, config):
+        """Set cache_path"""
+        self.cache_path = join(config.provenance_path, CACHE_FILENAME)
+        self.hashes = None
+
+    def mock(self, config):                                                      # pylint: disable=unused-argument
+        """Do not persist cache for tests"""
+        self.cache_path = None
+        self.hashes = None
+
+    def connect(self, config):
+        """Do not persist cache if persistence is mocked"""
+        if config.should_mock:
+            self.cache_path = None
+        self.hashes = None
+
+    def _engine_name(self):
+        """Return name of the current content engine"""
+        return type(self.content.content_database_engine).__name__
+
+    def load(self):
+        """Load cached hashes of the current content engine"""
+        self.hashes = {}
+        self.engine = self._engine_name()
+        self.changed = False
+        if self.cache_path is None:
+            return self.hashes
+        try:
+            with std_open(self.cache_path, "rb") as cache_file:
+                entry = marshal.load(cache_file)
+        except (IOError, OSError, EOFError, ValueError, TypeError):
+            return self.hashes
+        if entry.get("format") == CACHE_FORMAT and entry.get("engine") == self.engine:
+            self.hashes = entry["hashes"]
+        return self.hashes
+
+    def save(self):
+        """Store cached hashes. Ignore failures"""
+        if self.cache_path is None or not self.changed:
+            return False
+        hashes = self.hashes
+        if len(hashes) > MAX_ENTRIES:
+            keys = list(hashes)[-MAX_ENTRIES:]
+            hashes = {key: hashes[key] for key in keys}
+        temp = "{}.{}.tmp".format(self.cache_path, os.getpid())
+        try:
+            with std_open(temp, "wb") as cache_file:
+                marshal.dump({
+                    "format": CACHE_FORMAT,
+                    "engine": self.engine,
+                    "hashes": hashes,
+                }, cache_file)
+            if exists(self.cache_path):
+                os.remove(self.cache_path)
+            os.rename(temp, self.cache_path)
+            self.changed = False
+            return True
+        except (IOError, OSError, ValueError):
+            if exists(temp):
+                os.remove(temp)
+            return False
+
+    def content_hash(self, path, filename=None, size_limit=0):
+        """Return content hash of file. Store its content if needed
+
+        Arguments:
+        path -- file path
+        filename -- name used by the content engine
+        size_limit -- only hash files larger than it. 0 disables the limit
+        """
+        if self.hashes is None or self.engine != self._engine_name():
+            self.load()
+        filename = path if filename is None else filename
+        stat = os.stat(path)
+        mtime_ns = getattr(stat, "st_mtime_ns", None)
+        if mtime_ns is None:
+            mtime_ns = int(stat.st_mtime * 1e9)
+        key = (abspath(path), stat.st_ino, stat.st_size, mtime_ns)
+        store = not size_limit or stat.st_size <= size_limit
+        entry = self.hashes.get(key)
+        if entry is not None:
+            content_hash, stored = entry
+            if stored:
+                self.content.register(content_hash, filename)
+                return content_hash
+            if not store:
+                return content_hash
+        start = time.time()
+        if store:
+            content_hash = self.content.put_file(path, filename)
+        else:
+            content_hash = self.content.hash_file(path)
+        if mtime_ns < (start - RACY_WINDOW) * 1e9:
+            self.hashes[key] = (content_hash, store)
+            self.changed = True
+        return content_hash
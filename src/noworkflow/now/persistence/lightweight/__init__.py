@@ -7,6 +7,7 @@ from __future__ import (absolute_import, print_function,
                         division)
 
 from .base import ObjectStore, SharedObjectStore
+from .columnar import ColumnarObjectStore, ColumnarEvaluationStore
 from .activation import ActivationLW
 from .argument import ArgumentLW
 from .code_block import CodeBlockLW
@@ -33,6 +34,8 @@ from .stage_tags import StageTagsLW
 __all__ = [
     "ObjectStore",
     "SharedObjectStore",
+    "ColumnarObjectStore",
+    "ColumnarEvaluationStore",
     "ActivationLW",
     "ArgumentLW",
     "CodeBlockLW",
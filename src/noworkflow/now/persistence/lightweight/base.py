@@ -7,6 +7,8 @@ from __future__ import (absolute_import, print_function,
                         division, unicode_literals)
 
 
+from operator import attrgetter
+
 from future.utils import viewitems, viewvalues
 
 
@@ -120,13 +122,22 @@ class ObjectStore(object):
         if partial:
             self.clear()
 
+    def pop_complete(self):
+        """Remove complete objects from storage and return them"""
+        complete = [obj for obj in self.values() if obj.is_complete()]
+        if complete:
+            for obj in complete:
+                del self[obj.id]
+            self.clear()
+        return complete
+
     def has_items(self):
         """Return true if it has items"""
         return bool(self.count)
 
-    def do_store(self, partial=False):
+    def do_store(self, partial=False, conn=None):
         """Store object store into database"""
-        self.cls.model.store(self, partial)
+        self.cls.model.store(self, partial, conn)
 
 class SharedObjectStore(ObjectStore):
     """Temporary storage for LW objects. Share ids"""
@@ -179,3 +190,25 @@ class BaseLW(object):
         if key in self.nullable and getattr(self, key) == -1:                     # pylint: disable=no-member
             return None
         return getattr(self, key)
+
+    @classmethod
+    def row_factory(cls, attributes):
+        """Return function that creates a list of values of attributes
+        The list matches [obj[attr] for attr in attributes]
+        """
+        getter = attrgetter(*attributes) if attributes else (lambda obj: ())
+        nullable = [
+            index for index, attr in enumerate(attributes)
+            if attr in cls.nullable                                              # pylint: disable=no-member
+        ]
+        if len(attributes) == 1:
+            single, getter = getter, lambda obj: (single(obj),)
+
+        def row(obj):
+            """Return values of obj"""
+            values = list(getter(obj))
+            for index in nullable:
+                if values[index] == -1:
+                    values[index] = None
+            return values
+        return row
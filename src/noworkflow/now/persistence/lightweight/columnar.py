@@ -0,0 +1,746 @@
+# Copyright (c) 2016 Universidade Federal Fluminense (UFF)
+# Copyright (c) 2016 Polytechnic Institute of New York University.
+# This file is part of noWorkflow.
+# Please, consult the license terms in the LICENSE file.
+"""Columnar object stores. Keep lightweight objects as struct of arrays"""
+from __future__ import (absolute_import, print_function,
+                        division, unicode_literals)
+
+from array import array
+from bisect import bisect_left
+from collections import OrderedDict
+from weakref import WeakValueDictionary
+
+from future.utils import viewitems, viewvalues
+
+from .base import ObjectStore
+
+
+INTERN_LIMIT = 65536  # Maximum number of interned strings per store
+COMPACT_FRACTION = 4  # Compact after 1/4 of the rows were removed
+NOTHING = object()
+
+
+class IntColumn(object):
+    """Integer column. Grows from 32 to 64 bits when necessary"""
+    __slots__ = ("data", "null")
+
+    def __init__(self):
+        self.data = array(str("i"))
+        self.null = -(2 ** 31)
+
+    def widen(self):
+        """Convert column to 64 bits"""
+        old, old_null = self.data, self.null
+        self.null = -(2 ** 63)
+        self.data = array(str("q"), (
+            self.null if value == old_null else value for value in old
+        ))
+
+    def append(self, value):
+        """Add value to the end of the column"""
+        value = self.null if value is None else value
+        try:
+            self.data.append(value)
+        except OverflowError:
+            self.widen()
+            self.data.append(value)
+
+    def extend(self, values):
+        """Add sequence of values to the end of the column"""
+        while True:
+            null = self.null
+            try:
+                chunk = array(self.data.typecode, [
+                    null if value is None else value for value in values
+                ])
+            except OverflowError:
+                if self.data.typecode == "q":
+                    raise
+                self.widen()
+                continue
+            self.data.extend(chunk)
+            return
+
+    def __getitem__(self, row):
+        value = self.data[row]
+        return None if value == self.null else value
+
+    def __setitem__(self, row, value):
+        value = self.null if value is None else value
+        try:
+            self.data[row] = value
+        except OverflowError:
+            self.widen()
+            self.data[row] = value
+
+    def compact(self, rows):
+        """Keep only rows"""
+        data = self.data
+        self.data = array(data.typecode, (data[row] for row in rows))
+
+    def values(self):
+        """Return all values"""
+        return [self[row] for row in range(len(self.data))]
+
+
+class FloatColumn(IntColumn):
+    """Float column. NaN represents None"""
+    __slots__ = ()
+
+    def __init__(self):                                                          # pylint: disable=super-init-not-called
+        self.data = array(str("d"))
+        self.null = float("nan")
+
+    def append(self, value):
+        self.data.append(self.null if value is None else value)
+
+    def extend(self, values):
+        null = self.null
+        self.data.extend(array(str("d"), [
+            null if value is None else value for value in values
+        ]))
+
+    def __getitem__(self, row):
+        value = self.data[row]
+        return None if value != value else value
+
+    def __setitem__(self, row, value):
+        self.data[row] = self.null if value is None else value
+
+
+class BoolColumn(IntColumn):
+    """Boolean column. Use one byte per value"""
+    __slots__ = ()
+    DECODE = (False, True, None)
+
+    def __init__(self):                                                          # pylint: disable=super-init-not-called
+        self.data = bytearray()
+        self.null = 2
+
+    def append(self, value):
+        self.data.append(self.encode(value))
+
+    def extend(self, values):
+        self.data.extend(bytearray(self.encode(value) for value in values))
+
+    def encode(self, value):
+        """Convert value to byte"""
+        if value is None:
+            return self.null
+        if value is True or value is False:
+            return int(value)
+        raise TypeError("{!r} is not a bool".format(value))
+
+    def __getitem__(self, row):
+        return self.DECODE[self.data[row]]
+
+    def __setitem__(self, row, value):
+        self.data[row] = self.encode(value)
+
+    def compact(self, rows):
+        data = self.data
+        self.data = bytearray(data[row] for row in rows)
+
+
+class CategoryColumn(object):
+    """Column with few distinct values. Store codes to a table of values"""
+    __slots__ = ("codes", "table", "index")
+
+    def __init__(self):
+        self.codes = array(str("B"))
+        self.table = []
+        self.index = {}
+
+    def encode(self, value):
+        """Return code of value"""
+        code = self.index.get(value)
+        if code is None:
+            code = self.index[value] = len(self.table)
+            self.table.append(value)
+            if code >= 2 ** (8 * self.codes.itemsize):
+                self.codes = array(
+                    str("H") if self.codes.typecode == "B" else str("l"),
+                    self.codes
+                )
+        return code
+
+    def append(self, value):
+        self.codes.append(self.encode(value))
+
+    def extend(self, values):
+        """Add sequence of values to the end of the column"""
+        codes = [self.encode(value) for value in values]
+        self.codes.extend(codes)
+
+    def __getitem__(self, row):
+        return self.table[self.codes[row]]
+
+    def __setitem__(self, row, value):
+        self.codes[row] = self.encode(value)
+
+    def compact(self, rows):
+        """Keep only rows"""
+        codes = self.codes
+        self.codes = array(codes.typecode, (codes[row] for row in rows))
+
+    def values(self):
+        """Return all values"""
+        table = self.table
+        return [table[code] for code in self.codes]
+
+
+class ObjectColumn(object):
+    """Column of arbitrary objects. Share equal short strings"""
+    __slots__ = ("data", "strings")
+
+    def __init__(self, strings=None):
+        self.data = []
+        self.strings = {} if strings is None else strings
+
+    def intern(self, value):
+        """Return shared version of string"""
+        if type(value) is not str:                                             # pylint: disable=unidiomatic-typecheck
+            return value
+        strings = self.strings
+        result = strings.get(value)
+        if result is not None:
+            return result
+        if len(strings) < INTERN_LIMIT:
+            strings[value] = value
+        return value
+
+    def append(self, value):
+        self.data.append(self.intern(value))
+
+    def extend(self, values):
+        """Add sequence of values to the end of the column"""
+        self.data.extend(map(self.intern, values))
+
+    def __getitem__(self, row):
+        return self.data[row]
+
+    def __setitem__(self, row, value):
+        self.data[row] = self.intern(value)
+
+    def compact(self, rows):
+        """Keep only rows"""
+        data = self.data
+        self.data = [data[row] for row in rows]
+
+    def values(self):
+        """Return all values"""
+        return list(self.data)
+
+
+COLUMN_TYPES = {
+    "int": IntColumn,
+    "float": FloatColumn,
+    "bool": BoolColumn,
+    "category": CategoryColumn,
+    "object": ObjectColumn,
+}
+
+
+def live_class(cls, slots=(), **attrs):
+    """Create LW subclass that writes attribute changes through to the store"""
+    def __setattr__(self, name, value):
+        super(live, self).__setattr__(name, value)
+        store = getattr(self, "_columnar_store", None)
+        if store is not None:
+            store.write(self, name)
+
+    attrs["__slots__"] = ("_columnar_store",) + slots
+    attrs["__setattr__"] = __setattr__
+    live = type(str("Columnar" + cls.__name__), (cls,), attrs)
+    return live
+
+
+class ColumnarObjectStore(ObjectStore):
+    """Temporary storage for LW objects as struct of arrays
+
+    Each attribute is kept in a column of the kind declared in cls.columns.
+    Attributes without declared kinds are kept in object columns.
+    Objects returned by add_object and __getitem__ are live objects.
+    Attributes assigned to them are written through to their rows.
+    Objects created by add are packed immediately.
+    Rows of stored objects are dropped by clear, unless other objects
+    still refer to them (see referenced_ids). Clear only compacts the
+    columns after 1/COMPACT_FRACTION of the rows were removed
+
+    Arguments:
+    cls -- LW object class
+    retain -- keep all rows of stored objects (default=False)
+    """
+    # pylint: disable=super-init-not-called
+    extra_names = ()  # Attributes written by pack_extra
+
+    def __init__(self, cls, retain=False):
+        self.cls = cls
+        self.live_cls = live_class(cls)
+        self.retain = retain
+        self.id = 0                                                              # pylint: disable=invalid-name
+        self.count = 0
+        self.kept = 0  # Removed rows kept by the last compaction
+
+        self.ids = array(str("q"))
+        self.removed = bytearray()
+        self.live = WeakValueDictionary()
+        self.strings = {}
+        kinds = getattr(cls, "columns", {})
+        self.names = [name for name in cls.attributes if name != "id"]
+        self.columns = OrderedDict(
+            (name, self.create_column(kinds.get(name, "object")))
+            for name in self.names
+        )
+
+    def create_column(self, kind):
+        """Create column of kind"""
+        if kind == "object":
+            return ObjectColumn(self.strings)
+        return COLUMN_TYPES[kind]()
+
+    def _write(self, name, row, value):
+        """Write value to column. Use object column for unexpected types"""
+        column = self.columns[name]
+        try:
+            if row is None:
+                column.append(value)
+            else:
+                column[row] = value
+        except (TypeError, ValueError):
+            if isinstance(column, ObjectColumn):
+                raise
+            new_column = ObjectColumn(self.strings)
+            new_column.data = column.values()
+            self.columns[name] = new_column
+            self._write(name, row, value)
+
+    def row(self, id_):
+        """Return row of id or None"""
+        ids = self.ids
+        row = bisect_left(ids, id_)
+        if row < len(ids) and ids[row] == id_:
+            return row
+        return None
+
+    def prepare(self, obj):
+        """Prepare live object for columnar storage. Override on subclass"""
+        pass
+
+    def pack_extra(self, obj, row):
+        """Pack attributes that are not columns. Override on subclass
+        Row is None for new objects
+        """
+        pass
+
+    def unpack_extra(self, obj, row):
+        """Unpack attributes that are not columns. Override on subclass"""
+        pass
+
+    def remove_extra(self, ids):
+        """Remove extra data of removed ids. Override on subclass"""
+        pass
+
+    def compact(self, rows):
+        """Keep only rows on extra columns. Override on subclass"""
+        pass
+
+    def referenced_ids(self):
+        """Return ids of stored objects that must be kept. Override on subclass"""
+        return set()
+
+    def _append(self, obj):
+        """Append object to the end of the columns"""
+        self.count += 1
+        self.ids.append(obj.id)
+        self.removed.append(0)
+        for name in self.names:
+            self._write(name, None, getattr(obj, name))
+        self.pack_extra(obj, None)
+
+    def write(self, obj, name):
+        """Write attribute of live object into its row"""
+        if name in self.columns:
+            row = self.row(obj.id)
+            if row is not None:
+                self._write(name, row, getattr(obj, name))
+        elif name in self.extra_names:
+            row = self.row(obj.id)
+            if row is not None:
+                self.pack_extra(obj, row)
+
+    def _unpack(self, row, cls):
+        """Create object of cls from row"""
+        obj = cls.__new__(cls)
+        obj.id = self.ids[row]
+        columns = self.columns
+        for name in self.names:
+            setattr(obj, name, columns[name][row])
+        return obj
+
+    def _rehydrate(self, row):
+        """Create live object from row"""
+        obj = self._unpack(row, self.live_cls)
+        self.unpack_extra(obj, row)
+        obj._columnar_store = self                                               # pylint: disable=protected-access
+        self.live[obj.id] = obj
+        return obj
+
+    def lookup(self, id_):
+        """Return live object for id. Use rows of stored objects that were kept"""
+        obj = self.live.get(id_)
+        if obj is not None:
+            return obj
+        row = self.row(id_)
+        if row is None:
+            return None
+        return self._rehydrate(row)
+
+    def __getitem__(self, index):
+        obj = self.live.get(index)
+        if obj is not None:
+            return obj
+        row = self.row(index)
+        if row is None:
+            raise KeyError(index)
+        if self.removed[row]:
+            return None
+        return self._rehydrate(row)
+
+    def __delitem__(self, index):
+        row = self.row(index)
+        if row is not None and not self.removed[row]:
+            self.removed[row] = 1
+            self.count -= 1
+
+    def add(self, *args):
+        """Add object using its __init__ arguments and return id"""
+        self.id += 1
+        self._append(self.cls(self.id, *args))
+        return self.id
+
+    def add_from_object(self, obje):
+        """Add object to store"""
+        self.id += 1
+        self._append(obje)
+        return obje
+
+    def add_object(self, *args):
+        """Add object using its __init__ arguments and return object"""
+        self.id += 1
+        obj = self.live_cls(self.id, *args)
+        obj._columnar_store = self                                               # pylint: disable=protected-access
+        self.prepare(obj)
+        self._append(obj)
+        self.live[obj.id] = obj
+        return obj
+
+    def remove(self, value):
+        """Remove object from storage"""
+        del self[value.id]
+
+    @property
+    def store(self):
+        """Dict of ids to objects. Materializes all objects"""
+        return OrderedDict(self.items())
+
+    @property
+    def order(self):
+        """Ids of objects in storage"""
+        removed = self.removed
+        return [id_ for row, id_ in enumerate(self.ids) if not removed[row]]
+
+    def __iter__(self):
+        """Iterate on objects, and not ids"""
+        return self.values()
+
+    def items(self):
+        """Iterate on both ids and objects"""
+        for id_ in self.order:
+            yield id_, self[id_]
+
+    def iteritems(self):
+        """Iterate on both ids and objects"""
+        return self.items()
+
+    def values(self):
+        """Iterate on objects if they exist"""
+        for _, value in self.items():
+            yield value
+
+    def clear(self):
+        """Remove deleted objects from storage. Keep referenced ones"""
+        if self.retain:
+            return
+        removed = self.removed
+        dropped = len(removed) - self.count - self.kept
+        if not dropped or dropped * COMPACT_FRACTION < len(removed):
+            return
+        ids = self.ids
+        keep = self.referenced_ids()
+        rows = [
+            row for row in range(len(removed))
+            if not removed[row] or ids[row] in keep
+        ]
+        self.kept = len(rows) - self.count
+        if len(rows) == len(removed):
+            return
+        kept = set(rows)
+        self.remove_extra(
+            ids[row] for row in range(len(removed)) if row not in kept
+        )
+        for column in self.columns.values():
+            column.compact(rows)
+        self.compact(rows)
+        self.ids = array(ids.typecode, (ids[row] for row in rows))
+        self.removed = bytearray(removed[row] for row in rows)
+
+    def generator(self, partial=False):
+        """Generator used for storing objects in database"""
+        live = self.live
+        removed = self.removed
+        for row, id_ in enumerate(self.ids):
+            if removed[row]:
+                continue
+            obj = live.get(id_)
+            if obj is None:
+                obj = self._unpack(row, self.cls)
+            if partial and obj.is_complete():
+                removed[row] = 1
+                self.count -= 1
+            yield obj
+        if partial:
+            self.clear()
+
+    def pop_complete(self):
+        """Remove complete objects from storage and return them"""
+        return [
+            obj for obj in self.generator(partial=True) if obj.is_complete()
+        ]
+
+
+class MemberDict(object):
+    """Members of a columnar evaluation
+
+    Keep evaluation ids instead of evaluations.
+    Evaluations without ids (dry evaluations) are kept as objects.
+    Changes are written through to the row of the owner evaluation
+    """
+    __slots__ = ("store", "owner", "class_id", "others")
+
+    def __init__(self, store, owner, class_id=None, others=None):
+        self.store = store
+        self.owner = owner
+        self.class_id = class_id
+        self.others = others
+
+    def _id(self, key):
+        """Return member id of key"""
+        if key == ".__class__" and self.class_id is not None:
+            return self.class_id
+        if self.others:
+            return self.others.get(key)
+        return None
+
+    def get(self, key, default=None):
+        """Return member evaluation of key"""
+        id_ = self._id(key)
+        if id_ is None:
+            return default
+        if not isinstance(id_, int):
+            return id_
+        result = self.store.lookup(id_)
+        return default if result is None else result
+
+    def __getitem__(self, key):
+        result = self.get(key, NOTHING)
+        if result is NOTHING:
+            raise KeyError(key)
+        return result
+
+    def __setitem__(self, key, evaluation):
+        if key == ".__class__":
+            self.class_id = None
+            if evaluation.id > 0:
+                self.class_id = evaluation.id
+                if self.others:
+                    self.others.pop(key, None)
+                self.store.write_members(self)
+                return
+        if self.others is None:
+            self.others = {}
+        self.others[key] = evaluation.id if evaluation.id > 0 else evaluation
+        self.store.write_members(self)
+
+    def __contains__(self, key):
+        return self._id(key) is not None
+
+    def keys(self):
+        """Return member keys"""
+        result = [] if self.class_id is None else [".__class__"]
+        if self.others:
+            result.extend(self.others)
+        return result
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        return len(self.keys())
+
+    def items(self):
+        """Return member keys and evaluations"""
+        return [(key, self.get(key)) for key in self.keys()]
+
+    def values(self):
+        """Return member evaluations"""
+        return [self.get(key) for key in self.keys()]
+
+
+class SameReference(object):
+    """Keep _same of live evaluation as id. Resolve it on access
+    Live evaluations do not keep the evaluations they refer to alive
+    """
+
+    def __get__(self, obj, cls=None):
+        if obj is None:
+            return self
+        same = obj._same_id                                                      # pylint: disable=protected-access
+        if isinstance(same, int):
+            return obj._columnar_store.lookup(same)                              # pylint: disable=protected-access
+        return same
+
+    def __set__(self, obj, value):
+        if value is not None and value.id > 0:
+            value = value.id
+        object.__setattr__(obj, "_same_id", value)
+
+
+class ColumnarEvaluationStore(ColumnarObjectStore):
+    """Columnar storage for evaluations
+
+    References (_same) and .__class__ members are kept as id columns.
+    Other members are kept in a dict by evaluation id.
+    Live evaluations also keep them as ids.
+    Rows of stored evaluations are kept while pending or live evaluations
+    refer to them
+    """
+    extra_names = ("_same", "members")
+
+    def __init__(self, cls, retain=False):
+        super(ColumnarEvaluationStore, self).__init__(cls, retain=retain)
+        self.live_cls = live_class(cls, ("_same_id",), _same=SameReference())
+        self.same_ids = IntColumn()
+        self.class_ids = IntColumn()
+        self.extra = {}  # id -> (members, dry reference)
+
+    def prepare(self, obj):
+        obj.members = MemberDict(self, obj.id)
+
+    def pack_extra(self, obj, row):
+        if isinstance(obj, self.live_cls):
+            same = obj._same_id                                                  # pylint: disable=protected-access
+        else:
+            same = obj._same                                                     # pylint: disable=protected-access
+        same_id = dry = None
+        if isinstance(same, int):
+            same_id = same
+        elif same is not None:
+            if same.id > 0:
+                same_id = same.id
+            else:
+                dry = same
+        members = obj.members
+        if not isinstance(members, MemberDict):
+            new_members = MemberDict(self, obj.id)
+            for key, value in viewitems(members):
+                new_members[key] = value
+            members = new_members
+            object.__setattr__(obj, "members", members)
+        if row is None:
+            self.same_ids.append(same_id)
+            self.class_ids.append(members.class_id)
+        else:
+            self.same_ids[row] = same_id
+            self.class_ids[row] = members.class_id
+        self._set_extra(obj.id, members.others, dry)
+
+    def _set_extra(self, id_, others, dry):
+        """Keep members that are not .__class__ and dry reference of id"""
+        if others or dry is not None:
+            self.extra[id_] = (others, dry)
+        else:
+            self.extra.pop(id_, None)
+
+    def write_members(self, members):
+        """Write members of live evaluation into its row"""
+        row = self.row(members.owner)
+        if row is None:
+            return
+        self.class_ids[row] = members.class_id
+        _, dry = self.extra.get(members.owner, (None, None))
+        self._set_extra(members.owner, members.others, dry)
+
+    def unpack_extra(self, obj, row):
+        others, dry = self.extra.get(obj.id, (None, None))
+        same_id = self.same_ids[row]
+        obj._same_id = dry if same_id is None else same_id                       # pylint: disable=protected-access
+        obj.members = MemberDict(self, obj.id, self.class_ids[row], others)
+
+    def remove_extra(self, ids):
+        for id_ in ids:
+            self.extra.pop(id_, None)
+
+    def compact(self, rows):
+        """Keep only rows on extra columns"""
+        self.same_ids.compact(rows)
+        self.class_ids.compact(rows)
+
+    def _row_references(self, row):
+        """Yield ids referenced by row"""
+        yield self.same_ids[row]
+        yield self.class_ids[row]
+        others, _ = self.extra.get(self.ids[row], (None, None))
+        if others:
+            for value in viewvalues(others):
+                if isinstance(value, int):
+                    yield value
+
+    @staticmethod
+    def _object_references(obj):
+        """Yield ids referenced by live object"""
+        same = obj._same_id                                                      # pylint: disable=protected-access
+        if isinstance(same, int):
+            yield same
+        members = obj.members
+        if isinstance(members, MemberDict):
+            yield members.class_id
+            for value in viewvalues(members.others or {}):
+                if isinstance(value, int):
+                    yield value
+
+    def referenced_ids(self):
+        """Return ids referenced by live or pending evaluations,
+        and by the stored evaluations they reach"""
+        removed = self.removed
+        result = set()
+        to_visit = []
+
+        def visit(references):
+            """Add new references to result"""
+            for id_ in references:
+                if id_ is not None and id_ not in result:
+                    result.add(id_)
+                    to_visit.append(id_)
+
+        for obj in list(self.live.values()):
+            visit(self._object_references(obj))
+        for row in range(len(removed)):
+            if not removed[row]:
+                visit(self._row_references(row))
+        while to_visit:
+            row = self.row(to_visit.pop())
+            if row is not None and removed[row]:
+                visit(self._row_references(row))
+        return result
@@ -21,6 +21,12 @@ class DependencyLW(BaseLW):
     )
     nullable = set()
     model = Dependency
+    columns = {
+        "trial_id": "category", "dependent_activation_id": "int",
+        "dependent_id": "int", "dependency_activation_id": "int",
+        "dependency_id": "int", "type": "category", "reference": "bool",
+        "collection_activation_id": "int", "collection_id": "int",
+    }
 
     def __init__(self, id_, trial_id, dependent_activation_id, dependent_id,
                  dependency_activation_id, dependency_id, type_, reference,
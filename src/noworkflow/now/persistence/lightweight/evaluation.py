@@ -7,6 +7,7 @@ from __future__ import (absolute_import, print_function,
                         division, unicode_literals)
 
 from ..models import Evaluation
+from ..serializers import resolve_value
 from .base import BaseLW, define_attrs
 
 
@@ -19,6 +20,11 @@ class EvaluationLW(BaseLW):
     )
     nullable = {"checkpoint"}
     model = Evaluation
+    columns = {
+        "trial_id": "category", "checkpoint": "float",
+        "code_component_id": "int", "activation_id": "int",
+        "member_container_activation_id": "int", "member_container_id": "int",
+    }
 
     def __init__(self, id_, trial_id, code_id, activation_id, checkpoint, repr_):
         self.trial_id = trial_id
@@ -49,6 +55,27 @@ class EvaluationLW(BaseLW):
             self.member_container_activation_id = other_same.member_container_activation_id
             self.member_container_id = other_same.member_container_id
 
+    def __getitem__(self, key):
+        if key == "repr":
+            return resolve_value(self.repr)
+        return super(EvaluationLW, self).__getitem__(key)
+
+    @classmethod
+    def row_factory(cls, attributes):
+        """Return function that creates a list of values of attributes
+        Serialize deferred values"""
+        row = super(EvaluationLW, cls).row_factory(attributes)
+        if "repr" not in attributes:
+            return row
+        index = attributes.index("repr")
+
+        def resolved_row(obj):
+            """Return values of obj"""
+            values = row(obj)
+            values[index] = resolve_value(values[index])
+            return values
+        return resolved_row
+
     def is_complete(self):                                                       # pylint: disable=no-self-use
         """Evaluation can only be removed from object store
         if it has a checkpoint
@@ -69,5 +96,5 @@ class EvaluationLW(BaseLW):
             'code_component_id': self.code_component_id,
             'activation_id': self.activation_id,
             'checkpoint': self.checkpoint,
-            'repr': self.repr
+            'repr': resolve_value(self.repr)
         }
@@ -20,6 +20,11 @@ class MemberLW(BaseLW):
     )
     nullable = {}
     model = Member
+    columns = {
+        "trial_id": "category", "collection_activation_id": "int",
+        "collection_id": "int", "member_activation_id": "int",
+        "member_id": "int", "checkpoint": "float", "type": "category",
+    }
 
     def __init__(self, id_, trial_id, collection_activation_id, collection_id,
                  member_activation_id, member_id, key, checkpoint, type_):
@@ -0,0 +1,137 @@
+# Copyright (c) 2016 Universidade Federal Fluminense (UFF)
+# Copyright (c) 2016 Polytechnic Institute of New York University.
+# This file is part of noWorkflow.
+# Please, consult the license terms in the LICENSE file.
+"""Member timelines. Reconstruct the state of collections at checkpoints"""
+from __future__ import (absolute_import, print_function,
+                        division, unicode_literals)
+
+from bisect import bisect_left, bisect_right
+
+
+class MemberTimeline(object):
+    """Members of a collection
+
+    Each key maps to a sorted list of checkpoints and to a parallel
+    list of members. A member replaces the previous member of the key
+    at its checkpoint. Memberships with the same key and checkpoint keep
+    the last one added
+    """
+    __slots__ = ("checkpoints", "members")
+
+    def __init__(self):
+        self.checkpoints = {}  # key -> sorted checkpoints
+        self.members = {}  # key -> members in checkpoint order
+
+    def add(self, key, checkpoint, member):
+        """Add member of key at checkpoint"""
+        checkpoints = self.checkpoints.get(key)
+        if checkpoints is None:
+            self.checkpoints[key] = [checkpoint]
+            self.members[key] = [member]
+            return
+        members = self.members[key]
+        if checkpoints[-1] < checkpoint:
+            checkpoints.append(checkpoint)
+            members.append(member)
+            return
+        position = bisect_left(checkpoints, checkpoint)
+        if checkpoints[position] == checkpoint:
+            members[position] = member
+        else:
+            checkpoints.insert(position, checkpoint)
+            members.insert(position, member)
+
+    def at(self, key, checkpoint):
+        """Return (checkpoint, member) of key at checkpoint or None"""
+        checkpoints = self.checkpoints.get(key)
+        if checkpoints is None:
+            return None
+        position = bisect_right(checkpoints, checkpoint) - 1
+        if position < 0:
+            return None
+        return checkpoints[position], self.members[key][position]
+
+    def state(self, checkpoint):
+        """Return dict of key -> (checkpoint, member) at checkpoint"""
+        result = {}
+        for key, checkpoints in self.checkpoints.items():
+            position = bisect_right(checkpoints, checkpoint) - 1
+            if position >= 0:
+                result[key] = (checkpoints[position], self.members[key][position])
+        return result
+
+    def history(self, key):
+        """Return list of (checkpoint, member) of key"""
+        return list(zip(
+            self.checkpoints.get(key, ()), self.members.get(key, ())
+        ))
+
+    def __iter__(self):
+        return iter(self.checkpoints)
+
+    def __len__(self):
+        return len(self.checkpoints)
+
+
+EMPTY_TIMELINE = MemberTimeline()
+
+
+class MemberTimelines(object):
+    """Member timelines of all collections of a trial
+
+    Collections are identified by evaluation ids and timelines store
+    member ids. Membership records are also indexed by collection and
+    by member. Iteration follows the insertion order of records
+    """
+
+    def __init__(self, members=()):
+        self.records = []
+        self.timelines = {}  # collection id -> MemberTimeline
+        self.as_collection = {}  # collection id -> membership records
+        self.as_member = {}  # member id -> membership records
+        for member in members:
+            self.add(member)
+
+    def add(self, member):
+        """Add membership record"""
+        collection_id = member.collection_id
+        timeline = self.timelines.get(collection_id)
+        if timeline is None:
+            timeline = self.timelines[collection_id] = MemberTimeline()
+        timeline.add(member.key, member.checkpoint, member.member_id)
+        self.records.append(member)
+        self.as_collection.setdefault(collection_id, []).append(member)
+        self.as_member.setdefault(member.member_id, []).append(member)
+
+    def timeline(self, collection_id):
+        """Return MemberTimeline of collection. Empty if it does not exist"""
+        return self.timelines.get(collection_id, EMPTY_TIMELINE)
+
+    def state(self, collection_id, checkpoint):
+        """Return dict of key -> (checkpoint, member id) of collection"""
+        return self.timeline(collection_id).state(checkpoint)
+
+    def memberships_as_collection(self, collection_id):
+        """Return membership records of collection"""
+        return self.as_collection.get(collection_id, [])
+
+    def memberships_as_member(self, member_id):
+        """Return membership records of member"""
+        return self.as_member.get(member_id, [])
+
+    def __iter__(self):
+        return iter(self.records)
+
+    def __len__(self):
+        return len(self.records)
+
+
+def member_timelines(trial, data=None):
+    """Return MemberTimelines of trial
+
+    Share the timelines of data (TrialData), if it is set
+    """
+    if data is not None:
+        return data.timelines
+    return MemberTimelines(trial.members)
@@ -8,7 +8,7 @@ from __future__ import (absolute_import, print_function,
 
 from datetime import timedelta
 from sqlalchemy import Column, Integer, String, Text, Float, select, join
-from sqlalchemy import PrimaryKeyConstraint, ForeignKeyConstraint
+from sqlalchemy import PrimaryKeyConstraint, ForeignKeyConstraint, Index
 
 from ...utils.prolog import PrologDescription, PrologTrial, PrologTimestamp
 from ...utils.prolog import PrologAttribute, PrologRepr, PrologNullable
@@ -76,6 +76,8 @@ class Activation(AlchemyProxy):
     __tablename__ = "activation"
     __table_args__ = (
         PrimaryKeyConstraint("trial_id", "id"),
+        Index("ix_activation_trial_id_code_block_id",
+              "trial_id", "code_block_id", "id"),
         ForeignKeyConstraint(["trial_id"], ["trial.id"], ondelete="CASCADE"),
         ForeignKeyConstraint(["trial_id", "id"],
                              ["evaluation.trial_id",
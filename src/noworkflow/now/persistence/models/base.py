@@ -14,6 +14,7 @@ from functools import wraps
 from future.utils import with_metaclass, viewitems, viewvalues, viewkeys
 from sqlalchemy import Column
 from sqlalchemy.orm import relationship
+from sqlalchemy.orm.attributes import instance_state
 
 from .. import relational
 
@@ -142,13 +143,39 @@ class Model(with_metaclass(MetaModel)):
             self.set_instance_attr(key, value)
 
 
+# SQLAlchemy session -> {(proxy class, primary key): proxy instance}
+IDENTITY_MAPS = weakref.WeakKeyDictionary()
+
+
+def identity_map(session):
+    """Return proxy identity map of SQLAlchemy session"""
+    proxies = IDENTITY_MAPS.get(session)
+    if proxies is None:
+        proxies = IDENTITY_MAPS[session] = weakref.WeakValueDictionary()
+    return proxies
+
+
 def proxy(element):
-    """Return proxy instance from SQLALchemy object"""
-    cls = element.__class__
-    if cls in AlchemyProxy.__alchemy_refs__:
-        return AlchemyProxy.__alchemy_refs__[cls](element)
-    else:
+    """Return proxy instance from SQLALchemy object
+
+    Proxies are hydrated from the loaded object, without querying it again.
+    Objects of the same session with the same primary key share the proxy
+    """
+    cls = AlchemyProxy.__alchemy_refs__.get(element.__class__)
+    if cls is None:
         return element
+    state = instance_state(element)
+    session = state.session
+    if session is None or state.key is None:
+        return cls(element)
+    proxies = identity_map(session)
+    key = (cls, state.key[1])
+    result = proxies.get(key)
+    if result is None:
+        result = proxies[key] = cls(element)
+    elif result._alchemy_obj() is not element:                                   # pylint: disable=protected-access
+        result._hydrate(element)                                                 # pylint: disable=protected-access
+    return result
 
 
 def proxy_gen(query):
@@ -198,11 +225,13 @@ class AlchemyProxy(Model):
 
     def __init__(self, obj):
         super(AlchemyProxy, self).__init__(obj)
+        self._alchemy_obj = None
         if isinstance(obj, relational.base):
             self._store_pk(obj)
+            self._hydrate(obj)
         else:
             self._alchemy_pk = obj
-        self._restore_instance()
+            self._restore_instance()
 
     def __hash__(self):
         return hash((type(self), tuple(self._alchemy_pk)))
@@ -221,13 +250,24 @@ class AlchemyProxy(Model):
     def _store_pk(self, obj):
         self._alchemy_pk = obj.__mapper__.primary_key_from_instance(obj)
 
-    def _restore_instance(self):
-        """Restore instance with new session"""
-        obj = self._get_instance()
+    def _hydrate(self, obj):
+        """Copy columns from loaded instance
+
+        Keep a weak reference to it to avoid querying relationships by pk.
+        A strong reference would keep loaded relationships out of date
+        """
+        self._alchemy_obj = weakref.ref(obj)
         for column in self.__columns__:
             setattr(self, column, getattr(obj, column))
 
+    def _restore_instance(self):
+        """Restore instance with new session"""
+        self._hydrate(self._get_instance())
+
     def _get_instance(self):
+        obj = self._alchemy_obj and self._alchemy_obj()
+        if obj is not None and instance_state(obj).session is relational.session():
+            return obj
         return relational.session.query(self.__model__).get(self._alchemy_pk)
 
     def __getstate__(self):
@@ -235,6 +275,7 @@ class AlchemyProxy(Model):
 
     def __setstate__(self, state):
         (self._alchemy_pk,) = state
+        self._alchemy_obj = None
         self._restore_instance()
 
     def to_dict(self, ignore=tuple(), extra=tuple()):
@@ -253,9 +294,9 @@ class AlchemyProxy(Model):
         """Bulk insert lightweight objects from ObjectStore"""
         if object_store.has_items():
             _conn = conn if conn else relational.engine.connect()
-            _conn.execute(
-                cls.__model__.__table__.insert().prefix_with("OR REPLACE"),
-                *object_store.generator(partial)
+            relational.insert_many(
+                _conn, cls.__model__.__table__,
+                object_store.generator(partial)
             )
             if conn is None:
                 _conn.close()
@@ -115,10 +115,10 @@ class CodeBlock(AlchemyProxy):
     def mark_code(self, evaluations, options=None):
         """Mark evaluation dependencies in CodeBlock"""
         from .evaluation import Evaluation
-        from ...models.dependency_querier import DependencyQuerier
+        from ...models.dependency_querier import DependencyQuerier, slice_cache
         if isinstance(evaluations, Evaluation):
             evaluations = [evaluations]
-        querier = DependencyQuerier(options=options)
+        querier = DependencyQuerier(options=options, cache=slice_cache)
         nodes_to_visit, visited, found = querier.navigate_dependencies(evaluations)
         return self.content([
             self.content.get_mark(
@@ -7,7 +7,7 @@ from __future__ import (absolute_import, print_function,
                         division, unicode_literals)
 
 from sqlalchemy import Column, Integer, String, Text
-from sqlalchemy import PrimaryKeyConstraint, ForeignKeyConstraint
+from sqlalchemy import PrimaryKeyConstraint, ForeignKeyConstraint, Index
 from sqlalchemy import CheckConstraint
 from sqlalchemy.orm import remote, foreign
 
@@ -68,6 +68,8 @@ class CodeComponent(AlchemyProxy):
     __tablename__ = "code_component"
     __table_args__ = (
         PrimaryKeyConstraint("trial_id", "id"),
+        Index("ix_code_component_trial_id_container_id",
+              "trial_id", "container_id", "id"),
         ForeignKeyConstraint(["trial_id"], ["trial.id"], ondelete="CASCADE"),
         ForeignKeyConstraint(["trial_id", "container_id"],
                              ["code_block.trial_id", "code_block.id"],
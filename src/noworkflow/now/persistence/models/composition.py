@@ -7,7 +7,7 @@ from __future__ import (absolute_import, print_function,
                         division, unicode_literals)
 
 from sqlalchemy import Column, Integer, String, Text
-from sqlalchemy import PrimaryKeyConstraint, ForeignKeyConstraint
+from sqlalchemy import PrimaryKeyConstraint, ForeignKeyConstraint, Index
 
 from ...utils.prolog import PrologDescription, PrologTrial, PrologAttribute
 from ...utils.prolog import PrologRepr, PrologNullable, PrologNullableRepr
@@ -27,6 +27,10 @@ class Composition(AlchemyProxy):
     __tablename__ = "composition"
     __table_args__ = (
         PrimaryKeyConstraint("trial_id", "id"),
+        Index("ix_composition_trial_id_part_id",
+              "trial_id", "part_id", "id"),
+        Index("ix_composition_trial_id_whole_id",
+              "trial_id", "whole_id", "id"),
         ForeignKeyConstraint(["trial_id"],
                              ["trial.id"], ondelete="CASCADE"),
         ForeignKeyConstraint(["trial_id", "part_id"],
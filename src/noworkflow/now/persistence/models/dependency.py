@@ -7,7 +7,7 @@ from __future__ import (absolute_import, print_function,
                         division, unicode_literals)
 
 from sqlalchemy import Column, Integer, String, Text, Boolean
-from sqlalchemy import PrimaryKeyConstraint, ForeignKeyConstraint
+from sqlalchemy import PrimaryKeyConstraint, ForeignKeyConstraint, Index
 
 from ...utils.prolog import PrologDescription, PrologTrial, PrologAttribute
 from ...utils.prolog import PrologRepr, PrologNullable, PrologBoolean
@@ -62,6 +62,16 @@ class Dependency(AlchemyProxy):
     __tablename__ = "dependency"
     __table_args__ = (
         PrimaryKeyConstraint("trial_id", "id"),
+        Index("ix_dependency_trial_id_dependent_id",
+              "trial_id", "dependent_id", "id"),
+        Index("ix_dependency_trial_id_dependency_id",
+              "trial_id", "dependency_id", "id"),
+        Index("ix_dependency_trial_id_dependent_activation_id",
+              "trial_id", "dependent_activation_id", "id"),
+        Index("ix_dependency_trial_id_dependency_activation_id",
+              "trial_id", "dependency_activation_id", "id"),
+        Index("ix_dependency_trial_id_collection_id",
+              "trial_id", "collection_id", "id"),
         ForeignKeyConstraint(["trial_id"],
                              ["trial.id"], ondelete="CASCADE"),
         ForeignKeyConstraint(["trial_id", "dependent_activation_id"],
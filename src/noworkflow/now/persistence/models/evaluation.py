@@ -8,7 +8,7 @@ from __future__ import (absolute_import, print_function,
 
 from datetime import timedelta
 from sqlalchemy import Column, Integer, String, Text, Float
-from sqlalchemy import PrimaryKeyConstraint, ForeignKeyConstraint
+from sqlalchemy import PrimaryKeyConstraint, ForeignKeyConstraint, Index
 from sqlalchemy.orm import remote, foreign
 
 
@@ -81,6 +81,12 @@ class Evaluation(AlchemyProxy):
     __tablename__ = "evaluation"
     __table_args__ = (
         PrimaryKeyConstraint("trial_id", "id"),
+        Index("ix_evaluation_trial_id_activation_id",
+              "trial_id", "activation_id", "id"),
+        Index("ix_evaluation_trial_id_code_component_id",
+              "trial_id", "code_component_id", "id"),
+        Index("ix_evaluation_trial_id_member_container_id",
+              "trial_id", "member_container_id", "id"),
         ForeignKeyConstraint(["trial_id"], ["trial.id"], ondelete="CASCADE"),
         ForeignKeyConstraint(["trial_id", "code_component_id"],
                              ["code_component.trial_id", "code_component.id"],
@@ -220,11 +226,17 @@ class Evaluation(AlchemyProxy):
         return self.trial.start + timedelta(seconds=self.checkpoint)
 
     def was_derived_from(self, evaluations, distinguish=False):
-        from ...models.dependency_querier import DependencyQuerier
+        """Check if evaluation was derived from evaluations
+        Use the reachability index of the trial"""
+        from ...models.dependency_querier import load_reachability_index
         if isinstance(evaluations, Evaluation):
             evaluations = [evaluations]
-        querier = DependencyQuerier()
-        nodes_to_visit, visited, found = querier.navigate_dependencies([self], stop_on=evaluations)
+        reachability = load_reachability_index(self.trial)
+        found = {
+            evaluation for evaluation in evaluations
+            if evaluation.trial_id == self.trial_id
+            and reachability.derives_from(self.id, evaluation.id)
+        }
         if distinguish:
             return {
                 evaluation: evaluation in found
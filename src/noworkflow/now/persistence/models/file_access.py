@@ -10,7 +10,7 @@ import os
 
 from datetime import timedelta
 from sqlalchemy import Column, Integer, String, Text, Float
-from sqlalchemy import PrimaryKeyConstraint, ForeignKeyConstraint
+from sqlalchemy import PrimaryKeyConstraint, ForeignKeyConstraint, Index
 
 from ...utils.prolog import PrologDescription, PrologTrial, PrologAttribute
 from ...utils.prolog import PrologRepr, PrologTimestamp, PrologNullable
@@ -55,6 +55,8 @@ class FileAccess(AlchemyProxy):
     __tablename__ = "file_access"
     __table_args__ = (
         PrimaryKeyConstraint("trial_id", "id"),
+        Index("ix_file_access_trial_id_activation_id",
+              "trial_id", "activation_id", "id"),
         ForeignKeyConstraint(["trial_id", "activation_id"],
                              ["activation.trial_id",
                               "activation.id"], ondelete="CASCADE"),
@@ -7,7 +7,7 @@ from __future__ import (absolute_import, print_function,
                         division, unicode_literals)
 
 from sqlalchemy import Column, Integer, String, Text, Float
-from sqlalchemy import PrimaryKeyConstraint, ForeignKeyConstraint
+from sqlalchemy import PrimaryKeyConstraint, ForeignKeyConstraint, Index
 
 from ...utils.prolog import PrologDescription, PrologTrial, PrologAttribute
 from ...utils.prolog import PrologRepr, PrologTimestamp
@@ -60,6 +60,14 @@ class Member(AlchemyProxy):
     __tablename__ = "member"
     __table_args__ = (
         PrimaryKeyConstraint("trial_id", "id"),
+        Index("ix_member_trial_id_collection_id",
+              "trial_id", "collection_id", "id"),
+        Index("ix_member_trial_id_member_id",
+              "trial_id", "member_id", "id"),
+        Index("ix_member_trial_id_collection_activation_id",
+              "trial_id", "collection_activation_id", "id"),
+        Index("ix_member_trial_id_member_activation_id",
+              "trial_id", "member_activation_id", "id"),
         ForeignKeyConstraint(["trial_id"],
                              ["trial.id"], ondelete="CASCADE"),
         ForeignKeyConstraint(["trial_id", "collection_activation_id"],
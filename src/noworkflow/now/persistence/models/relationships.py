@@ -6,7 +6,7 @@
 from copy import copy
 
 from sqlalchemy.orm import remote, foreign
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, backref
 
 from .base import proxy_attr, proxy_gen, proxy, proxy_gen_first
 
@@ -81,7 +81,7 @@ bidirectional_relationship(
 
 # Activation.code_block <-> CodeBlock.activations
 add(CodeBlock, "activations", relationship(
-    "Activation", backref="code_block",
+    "Activation", backref="code_block", order_by=Activation.m.id,
     primaryjoin=(((CodeBlock.m.id) == foreign(Activation.m.code_block_id)) &
                  ((CodeBlock.m.trial_id) == foreign(Activation.m.trial_id))),
 ), proxy=proxy_gen)
@@ -98,7 +98,7 @@ Activation.this_evaluation = proxy_attr("this_evaluation", proxy_gen_first)
 
 # Activation.evaluations <-> Evaluation.activation
 add(Evaluation, "activation", relationship(
-    "Activation", backref="evaluations",
+    "Activation", backref=backref("evaluations", order_by=Evaluation.m.id),
     primaryjoin=((foreign(Evaluation.m.activation_id) == remote(Activation.m.id)) &
                  ((Evaluation.m.trial_id) == remote(Activation.m.trial_id))),
     
@@ -108,12 +108,14 @@ Activation.evaluations = proxy_attr("evaluations", proxy_gen)
 # Activation.file_accesses <-> FileAccess.activation
 bidirectional_relationship(
     Activation, "file_accesses", FileAccess, "activation", MTO,
+    extra1=dict(order_by=FileAccess.m.id),
     viewonly=True,
 )
 
 # Activation.dependent_dependencies <-> Dependency.dependent_activation
 bidirectional_relationship(
     Activation, "dependent_dependencies", Dependency, "dependent_activation", MTO,
+    extra1=dict(order_by=Dependency.m.id),
     viewonly=True,
     primaryjoin=((Activation.m.id == Dependency.m.dependent_activation_id) &
                  (Activation.m.trial_id == Dependency.m.trial_id)),
@@ -122,6 +124,7 @@ bidirectional_relationship(
 # Activation.dependency_dependencies <-> Dependency.dependency_activation
 bidirectional_relationship(
     Activation, "dependency_dependencies", Dependency, "dependency_activation", MTO,
+    extra1=dict(order_by=Dependency.m.id),
     viewonly=True,
     primaryjoin=((Activation.m.id == Dependency.m.dependency_activation_id) &
                     (Activation.m.trial_id == Dependency.m.trial_id)),
@@ -130,6 +133,7 @@ bidirectional_relationship(
 # Activation.collection_membership <-> Member.collection_activation
 bidirectional_relationship(
     Activation, "collection_membership", Member, "collection_activation", MTO,
+    extra1=dict(order_by=Member.m.id),
     viewonly=True,
     primaryjoin=((Activation.m.id == Member.m.collection_activation_id) &
                  (Activation.m.trial_id == Member.m.trial_id))
@@ -138,6 +142,7 @@ bidirectional_relationship(
 # Activation.member_membership <-> Member.member_activation
 bidirectional_relationship(
     Activation, "member_membership", Member, "member_activation", MTO,
+    extra1=dict(order_by=Member.m.id),
     viewonly=True,
     primaryjoin=((Activation.m.id == Member.m.member_activation_id) &
                  (Activation.m.trial_id == Member.m.trial_id))
@@ -166,7 +171,7 @@ CodeBlock.trial = proxy_attr("trial")
 # CodeBlock.components <-> CodeComponent.container
 add(CodeBlock, "components", relationship(
     "CodeComponent",
-    viewonly=True, uselist=True,
+    viewonly=True, uselist=True, order_by=CodeComponent.m.id,
     primaryjoin=((remote(CodeComponent.m.container_id) == foreign(CodeBlock.m.id)) &
                  (remote(CodeComponent.m.trial_id) == foreign(CodeBlock.m.trial_id)))
 ), proxy=proxy_gen)
@@ -197,6 +202,7 @@ CodeBlock.this_component = proxy_attr("this_component", proxy_gen_first)
 # CodeComponent.trial <-> Trial.code_components
 bidirectional_relationship(
     Trial, "code_components", CodeComponent, "trial", MTO,
+    extra1=dict(order_by=CodeComponent.m.id),
     viewonly=True,
 )
 
@@ -204,6 +210,7 @@ bidirectional_relationship(
 # compositions in which this component is the part
 bidirectional_relationship(
     CodeComponent, "compositions_as_part", Composition, "part", MTO,
+    extra1=dict(order_by=Composition.m.id),
     viewonly=True,
     primaryjoin=(
         (CodeComponent.m.id == Composition.m.part_id) &
@@ -214,6 +221,7 @@ bidirectional_relationship(
 # compositions in which this component is the whole
 bidirectional_relationship(
     CodeComponent, "compositions_as_whole", Composition, "whole", MTO,
+    extra1=dict(order_by=Composition.m.id),
     viewonly=True,
     primaryjoin=(
         (CodeComponent.m.id == Composition.m.whole_id) &
@@ -230,7 +238,7 @@ bidirectional_relationship(
 # CodeComponent.parents <-> CodeComponent.children
 bidirectional_relationship(
     CodeComponent, "parents", CodeComponent, "children", MTM,
-    viewonly=True,
+    viewonly=True, order_by=Composition.m.id,
     secondary=Composition.__table__,
     primaryjoin=(
         (CodeComponent.m.id == Composition.m.part_id) &
@@ -245,6 +253,7 @@ bidirectional_relationship(
 # Composition.trial <-> Trial.compositions
 bidirectional_relationship(
     Trial, "compositions", Composition, "trial", MTO,
+    extra1=dict(order_by=Composition.m.id),
     viewonly=True,
 )
 
@@ -253,6 +262,7 @@ bidirectional_relationship(
 # Dependency.trial <-> Trial.dependencies
 bidirectional_relationship(
     Trial, "dependencies", Dependency, "trial", MTO,
+    extra1=dict(order_by=Dependency.m.id),
     viewonly=True,
 )
 
@@ -260,7 +270,7 @@ bidirectional_relationship(
 # dependencies in which the evaluation is the dependent
 bidirectional_relationship(
     Dependency, "dependent", Evaluation, "dependencies_as_dependent", OTM,
-    extra2=dict(lazy="dynamic"),
+    extra2=dict(lazy="dynamic", order_by=Dependency.m.id),
     viewonly=True, 
     primaryjoin=(
         (Evaluation.m.id == Dependency.m.dependent_id) &
@@ -270,7 +280,8 @@ bidirectional_relationship(
 
 # Dependency.dependency <-> Evaluation.dependencies_as_dependency
 add(Dependency, "dependency", relationship(
-    "Evaluation", backref="dependencies_as_dependency",
+    "Evaluation",
+    backref=backref("dependencies_as_dependency", order_by=Dependency.m.id),
     primaryjoin=(
         (Evaluation.m.id == foreign(Dependency.m.dependency_id)) &
         (Evaluation.m.activation_id == Dependency.m.dependency_activation_id) &
@@ -293,13 +304,14 @@ bidirectional_relationship(
 # Evaluation.trial <-> Trial.evaluations
 bidirectional_relationship(
     Trial, "evaluations", Evaluation, "trial", MTO,
+    extra1=dict(order_by=Evaluation.m.id),
     viewonly=True,
 )
 
 # Evaluation.dependencies <-> Evaluation.dependents
 bidirectional_relationship(
     Evaluation, "dependencies", Evaluation, "dependents", MTM,
-    viewonly=True,
+    viewonly=True, order_by=Dependency.m.id,
     secondary=Dependency.__table__,
     primaryjoin=(
         (Evaluation.m.id == Dependency.m.dependent_id) &
@@ -315,6 +327,7 @@ bidirectional_relationship(
 # memberships in which this evaluation is the collection
 bidirectional_relationship(
     Evaluation, "memberships_as_collection", Member, "collection", MTO,
+    extra1=dict(order_by=Member.m.id),
     viewonly=True,
     primaryjoin=(
         (Evaluation.m.id == Member.m.collection_id) &
@@ -326,6 +339,7 @@ bidirectional_relationship(
 # memberships in which this evaluation is the member
 bidirectional_relationship(
     Evaluation, "memberships_as_member", Member, "member", MTO,
+    extra1=dict(order_by=Member.m.id),
     viewonly=True,
     primaryjoin=(
         (Evaluation.m.id == Member.m.member_id) &
@@ -336,7 +350,7 @@ bidirectional_relationship(
 # Evaluation.members <-> Evaluation.collections
 bidirectional_relationship(
     Evaluation, "members", Evaluation, "collections", MTM,
-    viewonly=True,
+    viewonly=True, order_by=Member.m.id,
     secondary=Member.__table__,
     primaryjoin=(
         (Evaluation.m.id == Member.m.collection_id) &
@@ -351,7 +365,8 @@ bidirectional_relationship(
 bidirectional_relationship(
     Evaluation, "member_container", Evaluation, "container_members", OTM,
     extra1=dict(remote_side=[Evaluation.m.trial_id, Evaluation.m.activation_id, Evaluation.m.id]),
-    extra2=dict(remote_side=[Evaluation.m.trial_id, Evaluation.m.member_container_activation_id, Evaluation.m.member_container_id]),
+    extra2=dict(remote_side=[Evaluation.m.trial_id, Evaluation.m.member_container_activation_id, Evaluation.m.member_container_id],
+                order_by=Evaluation.m.id),
     viewonly=True,
     primaryjoin=(
         (Evaluation.m.id == Evaluation.m.member_container_id) &
@@ -365,6 +380,7 @@ bidirectional_relationship(
 # FileAccess.trial <-> Trial.file_accesses
 bidirectional_relationship(
     Trial, "file_accesses", FileAccess, "trial", MTO,
+    extra1=dict(order_by=FileAccess.m.id),
     viewonly=True,
 )
 
@@ -381,6 +397,7 @@ add(Head, "trial", relationship(
 # Member.trial <-> Trial.members
 bidirectional_relationship(
     Trial, "members", Member, "trial", MTO,
+    extra1=dict(order_by=Member.m.id),
     viewonly=True,
 )
 
@@ -229,6 +229,7 @@ class Trial(AlchemyProxy):
 
 
     def __init__(self, *args, **kwargs):
+        obj = None
         if args and isinstance(args[0], relational.base):
             obj = args[0]
             trial_ref = obj.id
@@ -251,7 +252,7 @@ class Trial(AlchemyProxy):
                 kwargs["graph_use_cache"] = False
             if "prolog_use_cache" not in kwargs:
                 kwargs["prolog_use_cache"] = False
-        else:
+        elif obj is None:
             obj = Trial.load_trial(trial_ref, session=session)
 
         if obj is None:
@@ -266,6 +267,8 @@ class Trial(AlchemyProxy):
         from ...models.dataflow_model import DataflowModel
 
         self.dependency_config = DependencyConfig()
+        # TrialData with read-only records. Clusterizers use it, if it is set
+        self.trial_data = None
         self._dependency_clusterizer = None
         self._clusterizer_mode = None
         self.graph = TrialGraph(self)
@@ -281,7 +284,9 @@ class Trial(AlchemyProxy):
         config = self.dependency_config
         if config.mode != self._clusterizer_mode:
             self._clusterizer_mode = config.mode
-            self._dependency_clusterizer = config.clusterizer(self)
+            self._dependency_clusterizer = config.clusterizer(
+                self, data=self.trial_data
+            )
         return self._dependency_clusterizer
 
     @query_many_property
@@ -8,9 +8,11 @@ from __future__ import (absolute_import, print_function,
 
 import threading
 
+from contextlib import contextmanager
+from itertools import chain
 from os.path import join, exists
 
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, inspect
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import scoped_session, sessionmaker
 
@@ -19,6 +21,19 @@ from ..utils.io import print_msg
 
 DB_FILENAME = "db.sqlite"
 
+# Storage profile -> PRAGMAs executed on each new SQLite connection
+STORAGE_PROFILES = {
+    "default": [],
+    # WAL with synchronous=NORMAL may lose the last transactions on power
+    # loss, but it does not corrupt the database
+    "fast": [
+        "PRAGMA journal_mode=WAL",
+        "PRAGMA synchronous=NORMAL",
+        "PRAGMA cache_size=-262144",  # 256 MiB
+        "PRAGMA temp_store=MEMORY",
+    ],
+}
+
 
 class RelationalDatabase(object):
     """Relational Database deal with SQLite connection"""
@@ -26,7 +41,9 @@ class RelationalDatabase(object):
     def __init__(self, persistence_config):
         self.db_path = None  # Database path
         self.engine = None
+        self.profile = "default"
         self._session_map = {}
+        self._inserts = {}  # (table, attributes) -> (sql, processors)
         self.session_factory = sessionmaker()
 
         self.base = declarative_base()
@@ -45,6 +62,9 @@ class RelationalDatabase(object):
         """Create database connection
         If database does not exist, create it as well
         """
+        # Register the tables in the metadata. Models are not imported by
+        # 'import noworkflow' to keep the startup fast
+        from . import models                                                    # pylint: disable=unused-variable
         new_db = not exists(self.db_path)
 
         if config.should_mock:
@@ -53,6 +73,16 @@ class RelationalDatabase(object):
         self.engine = create_engine(
             "sqlite://" + ("/" if self.db_path else "") + self.db_path,
             echo=False)
+        self.profile = getattr(config, "storage_profile", None) or "default"
+        pragmas = STORAGE_PROFILES[self.profile]
+        if pragmas and self.db_path:
+            @event.listens_for(self.engine, "connect")
+            def set_pragmas(dbapi_connection, _):                                # pylint: disable=unused-variable
+                """Configure SQLite connection according to profile"""
+                cursor = dbapi_connection.cursor()
+                for pragma in pragmas:
+                    cursor.execute(pragma)
+                cursor.close()
         self.session_factory.configure(bind=self.engine, autoflush=False,
                                        expire_on_commit=True)
         self._session_map = {}
@@ -74,6 +104,99 @@ class RelationalDatabase(object):
             self._session_map[ident].configure(expire_on_commit=False)
         return self._session_map[ident]
 
+    @contextmanager
+    def transaction(self):
+        """Open connection with a transaction. Commit it at the end"""
+        conn = self.engine.connect()
+        try:
+            with conn.begin():
+                yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _prepare_insert(conn, table, keys):
+        """Return insert statement, attributes, default values of missing
+        columns, and bind processors of a lightweight object layout"""
+        attributes = [attr for attr in keys if attr in table.c]
+        columns = [table.c[attr] for attr in attributes]
+        defaults = []
+        for column in table.c:
+            if column.name in attributes or column.default is None:
+                continue
+            if column.default.is_scalar:
+                columns.append(column)
+                defaults.append(column.default.arg)
+        processors = [
+            (index, column.type.bind_processor(conn.dialect))
+            for index, column in enumerate(columns)
+        ]
+        quote = conn.dialect.identifier_preparer.quote
+        sql = "INSERT OR REPLACE INTO {} ({}) VALUES ({})".format(
+            quote(table.name), ", ".join(quote(col.name) for col in columns),
+            ", ".join("?" for _ in columns)
+        )
+        return (
+            sql, attributes, defaults,
+            [(index, proc) for index, proc in processors if proc]
+        )
+
+    def insert_many(self, conn, table, objects):
+        """Insert or replace lightweight objects using a single executemany
+        Bypass the per-row processing of SQLAlchemy Core
+        Return the number of inserted objects
+        """
+        iterator = iter(objects)
+        first = next(iterator, None)
+        if first is None:
+            return 0
+        key = (table.name, tuple(first.keys()))
+        if key not in self._inserts:
+            self._inserts[key] = self._prepare_insert(conn, table, key[1])
+        sql, attributes, defaults, processors = self._inserts[key]
+        factory = getattr(type(first), "row_factory", None)
+        if factory is not None:
+            values = factory(attributes)
+        else:
+            values = lambda obj: [obj[attr] for attr in attributes]
+        rows = []
+        for obj in chain((first,), iterator):
+            row = values(obj)
+            if defaults:
+                row += defaults
+            for index, processor in processors:
+                row[index] = processor(row[index])
+            rows.append(tuple(row))
+        conn.exec_driver_sql(sql, rows)
+        return len(rows)
+
+    def migrate(self, analyze=True):
+        """Create missing tables and indexes of existing database
+        Recreate indexes whose columns changed
+        Run ANALYZE to update the statistics of the query planner
+        Return names of created indexes
+        """
+        self.base.metadata.create_all(self.engine)
+        created = []
+        with self.transaction() as conn:
+            inspector = inspect(conn)
+            for table in self.base.metadata.sorted_tables:
+                existing = {
+                    index["name"]: index["column_names"]
+                    for index in inspector.get_indexes(table.name)
+                }
+                for index in sorted(table.indexes, key=lambda idx: idx.name):
+                    columns = [column.name for column in index.columns]
+                    if existing.get(index.name) == columns:
+                        continue
+                    if index.name in existing:
+                        index.drop(conn)
+                    index.create(conn)
+                    created.append(index.name)
+            if analyze:
+                conn.exec_driver_sql("ANALYZE")
+        return created
+
     def query(self, text):
         """Perform SQL query"""
         return self.session.execute(text).fetchall()
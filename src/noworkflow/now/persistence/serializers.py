@@ -7,10 +7,13 @@ from __future__ import (absolute_import, print_function,
                         division, unicode_literals)
 
 
+import hashlib
+import sys
+
 from array import array
 from collections import deque
 
-from ..utils.cross_version import IMMUTABLE
+from ..utils.cross_version import IMMUTABLE, reprlib, perf_counter
 
 from . import content
 
@@ -41,6 +44,102 @@ def jsonpickle_content(obj):
     return "now-content:" + content.put(jsonpickle.encode(obj, keys=True), "generic")
 
 
+class ScientificSerializer(object):
+    """NumPy and pandas aware serializer
+    Represent arrays and data frames by a compact summary.
+    Use fallback for other objects.
+
+    If store_content is set, it also stores array buffers in the content
+    database. Buffers are deduplicated by their sha1 hash.
+    """
+
+    def __init__(self, store_content=False, fallback=repr_serializer):
+        self.store_content = store_content
+        self.fallback = fallback
+        self.buffers = {}  # buffer sha1 -> content hash
+
+    @staticmethod
+    def _bytes(data, numpy):
+        """Return memoryview of the raw bytes of array"""
+        contiguous = numpy.ascontiguousarray(data).reshape(-1)
+        return memoryview(contiguous.view(numpy.uint8))
+
+    def _put(self, buffer, digest):
+        """Store buffer in the content database once"""
+        content_hash = self.buffers.get(digest)
+        if content_hash is None:
+            if not getattr(content, "accepts_buffers", False):
+                buffer = buffer.tobytes()
+            content_hash = self.buffers[digest] = content.put(
+                buffer, "generic"
+            )
+        return content_hash
+
+    @staticmethod
+    def _limits(data):
+        """Return min and max of numeric arrays"""
+        if not data.size or data.dtype.kind not in "biuf":
+            return ""
+        return ", min={!r}, max={!r}".format(
+            data.min().item(), data.max().item()
+        )
+
+    def _ndarray(self, obj, numpy):
+        """Summarize ndarray"""
+        buffer = self._bytes(obj, numpy)
+        digest = hashlib.sha1(buffer).hexdigest()
+        result = "ndarray(shape={}, dtype={}, strides={}{}, sha1={}".format(
+            obj.shape, obj.dtype, obj.strides, self._limits(obj), digest
+        )
+        if self.store_content:
+            result += ", content=now-content:" + self._put(buffer, digest)
+        return result + ")"
+
+    def _pandas_hash(self, obj, pandas, numpy):
+        """Return sha1 of pandas object row hashes"""
+        hashes = pandas.util.hash_pandas_object(obj, index=True)
+        return hashlib.sha1(self._bytes(hashes.to_numpy(), numpy)).hexdigest()
+
+    def _series(self, obj, pandas, numpy):
+        """Summarize pandas Series"""
+        limits = ""
+        if isinstance(obj.dtype, numpy.dtype):
+            limits = self._limits(obj.to_numpy())
+        return "Series(name={!r}, length={}, dtype={}{}, sha1={})".format(
+            obj.name, len(obj), obj.dtype, limits,
+            self._pandas_hash(obj, pandas, numpy)
+        )
+
+    def _dataframe(self, obj, pandas, numpy):
+        """Summarize pandas DataFrame"""
+        dtypes = {}
+        for dtype in obj.dtypes:
+            dtypes[str(dtype)] = dtypes.get(str(dtype), 0) + 1
+        columns = list(obj.columns[:10])
+        if len(obj.columns) > 10:
+            columns.append(Ellipsis)
+        return "DataFrame(shape={}, columns={!r}, dtypes={!r}, sha1={})".format(
+            obj.shape, columns, dtypes,
+            self._pandas_hash(obj, pandas, numpy)
+        )
+
+    def serialize(self, obj):
+        """Serialize obj"""
+        # Do not import numpy and pandas if the script did not use them
+        numpy = sys.modules.get("numpy")
+        if numpy is None:
+            return self.fallback(obj)
+        if isinstance(obj, numpy.ndarray) and not obj.dtype.hasobject:
+            return self._ndarray(obj, numpy)
+        pandas = sys.modules.get("pandas")
+        if pandas is not None:
+            if isinstance(obj, pandas.DataFrame):
+                return self._dataframe(obj, pandas, numpy)
+            if isinstance(obj, pandas.Series):
+                return self._series(obj, pandas, numpy)
+        return self.fallback(obj)
+
+
 class SimpleSerializer(object):                                                  # pylint: disable=too-few-public-methods
     """Simple serializer. Get objects representations without repr"""
 
@@ -107,3 +206,104 @@ class SimpleSerializer(object):
         if typ == "array":
             return "{}({})".format(cls_name, result)
         return "{}([{}])".format(cls_name, result)
+
+
+# Types whose repr has at least one character per item
+BOUNDED_TYPES = {
+    str, bytes, list, tuple, dict, set, frozenset, deque, array
+}
+
+
+class DeferredValue(object):                                                     # pylint: disable=too-few-public-methods
+    """Immutable value that should be serialized at storage time"""
+    __slots__ = ("value", "serialize")
+
+    def __init__(self, value, serialize):
+        self.value = value
+        self.serialize = serialize
+
+    def __call__(self):
+        return self.serialize(self.value)
+
+    def __str__(self):
+        return self()
+
+
+def resolve_value(value):
+    """Serialize deferred values. Return other values as they are"""
+    if type(value) is DeferredValue:                                             # pylint: disable=unidiomatic-typecheck
+        return value()
+    return value
+
+
+class BudgetedSerializer(object):
+    """Serializer wrapper that limits the cost of value representations
+
+    size_limit truncates representations larger than it. Builtin
+    containers and strings with more items than size_limit use a bounded
+    repr instead of the complete one.
+    time_limit marks (type, size class) pairs as too expensive after a
+    serialization exceeds it. Later values of the same pair are not
+    serialized.
+    defer_immutable postpones the serialization of immutable values to
+    the storage time.
+    Zero disables the respective limit.
+    """
+
+    def __init__(self, serialize, size_limit=0, time_limit=0.0,
+                 defer_immutable=False):
+        self.serialize = serialize
+        self.size_limit = size_limit
+        self.time_limit = time_limit
+        self.defer_immutable = defer_immutable
+        self.expensive = {}  # (type, size class) -> serialization time
+        self.bounded = None
+        if size_limit and serialize is repr_serializer:
+            self.bounded = reprlib.Repr()
+            self.bounded.maxstring = self.bounded.maxlong = size_limit
+            self.bounded.maxother = size_limit
+            for attr in ("maxlist", "maxtuple", "maxdict", "maxset",
+                         "maxfrozenset", "maxdeque", "maxarray"):
+                setattr(self.bounded, attr, max(size_limit // 8, 1))
+
+    @staticmethod
+    def size_class(value):
+        """Return log2 of value length or None for unsized values"""
+        try:
+            return len(value).bit_length()
+        except Exception:                                                        # pylint: disable=broad-except
+            return None
+
+    def truncate(self, result):
+        """Truncate representation to size_limit"""
+        limit = self.size_limit
+        if not limit or not isinstance(result, str) or len(result) <= limit:
+            return result
+        return "{}...<truncated {} characters>".format(
+            result[:limit], len(result) - limit
+        )
+
+    def __call__(self, value):
+        if self.defer_immutable and isinstance(value, IMMUTABLE):
+            return DeferredValue(value, self.serialize_now)
+        return self.serialize_now(value)
+
+    def serialize_now(self, value):
+        """Serialize value respecting the budget"""
+        cls = type(value)
+        key = (cls, self.size_class(value))
+        if key in self.expensive:
+            return "<{} value too expensive to serialize>".format(
+                cls.__name__
+            )
+        if (self.bounded is not None and cls in BOUNDED_TYPES
+                and key[1] is not None and len(value) > self.size_limit):
+            return self.truncate(self.bounded.repr(value))
+        if not self.time_limit:
+            return self.truncate(self.serialize(value))
+        start = perf_counter()
+        result = self.serialize(value)
+        duration = perf_counter() - start
+        if duration > self.time_limit:
+            self.expensive[key] = duration
+        return self.truncate(result)
@@ -0,0 +1,386 @@
+# Copyright (c) 2016 Universidade Federal Fluminense (UFF)
+# Copyright (c) 2016 Polytechnic Institute of New York University.
+# This file is part of noWorkflow.
+# Please, consult the license terms in the LICENSE file.
+"""Read-only trial data for analysis. Load tables with SQLAlchemy Core"""
+from __future__ import (absolute_import, print_function,
+                        division, unicode_literals)
+
+from array import array
+from bisect import bisect_left
+from collections import OrderedDict
+
+from sqlalchemy import Boolean, Float, Integer
+
+from . import relational
+from .lightweight.columnar import IntColumn, FloatColumn, BoolColumn
+from .lightweight.columnar import CategoryColumn, ObjectColumn
+from .member_timeline import MemberTimelines
+
+
+CHUNK_SIZE = 100000  # Rows fetched from the database at once
+# Text columns with few distinct values
+CATEGORIES = {
+    "activation": {"name"},
+    "code_component": {"type", "mode"},
+    "dependency": {"type"},
+    "member": {"type"},
+}
+
+
+def create_column(table_name, column, strings):
+    """Create columnar storage for SQLAlchemy column"""
+    if isinstance(column.type, Boolean):
+        return BoolColumn()
+    if isinstance(column.type, Integer):
+        return IntColumn()
+    if isinstance(column.type, Float):
+        return FloatColumn()
+    if column.name in CATEGORIES.get(table_name, ()):
+        return CategoryColumn()
+    return ObjectColumn(strings)
+
+
+class Record(object):
+    """Read-only view of a row of a TrialTable
+
+    Records of the same table with the same id are equal
+    """
+    __slots__ = ("_table", "_row")
+
+    def __init__(self, table, row):
+        self._table = table
+        self._row = row
+
+    @property
+    def trial_id(self):
+        """Return trial id"""
+        return self._table.data.trial_id
+
+    @property
+    def id(self):                                                                # pylint: disable=invalid-name
+        """Return record id"""
+        return self._table.ids[self._row]
+
+    @property
+    def data(self):
+        """Return TrialData of record"""
+        return self._table.data
+
+    def __eq__(self, other):
+        return (
+            isinstance(other, Record) and
+            self._table.name == other._table.name and                           # pylint: disable=protected-access
+            self.id == other.id and self.trial_id == other.trial_id
+        )
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash((self._table.name, self.trial_id, self.id))
+
+    def __repr__(self):
+        return "{}({!r}, {})".format(self._table.name, self.trial_id, self.id)
+
+    def to_dict(self):
+        """Return record as dict"""
+        result = OrderedDict([("trial_id", self.trial_id), ("id", self.id)])
+        for name, column in self._table.columns.items():
+            result[name] = column[self._row]
+        return result
+
+
+def record_class(name, model, base=Record):
+    """Create Record subclass with properties for the columns of model"""
+    attrs = {"__slots__": ()}
+    for column in model.__columns__:
+        if column in ("trial_id", "id") or column in base.__dict__:
+            continue
+        attrs[column] = property(
+            lambda self, column=column: (
+                self._table.columns[column][self._row]                           # pylint: disable=protected-access
+            ),
+            doc="Return {} column".format(column)
+        )
+    return type(str(name), (base,), attrs)
+
+
+class EvaluationRecordBase(Record):
+    """Evaluation navigation"""
+    __slots__ = ()
+
+    @property
+    def code_component(self):
+        """Return CodeComponent record"""
+        return self.data.code_components.get(self.code_component_id)            # pylint: disable=no-member
+
+    @property
+    def activation(self):
+        """Return Activation record of the evaluation context"""
+        return self.data.activations.get(self.activation_id)                    # pylint: disable=no-member
+
+    @property
+    def this_activation(self):
+        """Return Activation record created by this evaluation"""
+        return self.data.activations.get(self.id)
+
+    @property
+    def member_container(self):
+        """Return Evaluation record of the original container"""
+        return self.data.evaluations.get(self.member_container_id)              # pylint: disable=no-member
+
+
+class ActivationRecordBase(Record):
+    """Activation navigation"""
+    __slots__ = ()
+
+    @property
+    def this_evaluation(self):
+        """Return Evaluation record of the activation"""
+        return self.data.evaluations.get(self.id)
+
+    @property
+    def caller_id(self):
+        """Return caller activation id"""
+        return self.this_evaluation.activation_id
+
+    @property
+    def line(self):
+        """Return activation line"""
+        return self.this_evaluation.code_component.first_char_line
+
+    @property
+    def finish_checkpoint(self):
+        """Return activation finish checkpoint"""
+        return self.this_evaluation.checkpoint
+
+    @property
+    def duration(self):
+        """Calculate activation duration in microseconds"""
+        return int(
+            (self.finish_checkpoint - self.start_checkpoint) * 1000000           # pylint: disable=no-member
+        )
+
+
+class DependencyRecordBase(Record):
+    """Dependency navigation"""
+    __slots__ = ()
+
+    @property
+    def dependent(self):
+        """Return dependent Evaluation record"""
+        return self.data.evaluations.get(self.dependent_id)                     # pylint: disable=no-member
+
+    @property
+    def dependency(self):
+        """Return dependency Evaluation record"""
+        return self.data.evaluations.get(self.dependency_id)                    # pylint: disable=no-member
+
+
+class MemberRecordBase(Record):
+    """Member navigation"""
+    __slots__ = ()
+
+    @property
+    def collection(self):
+        """Return collection Evaluation record"""
+        return self.data.evaluations.get(self.collection_id)                    # pylint: disable=no-member
+
+    @property
+    def member(self):
+        """Return member Evaluation record"""
+        return self.data.evaluations.get(self.member_id)                        # pylint: disable=no-member
+
+
+class TrialTable(object):
+    """Columns of a table restricted to a single trial
+
+    Rows are sorted by id. Iteration follows order_by, when it is set
+    """
+
+    def __init__(self, data, model, record_cls, order_by=None):
+        self.data = data
+        self.model = model
+        self.name = model.__table__.name
+        self.record_cls = record_cls
+        self.order_by = order_by
+        self.order = None
+        self.ids = array(str("q"))
+        self.columns = OrderedDict(
+            (column.name, create_column(self.name, column, data.strings))
+            for column in model.__table__.columns
+            if column.name not in ("trial_id", "id")
+        )
+
+    def load(self, conn):
+        """Load trial rows from connection
+
+        Use the DBAPI cursor to avoid creating a Row object for each row
+        """
+        quote = conn.dialect.identifier_preparer.quote
+        sql = "SELECT {} FROM {} WHERE trial_id = ? ORDER BY id".format(
+            ", ".join(quote(name) for name in ["id"] + list(self.columns)),
+            quote(self.name)
+        )
+        columns = list(self.columns.values())
+        cursor = conn.connection.cursor()
+        try:
+            cursor.execute(sql, (self.data.trial_id,))
+            while True:
+                chunk = cursor.fetchmany(CHUNK_SIZE)
+                if not chunk:
+                    break
+                values = list(zip(*chunk))
+                self.ids.extend(values[0])
+                for column, column_values in zip(columns, values[1:]):
+                    if isinstance(column, BoolColumn):
+                        column_values = [
+                            None if value is None else bool(value)
+                            for value in column_values
+                        ]
+                    column.extend(column_values)
+        finally:
+            cursor.close()
+        if self.order_by is not None:
+            column = self.columns[self.order_by]
+            self.order = array(str("q"), sorted(
+                range(len(self.ids)), key=lambda row: (column[row], row)
+            ))
+        return self
+
+    def row(self, id_):
+        """Return row of id or None"""
+        ids = self.ids
+        row = bisect_left(ids, id_)
+        if row < len(ids) and ids[row] == id_:
+            return row
+        return None
+
+    def get(self, id_, default=None):
+        """Return record of id or default"""
+        if id_ is None:
+            return default
+        row = self.row(id_)
+        if row is None:
+            return default
+        return self.record_cls(self, row)
+
+    def __getitem__(self, id_):
+        result = self.get(id_)
+        if result is None:
+            raise KeyError(id_)
+        return result
+
+    def __contains__(self, id_):
+        return self.row(id_) is not None
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __iter__(self):
+        record_cls = self.record_cls
+        rows = range(len(self.ids)) if self.order is None else self.order
+        for row in rows:
+            yield record_cls(self, row)
+
+    def values(self, name):
+        """Return column values in id order"""
+        if name == "id":
+            return list(self.ids)
+        return self.columns[name].values()
+
+
+class TrialData(object):
+    """Read-only columnar data of a trial
+
+    Use it instead of a Trial in analysis that walk every evaluation,
+    dependency or member of a trial. Tables are loaded on first access
+    with SQLAlchemy Core into arrays, and records are created on demand.
+    Records provide the columns and the navigation used by analysis
+    """
+
+    def __init__(self, trial, engine=None):
+        self.trial_id = getattr(trial, "id", trial)
+        self.engine = engine
+        self.strings = {}
+        self.tables = {}
+        self._timelines = None
+
+    def table(self, name):
+        """Return TrialTable by name. Load it if necessary"""
+        table = self.tables.get(name)
+        if table is None:
+            model, record_cls, order_by = TABLES[name]
+            table = TrialTable(self, model, record_cls, order_by)
+            engine = self.engine or relational.engine
+            conn = engine.connect()
+            try:
+                self.tables[name] = table.load(conn)
+            finally:
+                conn.close()
+        return table
+
+    def load(self, *names):
+        """Load tables eagerly. Load all tables if names is empty"""
+        for name in names or TABLES:
+            self.table(name)
+        return self
+
+    @property
+    def activations(self):
+        """Return activations ordered by start_checkpoint"""
+        return self.table("activations")
+
+    @property
+    def evaluations(self):
+        """Return evaluations"""
+        return self.table("evaluations")
+
+    @property
+    def dependencies(self):
+        """Return dependencies"""
+        return self.table("dependencies")
+
+    @property
+    def members(self):
+        """Return members"""
+        return self.table("members")
+
+    @property
+    def code_components(self):
+        """Return code components"""
+        return self.table("code_components")
+
+    @property
+    def timelines(self):
+        """Return MemberTimelines of members"""
+        if self._timelines is None:
+            self._timelines = MemberTimelines(self.members)
+        return self._timelines
+
+
+def _create_tables():
+    """Create record classes. Return table name -> (model, class, order)"""
+    from .models import Activation, CodeComponent, Dependency
+    from .models import Evaluation, Member
+    return OrderedDict([
+        ("activations", (Activation, record_class(
+            "ActivationRecord", Activation, ActivationRecordBase
+        ), "start_checkpoint")),
+        ("evaluations", (Evaluation, record_class(
+            "EvaluationRecord", Evaluation, EvaluationRecordBase
+        ), None)),
+        ("dependencies", (Dependency, record_class(
+            "DependencyRecord", Dependency, DependencyRecordBase
+        ), None)),
+        ("members", (Member, record_class(
+            "MemberRecord", Member, MemberRecordBase
+        ), None)),
+        ("code_components", (CodeComponent, record_class(
+            "CodeComponentRecord", CodeComponent
+        ), None)),
+    ])
+
+
+TABLES = _create_tables()
@@ -0,0 +1,143 @@
+# Copyright (c) 2016 Universidade Federal Fluminense (UFF)
+# Copyright (c) 2016 Polytechnic Institute of New York University.
+# This file is part of noWorkflow.
+# Please, consult the license terms in the LICENSE file.
+"""Background writer for partial provenance storage"""
+from __future__ import (absolute_import, print_function,
+                        division, unicode_literals)
+
+import threading
+import traceback
+
+from . import relational
+from ..utils.io import print_msg
+
+
+class BackgroundWriter(object):
+    """Store batches of complete lightweight objects in a dedicated thread
+
+    The collector only pays for enqueueing. The writer thread owns its own
+    database connection and flushes pending batches in a single transaction
+    when they reach batch_size objects or after interval seconds.
+    Enqueueing blocks while there are more than max_pending objects waiting
+    to be stored (backpressure). The limit counts objects instead of bytes:
+    lightweight objects have similar sizes, and measuring them would cost
+    more than storing them. max_pending = 0 disables the limit
+    """
+
+    def __init__(self, max_pending=100000, batch_size=10000, interval=1.0,
+                 engine=None):
+        self.max_pending = max_pending
+        self.batch_size = batch_size
+        self.interval = interval
+        self.engine = engine
+
+        self.condition = threading.Condition()
+        self.batches = []  # list of (model, objects)
+        self.pending = 0  # number of enqueued objects that were not stored
+        self.stored = 0  # number of stored objects
+        self.closing = False
+        self.error = None
+        self.thread = None
+
+    @property
+    def threshold(self):
+        """Number of pending objects that wakes the writer thread"""
+        if self.max_pending:
+            return min(self.batch_size, self.max_pending)
+        return self.batch_size
+
+    @property
+    def full(self):
+        """Check if enqueueing should wait for the writer thread"""
+        return bool(self.max_pending) and self.pending >= self.max_pending
+
+    @property
+    def alive(self):
+        """Check if the writer thread is running"""
+        return self.thread is not None and self.error is None
+
+    def start(self):
+        """Start writer thread"""
+        self.thread = threading.Thread(
+            target=self._run, name="noworkflow-writer"
+        )
+        self.thread.daemon = True
+        self.thread.start()
+        return self
+
+    def put(self, model, objects):
+        """Enqueue objects of model to be stored
+        Return False if the writer thread is not running.
+        In this case, close stores the objects in the calling thread
+        """
+        if not objects:
+            return self.alive
+        with self.condition:
+            while self.full and self.alive:
+                self.condition.wait()
+            self.batches.append((model, objects))
+            self.pending += len(objects)
+            if self.pending >= self.threshold:
+                self.condition.notify_all()
+        return self.alive
+
+    def close(self):
+        """Store remaining batches and stop writer thread"""
+        if self.thread is not None:
+            with self.condition:
+                self.closing = True
+                self.condition.notify_all()
+            self.thread.join()
+            self.thread = None
+        if self.batches:
+            # Writer thread failed. Store remaining batches in this thread
+            conn = (self.engine or relational.engine).connect()
+            try:
+                self.stored += self._write(conn, self.batches)
+            finally:
+                conn.close()
+            self.batches = []
+            self.pending = 0
+
+    def _run(self):
+        """Writer thread loop"""
+        engine = self.engine or relational.engine
+        conn = engine.connect()
+        batches = []
+        try:
+            while True:
+                with self.condition:
+                    while not self.closing and self.pending < self.threshold:
+                        if not self.condition.wait(self.interval):
+                            break
+                    batches, self.batches = self.batches, []
+                    closing = self.closing
+                count = self._write(conn, batches)
+                batches = []
+                with self.condition:
+                    self.pending -= count
+                    self.stored += count
+                    self.condition.notify_all()
+                if closing:
+                    break
+        except Exception as exc:  # pylint: disable=broad-except
+            print_msg("background storage failed: {}".format(exc), True)
+            traceback.print_exc()
+            with self.condition:
+                self.error = exc
+                self.batches = batches + self.batches
+                self.condition.notify_all()
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _write(conn, batches):
+        """Store batches in a single transaction. Return number of objects"""
+        if not batches:
+            return 0
+        count = 0
+        with conn.begin():
+            for model, objects in batches:
+                count += relational.insert_many(conn, model.__table__, objects)
+        return count
@@ -6,7 +6,7 @@
 from __future__ import annotations
 
 from noworkflow.now.models.dependency_querier.querier_options import QuerierOptions
-from noworkflow.now.models.dependency_querier import DependencyQuerier
+from noworkflow.now.models.dependency_querier import DependencyQuerier, slice_cache
 from noworkflow.now.persistence.lightweight.stage_tags import StageTags
 from noworkflow.now.persistence.models.base import proxy_gen
 from noworkflow.now.persistence.models import Evaluation, CodeComponent
@@ -251,7 +251,7 @@ def backward_deps(
     )
 
     nbOptions = NotebookQuerierOptions(level=glanularity_level)
-    querier = DependencyQuerier(options=nbOptions)
+    querier = DependencyQuerier(options=nbOptions, cache=slice_cache)
     _, _, _ = querier.navigate_dependencies([evals[-1]])
 
     return nbOptions.back_deps()
@@ -305,7 +305,7 @@ def global_backward_deps(
     )
 
     nbOptions = NotebookQuerierOptions(level=glanularity_level)
-    querier = DependencyQuerier(options=nbOptions)
+    querier = DependencyQuerier(options=nbOptions, cache=slice_cache)
     _, _, _ = querier.navigate_dependencies(evals)
 
     return nbOptions.global_back_deps()
@@ -7,11 +7,11 @@ from __future__ import (absolute_import, print_function,
                         division, unicode_literals)
 
 import inspect
+import io
 import os
 
 from os.path import join, dirname, exists
 from textwrap import dedent
-from pkg_resources import resource_string, resource_listdir, resource_isdir
 from subprocess import Popen, PIPE
 
 
@@ -19,6 +19,9 @@ MODULE = __name__
 MODULE = MODULE[:MODULE.rfind(".")]
 MODULE = MODULE[:MODULE.rfind(".")]
 NOWORKFLOW_DIR = dirname(dirname(dirname(__file__)))
+# The collector replaces open during trials. Keep the original one to
+# avoid recording noWorkflow resources as file accesses
+std_open = io.open
 
 
 def recgetattr(obj, attrs, default=None):
@@ -47,6 +50,7 @@ def wrap(string, initial="  ", other="\n  "):
 
 def resource(filename, encoding=None):
     """Access resource content via setuptools"""
+    from pkg_resources import resource_string
     content = resource_string(MODULE, filename)
     if encoding:
         return content.decode(encoding=encoding)
@@ -55,16 +59,23 @@ def resource(filename, encoding=None):
 
 def resource_ls(path):
     """Access resource directory via setuptools"""
+    from pkg_resources import resource_listdir
     return resource_listdir(MODULE, path)
 
 
 def resource_is_dir(path):
     """Access resource directory via setuptools"""
+    from pkg_resources import resource_isdir
     return resource_isdir(MODULE, path)
 
 
 def version():
     """Return noWorkflow version"""
+    # Avoid importing setuptools when the package is installed as files
+    path = join(NOWORKFLOW_DIR, "resources", "version.txt")
+    if exists(path):
+        with std_open(path, "rb") as version_file:
+            return version_file.read().decode("utf-8").strip()
     return resource("../resources/version.txt", encoding="utf-8").strip()
 
 
@@ -50,8 +50,14 @@ class MetaProfiler(object):
             return wrapper
         return dec
 
+    def count(self, typ, value=1):
+        """Add value to the counter typ"""
+        if typ not in self.order:
+            self.order.append(typ)
+        self.data[typ] += value
+
     def save(self):
-        """Save durations"""
+        """Save durations and counters"""
         if self.active:
             row = [self.data[name] for name in self.order]
             rows = []
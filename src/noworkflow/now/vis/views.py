@@ -20,6 +20,7 @@ from ..models.diff import Diff
 from ..models.ast.trial_ast import TrialAst
 from ..models.prospective.generate import generate_prospective_prov
 from ..persistence import relational, content
+from ..persistence.trial_data import TrialData
 from ..cmd.cmd_diff import Diff as DiffCMD
 from ..ipython.dotmagic import DotDisplay
 
@@ -317,6 +318,7 @@ def trials(expId=None):
 def dataflow(tid):
     """Generates the dafalow of a trial """ 
     trial = Trial(tid)
+    trial.trial_data = TrialData(trial)
     display = DotDisplay(trial.dot.export_text(), format="pdf")
     return send_file(
         io.BytesIO(display.display_result()["application/pdf"]),
@@ -355,6 +357,7 @@ def trial_graph(tid, graph_mode, cache,expCode=None):
     """Respond trial graph as JSON"""
     trial = Trial(tid)
     graph = trial.graph
+    graph.data = TrialData(trial)
     graph.use_cache &= bool(int(cache))
     _, tgraph, _ = getattr(graph, graph_mode)()
     return jsonify(**tgraph)
@@ -23,12 +23,19 @@ persistence_config.mock()
 from .prov_definition import TestCodeBlockDefinition
 from .prov_definition import TestCodeComponentDefinition
 from .prov_definition import TestReconstruction
+from .prov_definition import TestCodeCacheDefinition
 from .prov_execution import TestScript, TestStmtExecution, TestExprExecution
 from .prov_execution import TestClassExecution, TestDepthExecution
+from .prov_execution import TestStorageExecution
+from .persistence import TestFileHashCache, TestRelationalDatabase
+from .persistence import TestContentEngines
 from .dependency import TestClusterizer, TestClusterizerConfig
 from .dependency import TestProspectiveClusterizer
 from .dependency import TestActivationClusterizer, TestDependencyClusterizer
+from .dependency import TestTrialData, TestGraphIndex, TestSliceCache
 from .cross_version_test import TestCrossVersion
+from .history_graph_test import TestHistoryGraph
+from .startup_test import TestStartup
 
 from ..now.persistence.models import ORDER
 from ..now.utils import formatter
@@ -56,6 +63,7 @@ definition = unittest.TestSuite()
 definition.addTests(loader.loadTestsFromTestCase(TestCodeBlockDefinition))
 definition.addTests(loader.loadTestsFromTestCase(TestCodeComponentDefinition))
 definition.addTests(loader.loadTestsFromTestCase(TestReconstruction))
+definition.addTests(loader.loadTestsFromTestCase(TestCodeCacheDefinition))
 
 execution = unittest.TestSuite()
 execution.addTests(loader.loadTestsFromTestCase(TestScript))
@@ -63,6 +71,12 @@ execution.addTests(loader.loadTestsFromTestCase(TestStmtExecution))
 execution.addTests(loader.loadTestsFromTestCase(TestExprExecution))
 execution.addTests(loader.loadTestsFromTestCase(TestDepthExecution))
 execution.addTests(loader.loadTestsFromTestCase(TestClassExecution))
+execution.addTests(loader.loadTestsFromTestCase(TestStorageExecution))
+
+persistence = unittest.TestSuite()
+persistence.addTests(loader.loadTestsFromTestCase(TestFileHashCache))
+persistence.addTests(loader.loadTestsFromTestCase(TestRelationalDatabase))
+persistence.addTests(loader.loadTestsFromTestCase(TestContentEngines))
 
 collection = unittest.TestSuite()
 collection.addTests(definition)
@@ -74,6 +88,9 @@ dataflow.addTests(loader.loadTestsFromTestCase(TestDependencyClusterizer))
 dataflow.addTests(loader.loadTestsFromTestCase(TestActivationClusterizer))
 dataflow.addTests(loader.loadTestsFromTestCase(TestProspectiveClusterizer))
 dataflow.addTests(loader.loadTestsFromTestCase(TestClusterizerConfig))
+dataflow.addTests(loader.loadTestsFromTestCase(TestTrialData))
+dataflow.addTests(loader.loadTestsFromTestCase(TestGraphIndex))
+dataflow.addTests(loader.loadTestsFromTestCase(TestSliceCache))
 
 
 def load_tests(loader, tests, pattern):
@@ -82,6 +99,9 @@ def load_tests(loader, tests, pattern):
     suite = unittest.TestSuite()
     suite.addTests(doctests)
     suite.addTests(collection)
+    suite.addTests(persistence)
     suite.addTests(dataflow)
     suite.addTests(loader.loadTestsFromTestCase(TestCrossVersion))
+    suite.addTests(loader.loadTestsFromTestCase(TestHistoryGraph))
+    suite.addTests(loader.loadTestsFromTestCase(TestStartup))
     return suite
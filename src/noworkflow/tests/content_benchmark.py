@@ -0,0 +1,64 @@
+# Copyright (c) 2016 Universidade Federal Fluminense (UFF)
+# Copyright (c) 2016 Polytechnic Institute of New York University.
+# This file is part of noWorkflow.
+# Please, consult the license terms in the LICENSE file.
+"""Benchmark the handoff of contents to distributed and pool engines
+
+Compare pickling payloads through the task queue (previous transport)
+with sending shared memory handles:
+    python src/noworkflow/tests/content_benchmark.py [MiB] [blob MiB]
+"""
+from __future__ import (absolute_import, print_function,
+                        division, unicode_literals)
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+
+def run(engine_cls, blobs, threshold):
+    """Store blobs with engine. Return MiB/second"""
+    from noworkflow.now.persistence.config import PersistenceConfig
+    from noworkflow.now.persistence.content import parallel
+    directory = tempfile.mkdtemp()
+    original_threshold = parallel.SHARED_PAYLOAD_THRESHOLD
+    try:
+        parallel.SHARED_PAYLOAD_THRESHOLD = threshold
+        config = PersistenceConfig()
+        config.path = directory
+        engine = engine_cls(config)
+        engine.connect(config)
+        start = time.time()
+        for blob in blobs:
+            engine.put(blob, "blob")
+        engine.close()
+        duration = time.time() - start
+        return sum(len(blob) for blob in blobs) / duration / (1 << 20)
+    finally:
+        parallel.SHARED_PAYLOAD_THRESHOLD = original_threshold
+        shutil.rmtree(directory)
+
+
+def main():
+    """Print MiB/second of each engine and transport"""
+    from noworkflow.now.persistence.content import parallel
+    from noworkflow.now.persistence.content.plain_engine import (
+        DistributedPlainEngine, PoolPlainEngine
+    )
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 1024
+    size = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+    blobs = [os.urandom(size << 20) for _ in range(total // size)]
+    for engine_cls in (DistributedPlainEngine, PoolPlainEngine):
+        for transport, threshold in [
+                ("pickled", float("inf")),
+                ("shared", parallel.SHARED_PAYLOAD_THRESHOLD)]:
+            print("{}, {} payloads: {:.0f} MiB/s".format(
+                engine_cls.__name__, transport,
+                run(engine_cls, blobs, threshold)
+            ))
+
+
+if __name__ == "__main__":
+    main()
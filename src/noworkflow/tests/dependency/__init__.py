@@ -12,6 +12,9 @@ from .test_dependency_clusterizer import TestDependencyClusterizer
 from .test_activation_clusterizer import TestActivationClusterizer
 from .test_prospective_clusterizer import TestProspectiveClusterizer
 from .test_clusterizer_config import TestClusterizerConfig
+from .test_trial_data import TestTrialData
+from .test_graph_index import TestGraphIndex
+from .test_slice_cache import TestSliceCache
 
 __all__ = [
     "TestClusterizer",
@@ -19,4 +22,7 @@ __all__ = [
     "TestActivationClusterizer",
     "TestProspectiveClusterizer",
     "TestClusterizerConfig",
+    "TestTrialData",
+    "TestGraphIndex",
+    "TestSliceCache",
 ]
@@ -0,0 +1,125 @@
+# Copyright (c) 2017 Universidade Federal Fluminense (UFF)
+# Copyright (c) 2017 Polytechnic Institute of New York University.
+# This file is part of noWorkflow.
+# Please, consult the license terms in the LICENSE file.
+"""Test compiled graph index queries"""
+from __future__ import (absolute_import, print_function,
+                        division, unicode_literals)
+
+import marshal
+
+from ...now.persistence.trial_data import TrialData
+from ...now.models.dependency_querier import DependencyQuerier
+from ...now.models.dependency_querier import PreloadedQuerierOptions
+from ...now.models.dependency_querier import GraphIndex, IndexedQuerier
+from ...now.models.dependency_querier import ReachabilityIndex
+
+from ..collection_testcase import CollectionTestCase
+from ..helpers.slicing import contexts, load_script
+
+
+class TestGraphIndex(CollectionTestCase):
+    """Test GraphIndex and IndexedQuerier"""
+    # pylint: disable=missing-docstring
+
+    def load(self):
+        trial, last = load_script(self)
+        data = TrialData(trial)
+        return trial, last, data, GraphIndex.build(data)
+
+    def test_navigate_dependencies_matches_querier(self):
+        trial, last, data, index = self.load()
+        for flags in [{}, {"visit_activations": True},
+                      {"visit_arguments": False}, {"visit_members": False}]:
+            options = PreloadedQuerierOptions(trial, data=data, **flags)
+            _, expected, _ = DependencyQuerier(options).navigate_dependencies(
+                [last]
+            )
+            querier = IndexedQuerier(index, options)
+            _, result, _ = querier.navigate_dependencies([last])
+            self.assertEqual(contexts(expected), contexts(result))
+        self.assertGreater(len(result), 1)
+
+    def test_navigate_dependencies_with_evaluation_objects(self):
+        trial, last, _, index = self.load()
+        evaluations = {evaluation.id: evaluation for evaluation in trial.evaluations}
+        querier = IndexedQuerier(index, evaluations=evaluations)
+        _, result, _ = querier.navigate_dependencies([last])
+        self.assertGreater(len(result), 1)
+        for context in result:
+            self.assertIs(context.evaluation, evaluations[context.evaluation.id])
+
+    def test_stop_on_and_max_depth(self):
+        trial, last, _, index = self.load()
+        querier = IndexedQuerier(index)
+        full = querier.backward_slice([last.id])
+        first = min(full)
+        visited, found = querier.search([last.id], stop_on={first})
+        self.assertEqual(found, {first})
+        self.assertEqual(querier.backward_slice([last.id], max_depth=0),
+                         {last.id})
+        one_step = querier.backward_slice([last.id], max_depth=1)
+        self.assertTrue(one_step >= {last.id} | {
+            dependency.dependency_id
+            for dependency in last.dependencies_as_dependent
+        })
+        self.assertTrue(one_step < full)
+        self.assertTrue(all(steps <= 1 for steps, _ in querier.search(
+            [last.id], max_depth=1
+        )[0].values()))
+        self.assertTrue({index.ids[node[0]] for node in visited} <= full)
+
+    def test_forward_slice(self):
+        trial, last, _, index = self.load()
+        querier = IndexedQuerier(index)
+        literal = next(
+            evaluation for evaluation in trial.evaluations
+            if evaluation.code_component.name == "3"
+        )
+        forward = querier.forward_slice([literal.id])
+        self.assertIn(literal.id, forward)
+        for evaluation_id in forward:
+            self.assertIn(literal.id, querier.backward_slice([evaluation_id]))
+        self.assertIn(last.id, querier.forward_slice(
+            [min(querier.backward_slice([last.id]))]
+        ))
+
+    def test_entry_roundtrip(self):
+        _, last, _, index = self.load()
+        entry = marshal.loads(marshal.dumps(index.to_entry()))
+        loaded = GraphIndex.from_entry(entry)
+        self.assertEqual(
+            IndexedQuerier(index).backward_slice([last.id]),
+            IndexedQuerier(loaded).backward_slice([last.id])
+        )
+
+    def test_reachability_matches_stop_on(self):
+        trial, _, data, index = self.load()
+        options = PreloadedQuerierOptions(trial, data=data)
+        reachability = ReachabilityIndex.build(index)
+        searches = ReachabilityIndex.build(index, limit=0)
+        self.assertIsNone(searches.rows)
+        evaluations = list(data.evaluations)
+        for evaluation in evaluations:
+            _, _, found = DependencyQuerier(options).navigate_dependencies(
+                [evaluation], stop_on=evaluations
+            )
+            expected = {other.id for other in found}
+            self.assertEqual(expected, reachability.ancestors(evaluation.id))
+            self.assertEqual(expected, searches.ancestors(evaluation.id))
+            for other in evaluations:
+                self.assertEqual(
+                    other.id in expected,
+                    reachability.derives_from(evaluation.id, other.id)
+                )
+
+    def test_was_derived_from_uses_reachability(self):
+        trial, last, _, _ = self.load()
+        evaluations = list(trial.evaluations)
+        derived = last.was_derived_from(evaluations, distinguish=True)
+        querier = IndexedQuerier(GraphIndex.build(TrialData(trial)))
+        expected = querier.backward_slice([last.id]) - {last.id}
+        self.assertEqual(
+            {evaluation.id for evaluation, value in derived.items() if value},
+            expected
+        )
@@ -0,0 +1,127 @@
+# Copyright (c) 2017 Universidade Federal Fluminense (UFF)
+# Copyright (c) 2017 Polytechnic Institute of New York University.
+# This file is part of noWorkflow.
+# Please, consult the license terms in the LICENSE file.
+"""Test memoized dependency navigation"""
+from __future__ import (absolute_import, print_function,
+                        division, unicode_literals)
+
+import marshal
+import sys
+
+from ...now.persistence.trial_data import TrialData
+from ...now.models.dependency_querier import DependencyQuerier
+from ...now.models.dependency_querier import PreloadedQuerierOptions
+from ...now.models.dependency_querier import QuerierOptions, SliceCache
+
+from ..collection_testcase import CollectionTestCase
+from ..helpers.slicing import contexts, load_script
+
+
+class ArrowOptions(QuerierOptions):
+    """Collect visited arrows"""
+
+    def __init__(self, *args, **kwargs):
+        super(ArrowOptions, self).__init__(*args, **kwargs)
+        self.arrows = []
+
+    def visit_arrow(self, from_, to_):
+        self.arrows.append((from_.evaluation.id, to_.evaluation.id, to_.arrow))
+
+    def reset_arrows(self):
+        self.arrows = []
+
+
+class TestSliceCache(CollectionTestCase):
+    """Test SliceCache with DependencyQuerier"""
+    # pylint: disable=missing-docstring
+
+    def test_hit_replays_navigation(self):
+        trial, last = load_script(self)
+        cache = SliceCache()
+        options = ArrowOptions()
+        querier = DependencyQuerier(options, cache=cache)
+        pending, expected, found = querier.navigate_dependencies([last])
+        arrows = options.arrows
+        pending2, result, found2 = querier.navigate_dependencies([last])
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+        self.assertEqual(
+            contexts(expected, arrow=True), contexts(result, arrow=True)
+        )
+        self.assertEqual(
+            contexts(pending, arrow=True), contexts(pending2, arrow=True)
+        )
+        self.assertEqual(found, found2)
+        self.assertEqual(arrows, options.arrows)
+        self.assertGreater(len(arrows), 1)
+        for entry in cache.entries(trial.id).values():
+            self.assertEqual(marshal.loads(marshal.dumps(entry)), entry)
+
+    def test_stop_on_and_options(self):
+        trial, last = load_script(self)
+        cache = SliceCache()
+        data = TrialData(trial)
+        options = PreloadedQuerierOptions(trial, data=data)
+        _, visited, _ = DependencyQuerier(options).navigate_dependencies([last])
+        first = min(
+            (context.evaluation for context in visited
+             if context.evaluation != last),
+            key=lambda evaluation: evaluation.id
+        )
+        querier = DependencyQuerier(options, cache=cache)
+        expected = querier.navigate_dependencies([last], stop_on={first})
+        result = querier.navigate_dependencies([last], stop_on={first})
+        self.assertEqual(result[2], {first})
+        self.assertEqual(
+            contexts(expected[1], arrow=True), contexts(result[1], arrow=True)
+        )
+        DependencyQuerier(
+            PreloadedQuerierOptions(trial, data=data, visit_members=False),
+            cache=cache
+        ).navigate_dependencies([last])
+        self.assertEqual((cache.hits, cache.misses), (1, 2))
+
+    def test_new_version_drops_entries(self):
+        trial, last = load_script(self)
+        cache = SliceCache()
+        querier = DependencyQuerier(cache=cache)
+        querier.navigate_dependencies([last])
+        version, entries = cache.trials[trial.id]
+        self.assertEqual(len(entries), 1)
+        cache.trials[trial.id] = ("old", entries)
+        querier.navigate_dependencies([last])
+        self.assertEqual((cache.hits, cache.misses), (0, 2))
+        self.assertEqual(cache.trials[trial.id][0], version)
+        self.assertEqual(cache.stats()["entries"], 1)
+
+    def test_finished_trial_saves_on_flush(self):
+        from ...now.persistence import analysis_cache
+        module = sys.modules[SliceCache.__module__]
+        trial, last = load_script(self)
+        self.assertEqual(trial.status, "finished")
+        saved = []
+        versions = []
+        original_save = analysis_cache.save
+        original_version = module.trial_version
+        def save(kind, trial_id, fmt, entry):
+            saved.append((kind, trial_id, len(entry["entries"])))
+        def trial_version(trial):
+            versions.append(trial)
+            return original_version(trial)
+        analysis_cache.save = save
+        module.trial_version = trial_version
+        try:
+            cache = SliceCache()
+            querier = DependencyQuerier(cache=cache)
+            querier.navigate_dependencies([last])
+            querier.navigate_dependencies([last], stop_on={last})
+            querier.navigate_dependencies([last])
+            self.assertEqual(saved, [])
+            self.assertEqual(len(versions), 1)
+            cache.flush()
+            self.assertEqual(saved, [("slices", trial.id, 2)])
+            cache.flush()
+            self.assertEqual(len(saved), 1)
+        finally:
+            analysis_cache.save = original_save
+            module.trial_version = original_version
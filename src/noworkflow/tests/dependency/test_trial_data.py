@@ -0,0 +1,161 @@
+# Copyright (c) 2017 Universidade Federal Fluminense (UFF)
+# Copyright (c) 2017 Polytechnic Institute of New York University.
+# This file is part of noWorkflow.
+# Please, consult the license terms in the LICENSE file.
+"""Test read-only trial data as analysis data source"""
+from __future__ import (absolute_import, print_function,
+                        division, unicode_literals)
+
+from ...now.persistence.models import Trial
+from ...now.persistence.trial_data import TrialData
+from ...now.persistence.member_timeline import MemberTimeline
+from ...now.models.dependency_graph.synonymers import Synonymer
+from ...now.models.dependency_graph.clusterizer import Clusterizer
+from ...now.models.dependency_querier import DependencyQuerier
+from ...now.models.dependency_querier import PreloadedQuerierOptions
+from ...now.models.graphs.trial_graph import LineNameSummarization
+from ...now.models.prov.export import export_prov
+
+from ..collection_testcase import CollectionTestCase
+
+
+SCRIPT = (
+    "# script.py\n"
+    "def f(x):\n"
+    "    return x * 2\n"
+    "a = [1, f(2)]\n"
+    "a[0] = f(a[1])\n"
+    "b = {'k': a}\n"
+    "c = b['k'][0]\n"
+)
+
+
+def dependency_ids(clusterizer):
+    """Return clusterizer dependencies as node ids"""
+    return {
+        (source.node_id, target.node_id): attrs
+        for (source, target), attrs in clusterizer.dependencies.items()
+    }
+
+
+class TestTrialData(CollectionTestCase):
+    """Test TrialData records and analysis modules that accept it"""
+    # pylint: disable=missing-docstring
+
+    def load(self):
+        self.script(SCRIPT)
+        self.clean_execution()
+        trial = Trial()
+        return trial, TrialData(trial)
+
+    def test_records_match_models(self):
+        trial, data = self.load()
+        for name in ("evaluations", "dependencies", "members",
+                     "code_components"):
+            expected = sorted(
+                (obj.to_dict() for obj in getattr(trial, name)),
+                key=lambda obj: obj["id"]
+            )
+            result = [dict(record.to_dict()) for record in getattr(data, name)]
+            self.assertEqual([dict(obj) for obj in expected], result)
+
+    def test_activation_records(self):
+        trial, data = self.load()
+        expected = [
+            (act.id, act.name, act.caller_id, act.line, act.duration)
+            for act in trial.activations
+        ]
+        result = [
+            (act.id, act.name, act.caller_id, act.line, act.duration)
+            for act in data.activations
+        ]
+        self.assertEqual(expected, result)
+
+    def test_record_navigation(self):
+        trial, data = self.load()
+        for dependency in trial.dependencies:
+            record = data.dependencies[dependency.id]
+            self.assertEqual(record.dependent.id, dependency.dependent.id)
+            self.assertEqual(
+                record.dependency.code_component.name,
+                dependency.dependency.code_component.name
+            )
+        self.assertIsNone(data.evaluations.get(-1))
+        self.assertEqual(
+            data.evaluations[1], data.dependencies.data.evaluations[1]
+        )
+
+    def test_clusterizer_with_trial_data(self):
+        trial, data = self.load()
+        expected = Clusterizer(trial, synonymer=Synonymer()).run()
+        result = Clusterizer(trial, synonymer=Synonymer(), data=data).run()
+        self.assertEqual(dependency_ids(expected), dependency_ids(result))
+
+    def test_trial_analyses_with_trial_data(self):
+        trial, data = self.load()
+        trial.dependency_config.mode = "coarseGrain"
+        expected = dependency_ids(trial.dependency_clusterizer.run())
+        trial.graph.use_cache = False
+        expected_graph = trial.graph.namespace_match()
+        other = Trial(trial.id)
+        other.trial_data = data
+        other.dependency_config.mode = "coarseGrain"
+        other.graph.data = data
+        other.graph.use_cache = False
+        clusterizer = other.dependency_clusterizer
+        self.assertIs(clusterizer.data, data)
+        self.assertEqual(expected, dependency_ids(clusterizer.run()))
+        self.assertEqual(expected_graph, other.graph.namespace_match())
+
+    def test_querier_with_trial_data(self):
+        trial, data = self.load()
+        last = max(trial.evaluations, key=lambda evaluation: evaluation.id)
+        visited = {}
+        for source in (None, data):
+            options = PreloadedQuerierOptions(trial, data=source)
+            _, contexts, _ = DependencyQuerier(options).navigate_dependencies(
+                [last]
+            )
+            visited[source] = {
+                (context.evaluation.id, context.checkpoint, context.arrow)
+                for context in contexts
+            }
+        self.assertEqual(visited[None], visited[data])
+        self.assertGreater(len(visited[data]), 1)
+
+    def test_summarization_with_trial_data(self):
+        trial, data = self.load()
+        expected = LineNameSummarization(trial.activations)
+        result = LineNameSummarization(data.activations)
+        self.assertEqual(expected.graph({}), result.graph({}))
+
+    def test_export_prov_with_trial_data(self):
+        trial, data = self.load()
+        self.assertEqual(
+            str(export_prov(trial)), str(export_prov(trial, data=data))
+        )
+
+    def test_member_timeline_state(self):
+        timeline = MemberTimeline()
+        timeline.add("[0]", 3.0, "c")
+        timeline.add("[0]", 1.0, "a")
+        timeline.add("[1]", 2.0, "b")
+        timeline.add("[0]", 3.0, "d")
+        self.assertEqual(timeline.state(0.5), {})
+        self.assertEqual(timeline.state(2.5), {
+            "[0]": (1.0, "a"), "[1]": (2.0, "b")
+        })
+        self.assertEqual(timeline.at("[0]", 3.0), (3.0, "d"))
+        self.assertEqual(timeline.history("[0]"), [(1.0, "a"), (3.0, "d")])
+
+    def test_timelines_match_members(self):
+        trial, data = self.load()
+        timelines = data.timelines
+        self.assertIs(timelines, data.timelines)
+        for member in trial.members:
+            state = timelines.state(member.collection_id, member.checkpoint)
+            self.assertEqual(state[member.key][0], member.checkpoint)
+            self.assertIn(member.id, [
+                record.id for record in
+                timelines.memberships_as_member(member.member_id)
+            ])
@@ -0,0 +1,48 @@
+# Copyright (c) 2021 Universidade Federal Fluminense (UFF)
+# Copyright (c) 2021 Polytechnic Institute of New York University.
+# This file is part of noWorkflow.
+# Please, consult the license terms in the LICENSE file.
+"""Slicing helpers"""
+from __future__ import (absolute_import, print_function,
+                        division, unicode_literals)
+
+from ...now.persistence.models import Trial
+
+
+SCRIPT = (
+    "# script.py\n"
+    "def f(x):\n"
+    "    return x * 2\n"
+    "a = [1, f(2)]\n"
+    "a[0] = f(a[1])\n"
+    "b = {'k': a}\n"
+    "c = 3\n"
+    "d = b['k'][0]\n"
+)
+
+LAST = "b['k'][0]"
+
+
+def contexts(visited, arrow=False):
+    """Return comparable set of NodeContexts"""
+    return {
+        (context.evaluation.id, context.checkpoint, context.is_activation) +
+        ((context.arrow,) if arrow else ())
+        for context in visited
+    }
+
+
+def last_evaluation(trial):
+    """Return evaluation of the last line of SCRIPT"""
+    return next(
+        evaluation for evaluation in trial.evaluations
+        if evaluation.code_component.name == LAST
+    )
+
+
+def load_script(testcase):
+    """Collect SCRIPT in a CollectionTestCase. Return trial and last evaluation"""
+    testcase.script(SCRIPT)
+    testcase.clean_execution()
+    trial = Trial()
+    return trial, last_evaluation(trial)
@@ -0,0 +1,119 @@
+# Copyright (c) 2016 Universidade Federal Fluminense (UFF)
+# Copyright (c) 2016 Polytechnic Institute of New York University.
+# This file is part of noWorkflow.
+# Please, consult the license terms in the LICENSE file.
+"""Test now.models.graphs.history_graph module"""
+from __future__ import (absolute_import, print_function,
+                        division, unicode_literals)
+
+import unittest
+
+from collections import OrderedDict
+
+from ..now.models.graphs.history_graph import AncestorGraph, HistoryGraph
+
+
+class FakeHistory(object):
+    """History filters"""
+
+    def __init__(self, script="*", status="*"):
+        self.script = script
+        self.status = status
+        self.summarize = False
+
+
+class FakeTrial(object):
+    """Trial fields used by HistoryGraph"""
+
+    def __init__(self, tid, parent_id, script="main.py", status="finished"):
+        self.id = tid
+        self.parent_id = parent_id
+        self.script = script
+        self.status = status
+        self.nid = None
+
+    def match_status(self, status):
+        return status == "*" or status == self.status
+
+    def match_script(self, script):
+        return script == "*" or script == self.script
+
+
+def floyd_edges(trials, visible):
+    """Return edges computed by the previous all-pairs distance graph"""
+    inf = float("inf")
+    graph = {trial.id: {other.id: inf for other in trials} for trial in trials}
+    for trial in trials:
+        graph[trial.id][trial.id] = 0
+        if trial.parent_id in graph:
+            graph[trial.id][trial.parent_id] = 1
+    for k in graph:
+        for i in graph:
+            for j in graph:
+                graph[i][j] = min(graph[i][j], graph[i][k] + graph[k][j])
+    edges = set()
+    for trial in trials:
+        if trial.id not in visible:
+            continue
+        distances = [
+            (dist, target) for target, dist in graph[trial.id].items()
+            if target != trial.id and target in visible and dist != inf
+        ]
+        edges.add((trial.id, min(distances)[1] if distances else trial.id))
+    return edges
+
+
+class TestHistoryGraph(unittest.TestCase):
+    """TestCase for HistoryGraph edges"""
+    # pylint: disable=missing-docstring
+
+    def trials(self):
+        parents = [None, 1, 2, 2, 4, 3, 6, 1, None, 9, 5, 11, 12, 99]
+        return [
+            FakeTrial(
+                tid, parent,
+                script="other.py" if tid % 4 == 0 else "main.py",
+                status="backup" if tid % 3 == 0 else "finished",
+            )
+            for tid, parent in enumerate(parents, 1)
+        ]
+
+    def edges(self, history, trials):
+        graph = HistoryGraph(history)
+        tmap = OrderedDict((trial.id, trial) for trial in reversed(trials))
+        ancestors = graph._create_graph(tmap)                                # pylint: disable=protected-access
+        nodes, _ = graph._filter_graph(tmap, ancestors)                       # pylint: disable=protected-access
+        edges = set(graph._edges(ancestors, nodes))                           # pylint: disable=protected-access
+        return {node.id for node in nodes}, edges
+
+    def test_edges_match_distance_graph(self):
+        for script, status in [("*", "*"), ("*", "finished"),
+                               ("main.py", "*"), ("main.py", "finished")]:
+            trials = self.trials()
+            visible, edges = self.edges(FakeHistory(script, status), trials)
+            self.assertEqual(edges, floyd_edges(trials, visible))
+        self.assertIn((7, 2), edges)
+
+    def test_nearest_with_several_parents(self):
+        graph = AncestorGraph()
+        for node, parent in [(1, None), (2, 1), (3, 1), (4, 2), (4, 3),
+                             (5, 4), (6, 5)]:
+            graph.add(node, parent)
+        graph.hide(2)
+        self.assertEqual(graph.nearest(6), 5)
+        graph.hide(5)
+        graph.hide(4)
+        self.assertEqual(graph.nearest(6), 3)
+        graph.hide(3)
+        self.assertEqual(graph.nearest(6), 1)
+        self.assertIsNone(graph.nearest(1))
+
+    def test_nearest_in_long_branch(self):
+        graph = AncestorGraph()
+        for node in range(100000):
+            graph.add(node, node - 1 if node else None)
+            if node % 1000:
+                graph.hide(node)
+        self.assertEqual(graph.nearest(99999), 99000)
+        self.assertEqual(graph.nearest(5000), 4000)
+        self.assertIsNone(graph.nearest(0))
@@ -0,0 +1,18 @@
+# Copyright (c) 2016 Universidade Federal Fluminense (UFF)
+# Copyright (c) 2016 Polytechnic Institute of New York University.
+# This file is part of noWorkflow.
+# Please, consult the license terms in the LICENSE file.
+"""Test provenance storage"""
+
+from __future__ import (absolute_import, print_function,
+                        division)
+
+from .test_file_hash_cache import TestFileHashCache
+from .test_relational_database import TestRelationalDatabase
+from .test_content_engines import TestContentEngines
+
+__all__ = [
+    "TestFileHashCache",
+    "TestRelationalDatabase",
+    "TestContentEngines",
+]
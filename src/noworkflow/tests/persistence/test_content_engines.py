@@ -0,0 +1,379 @@
+# Copyright (c) 2016 Universidade Federal Fluminense (UFF)
+# Copyright (c) 2016 Polytechnic Institute of New York University.
+# This file is part of noWorkflow.
+# Please, consult the license terms in the LICENSE file.
+"""Test content database engines"""
+from __future__ import (absolute_import, print_function,
+                        division, unicode_literals)
+
+import hashlib
+import os
+import pickle
+import shutil
+import tempfile
+import threading
+import unittest
+
+from ...now.persistence.config import PersistenceConfig
+from ...now.persistence.content import compression
+from ...now.persistence.content.cache import ContentCache
+from ...now.persistence.content import git_system
+from ...now.persistence.content.pack_engine import PackEngine
+from ...now.persistence.content.puregit_engine import PureGitEngine
+from ...now.persistence.content.plain_engine import PlainEngine
+from ...now.persistence.content.plain_engine import ThreadingPlainEngine
+from ...now.persistence.content.plain_engine import DistributedPlainEngine
+from ...now.persistence.content.plain_engine import PoolPlainEngine
+from ...now.persistence.content import parallel
+from ...now.persistence.content.parallel import BoundedThreadPool
+from ...now.persistence.content_database import ContentDatabase
+from ...now.persistence import content
+
+
+def content_engine(cls, directory, codec=None):
+    """Create connected content engine in directory"""
+    config = PersistenceConfig()
+    config.path = directory
+    config.content_compression = codec
+    engine = cls(config)
+    engine.set_path(config)
+    engine.connect(config)
+    return engine
+
+
+class TestContentEngines(unittest.TestCase):
+    """Test content engines, compression, and caches"""
+
+    def test_pack_engine_appends_blobs_to_pack(self):
+        """Test pack engine stores blobs in a pack with a sorted index"""
+        directory = tempfile.mkdtemp()
+        engine = content_engine(PackEngine, directory)
+        other = content_engine(PackEngine, directory)
+        try:
+            hashes = [engine.put(str(index).encode()) for index in range(50)]
+            pack_size = os.path.getsize(engine.pack_path(0))
+            self.assertEqual(engine.put(b"7"), hashes[7])
+            self.assertEqual(os.path.getsize(engine.pack_path(0)), pack_size)
+            # Other appenders see blobs in the journal
+            self.assertEqual(other.get(hashes[3]), b"3")
+            hashes.append(other.put(b"other"))
+            self.assertEqual(hashes[-1], hashlib.sha1(b"other").hexdigest())
+            engine.commit_content("merge")
+            self.assertEqual(os.path.getsize(engine.journal_path), 0)
+            self.assertEqual(sorted(engine.list_hashes()), sorted(hashes))
+            self.assertEqual(other.get(hashes[42]), b"42")
+            self.assertEqual(engine.find_subhash(hashes[9][:7]), hashes[9])
+            self.assertIsNone(engine.find_subhash("0" * 40))
+            self.assertIsNone(engine.find_subhash("trial1"))
+            self.assertRaises(KeyError, engine.get, "0" * 40)
+        finally:
+            engine.close()
+            other.close()
+            with content.use_safe_open():
+                shutil.rmtree(directory)
+
+    def test_pack_engine_imports_plain_layout(self):
+        """Test pack engine migrates blobs of the plain layout"""
+        directory = tempfile.mkdtemp()
+        plain = content_engine(PlainEngine, directory)
+        hashes = {plain.put(str(index).encode(), "f"): str(index).encode()
+                  for index in range(20)}
+        engine = content_engine(PackEngine, directory)
+        try:
+            self.assertEqual(engine.import_plain(plain.content_path), 20)
+            self.assertFalse(os.path.exists(plain.content_path))
+            self.assertEqual({
+                content_hash: engine.get(content_hash) for content_hash in hashes
+            }, hashes)
+            first = min(hashes)
+            self.assertEqual(engine.find_subhash(first[:3]), first)
+        finally:
+            engine.close()
+            with content.use_safe_open():
+                shutil.rmtree(directory)
+
+    def test_compression_keeps_small_blobs_raw(self):
+        """Test compression header, threshold, and raw blobs with magic"""
+        codec = compression.get_codec("zlib")
+        large = b"abc" * 1000
+        encoded = compression.encode(large, codec, threshold=100)
+        self.assertTrue(encoded.startswith(compression.header(codec)))
+        self.assertLess(len(encoded), len(large))
+        self.assertEqual(compression.decode(encoded), large)
+        small = b"abc" * 10
+        self.assertEqual(compression.encode(small, codec, 100), small)
+        magic = compression.MAGIC + b"raw"
+        encoded = compression.encode(magic, None)
+        self.assertNotEqual(encoded, magic)
+        self.assertEqual(compression.decode(encoded), magic)
+        self.assertRaises(ValueError, compression.get_codec, "unknown")
+
+    def test_plain_engine_compresses_and_recompresses_blobs(self):
+        """Test plain engine decompresses blobs transparently"""
+        directory = tempfile.mkdtemp()
+        engine = content_engine(PlainEngine, directory, "zlib")
+        large = b"0123456789" * 1000
+        descriptor, path = tempfile.mkstemp(dir=directory)
+        os.write(descriptor, large + b"file")
+        os.close(descriptor)
+        try:
+            hashes = [
+                engine.put(large, "large"), engine.put(b"small", "small"),
+                engine.put_file(path)
+            ]
+            self.assertEqual(hashes[0], hashlib.sha1(large).hexdigest())
+            self.assertEqual(
+                [engine.get(content_hash) for content_hash in hashes],
+                [large, b"small", large + b"file"]
+            )
+            blob = os.path.join(
+                engine.content_path, hashes[0][:2], hashes[0][2:]
+            )
+            self.assertLess(os.path.getsize(blob), len(large))
+            engine.compression = None
+            count, before, after = engine.recompress()
+            self.assertEqual(count, 3)
+            self.assertLess(before, after)
+            self.assertEqual(os.path.getsize(blob), len(large))
+            self.assertEqual(engine.get(hashes[2]), large + b"file")
+        finally:
+            with content.use_safe_open():
+                shutil.rmtree(directory)
+
+    def test_plain_engine_put_file_from_threads(self):
+        """Test plain engine threads do not share temporary files"""
+        directory = tempfile.mkdtemp()
+        engine = content_engine(PlainEngine, directory)
+        paths = []
+        for index in range(8):
+            descriptor, path = tempfile.mkstemp(dir=directory)
+            os.write(descriptor, str(index).encode() * 100000)
+            os.close(descriptor)
+            paths.append(path)
+        hashes = {}
+
+        def put_file(path):
+            """Put file and keep its hash"""
+            hashes[path] = engine.put_file(path)
+
+        threads = [
+            threading.Thread(target=put_file, args=(path,)) for path in paths
+        ]
+        try:
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            self.assertEqual(
+                [engine.get(hashes[path]) for path in paths],
+                [str(index).encode() * 100000 for index in range(8)]
+            )
+            self.assertEqual([
+                name for name in os.listdir(engine.content_path)
+                if name.endswith(".tmp")
+            ], [])
+        finally:
+            with content.use_safe_open():
+                shutil.rmtree(directory)
+
+    def test_pack_engine_compresses_and_recompresses_blobs(self):
+        """Test pack engine rewrites packs with the current compression"""
+        directory = tempfile.mkdtemp()
+        engine = content_engine(PackEngine, directory)
+        other = content_engine(PackEngine, directory)
+        large = b"0123456789" * 1000
+        try:
+            hashes = [engine.put(large), other.put(b"small")]
+            engine.compression = "zlib"
+            hashes.append(engine.put(large + b"zlib"))
+            self.assertEqual(engine.recompress()[0], 3)
+            self.assertEqual(os.listdir(engine.content_path).count(
+                "pack-000000.pack"
+            ), 0)
+            self.assertLess(os.path.getsize(engine.pack_path(1)), len(large))
+            # Other appenders reopen packs removed by recompress
+            hashes.append(other.put(b"after"))
+            self.assertEqual(
+                [engine.get(content_hash) for content_hash in hashes],
+                [large, b"small", large + b"zlib", b"after"]
+            )
+        finally:
+            engine.close()
+            other.close()
+            with content.use_safe_open():
+                shutil.rmtree(directory)
+
+    def test_bounded_thread_pool_blocks_when_queue_is_full(self):
+        """Test content thread pool applies backpressure by queued bytes"""
+        release = threading.Event()
+        done = []
+        pool = BoundedThreadPool(1, 10).start()
+        pool.submit(8, release.wait)
+        submitter = threading.Thread(
+            target=pool.submit, args=(8, done.append, "second")
+        )
+        submitter.start()
+        submitter.join(0.2)
+        self.assertTrue(submitter.is_alive())
+        self.assertEqual(len(pool.tasks), 0)
+        release.set()
+        submitter.join()
+        pool.close()
+        self.assertEqual(done, ["second"])
+        self.assertEqual(pool.pending_bytes, 0)
+
+    def test_threading_engine_uses_bounded_pool(self):
+        """Test threading content engine hashes once and limits threads"""
+        directory = tempfile.mkdtemp()
+        config = PersistenceConfig()
+        config.path = directory
+        config.content_workers = 2
+        engine = ThreadingPlainEngine(config)
+        engine.connect(config)
+        calls = []
+        original_do_put = engine.do_put
+
+        def do_put(*args):
+            """Record precomputed hash"""
+            calls.append(args[-1])
+            return original_do_put(*args)
+
+        engine.do_put = do_put
+        try:
+            hashes = [engine.put(str(index).encode()) for index in range(100)]
+            self.assertEqual(len(engine.pool.threads), 2)
+            engine.close()
+            self.assertIsNone(engine.pool)
+            self.assertEqual(sorted(calls), sorted(hashes))
+            self.assertEqual(engine.get(hashes[42]), b"42")
+        finally:
+            engine.close()
+            with content.use_safe_open():
+                shutil.rmtree(directory)
+
+    def test_pack_task_sends_large_contents_out_of_band(self):
+        """Test tasks carry handles of large contents and local markers"""
+        engine = type(str("Engine"), (object,), {})()
+        engine.object_hashes, engine.lock = {}, threading.Lock()
+        large = b"x" * parallel.SHARED_PAYLOAD_THRESHOLD
+        task = parallel.pack_task(
+            engine, ("path", engine.object_hashes, engine.lock, large, None),
+            large
+        )
+        self.assertIsInstance(task[3], parallel.SharedPayload)
+        self.assertEqual(task[1:3], (parallel.OBJECT_HASHES, parallel.LOCK))
+        self.assertIsNone(task[4])
+        task = pickle.loads(pickle.dumps(task))
+        local_hashes, local_lock = {}, threading.Lock()
+        with parallel.unpack_task(
+                task, local_hashes, local_lock, False) as attrs:
+            self.assertEqual(
+                attrs, ("path", local_hashes, local_lock, large, None)
+            )
+        small = parallel.pack_task(engine, (b"small",), b"small")
+        self.assertEqual(small, (b"small",))
+
+    def test_process_engines_store_shared_payloads(self):
+        """Test distributed and pool engines store contents of any size"""
+        blobs = [b"small", b"y" * parallel.SHARED_PAYLOAD_THRESHOLD * 2]
+        for engine_cls in (DistributedPlainEngine, PoolPlainEngine):
+            directory = tempfile.mkdtemp()
+            engine = content_engine(engine_cls, directory)
+            try:
+                hashes = [engine.put(blob, "blob") for blob in blobs]
+                engine.close()
+                self.assertEqual([engine.get(h) for h in hashes], blobs)
+            finally:
+                with content.use_safe_open():
+                    shutil.rmtree(directory)
+
+    @unittest.skipUnless(shutil.which("git"), "requires git")
+    def test_git_commit_rewrites_only_changed_trees(self):
+        """Test commit_content reuses trees of unchanged directories"""
+        directory = tempfile.mkdtemp()
+        with content.use_safe_open():
+            engine = content_engine(PureGitEngine, directory)
+        updated, indexed = [], []
+        original_update_tree = engine.update_tree
+        original_update_index_info = git_system.update_index_info
+
+        def update_tree(dirname, entries, changed):
+            """Record rewritten trees"""
+            updated.append(dirname)
+            return original_update_tree(dirname, entries, changed)
+
+        def update_index_info(entries, git_path):
+            """Record update-index calls"""
+            indexed.append(sorted(name for _, _, name in entries))
+            return original_update_index_info(entries, git_path)
+
+        engine.update_tree = update_tree
+        git_system.update_index_info = update_index_info
+        join = os.path.join
+        try:
+            with content.use_safe_open():
+                engine.put(b"a", join(directory, "a", "x.py"))
+                engine.put(b"b", join(directory, "b", "c", "y.py"))
+                engine.commit_content("first")
+                self.assertEqual(sorted(updated), ["", "a", "b", "b/c"])
+                self.assertEqual(indexed, [["a/x.py", "b/c/y.py"]])
+                del updated[:], indexed[:]
+                engine.put(b"z", join(directory, "a", "z.py"))
+                commit = engine.commit_content("second")
+                self.assertEqual(sorted(updated), ["", "a"])
+                self.assertEqual(indexed, [["a/z.py"]])
+                files = git_system.execute(
+                    ["git", "ls-tree", "-r", "--name-only", commit],
+                    cwd=engine.content_path
+                ).decode().split()
+            self.assertEqual(files, ["a/x.py", "a/z.py", "b/c/y.py"])
+        finally:
+            git_system.update_index_info = original_update_index_info
+            with content.use_safe_open():
+                shutil.rmtree(directory)
+
+    def test_content_cache_evicts_least_recently_used(self):
+        """Test content cache keeps the byte budget"""
+        cache = ContentCache(max_bytes=8)
+        cache.put("a", b"aaa")
+        cache.put("b", b"bbb")
+        self.assertEqual(cache.get("a"), b"aaa")
+        cache.put("c", b"ccc")
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("c"), b"ccc")
+        cache.put("d", b"too large")
+        self.assertIsNone(cache.get("d"))
+        self.assertEqual(cache.stats(), {
+            "hits": 2, "misses": 2, "evictions": 1,
+            "entries": 2, "bytes": 6,
+        })
+
+    def test_content_database_caches_reads(self):
+        """Test content database reads each blob from the engine once"""
+        directory = tempfile.mkdtemp()
+        config = PersistenceConfig()
+        config.content_engine = "plain"
+        config.path = directory
+        database = ContentDatabase(config)
+        try:
+            with content.use_safe_open():
+                database.connect(config)
+                content_hash = database.put(b"cached", "a.py")
+                database.commit_content("first")
+                reads = []
+                engine_get = database.content_database_engine.get
+
+                def get(content_hash):
+                    """Record engine reads"""
+                    reads.append(content_hash)
+                    return engine_get(content_hash)
+
+                database.content_database_engine.get = get
+                self.assertEqual(database.get(content_hash), b"cached")
+                self.assertEqual(database.get(content_hash), b"cached")
+            self.assertEqual(reads, [content_hash])
+            self.assertEqual(database.cache.hits, 1)
+            self.assertEqual(database.cache.misses, 1)
+        finally:
+            with content.use_safe_open():
+                shutil.rmtree(directory)
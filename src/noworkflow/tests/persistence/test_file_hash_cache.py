@@ -0,0 +1,70 @@
+# Copyright (c) 2016 Universidade Federal Fluminense (UFF)
+# Copyright (c) 2016 Polytechnic Institute of New York University.
+# This file is part of noWorkflow.
+# Please, consult the license terms in the LICENSE file.
+"""Test file hash cache"""
+from __future__ import (absolute_import, print_function,
+                        division, unicode_literals)
+
+import hashlib
+import os
+import tempfile
+import unittest
+
+from ...now.persistence.config import PersistenceConfig
+from ...now.persistence.file_hash_cache import FileHashCache
+from ...now.persistence import content
+
+
+class TestFileHashCache(unittest.TestCase):
+    """Test FileHashCache"""
+
+    def test_file_hash_cache_skips_unchanged_files(self):
+        """Test file hash cache does not read unchanged files again"""
+        cache = FileHashCache(PersistenceConfig(), content)
+        descriptor, path = tempfile.mkstemp()
+        os.write(descriptor, b"abc")
+        os.close(descriptor)
+        os.utime(path, (1000000000, 1000000000))
+        stored = []
+        original_put_file = content.put_file
+        def put_file(path, filename="generic"):
+            """Count stored files"""
+            stored.append(path)
+            return original_put_file(path, filename)
+        content.put_file = put_file
+        try:
+            first = cache.content_hash(path)
+            self.assertEqual(cache.content_hash(path), first)
+            self.assertEqual(stored, [path])
+            with content.std_open(path, "wb") as fil:
+                fil.write(b"abcd")
+            os.utime(path, (1000000001, 1000000001))
+            second = cache.content_hash(path)
+            self.assertEqual(stored, [path, path])
+            self.assertEqual(content.get(second), b"abcd")
+        finally:
+            content.put_file = original_put_file
+            os.remove(path)
+
+    def test_file_hash_cache_only_hashes_large_files(self):
+        """Test file hash cache does not store files larger than limit"""
+        cache = FileHashCache(PersistenceConfig(), content)
+        descriptor, path = tempfile.mkstemp()
+        os.write(descriptor, b"large content")
+        os.close(descriptor)
+        os.utime(path, (1000000000, 1000000000))
+        try:
+            content_hash = cache.content_hash(path, size_limit=5)
+            self.assertEqual(
+                content_hash, hashlib.sha1(b"large content").hexdigest()
+            )
+            self.assertNotIn(content_hash, content.temp)
+            self.assertEqual(cache.content_hash(path, size_limit=5), content_hash)
+            self.assertNotIn(content_hash, content.temp)
+            # A later access without the limit stores the content
+            self.assertEqual(cache.content_hash(path), content_hash)
+            self.assertEqual(content.get(content_hash), b"large content")
+            self.assertEqual(list(cache.hashes.values()), [(content_hash, True)])
+        finally:
+            os.remove(path)
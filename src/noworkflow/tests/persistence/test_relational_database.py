@@ -0,0 +1,195 @@
+# Copyright (c) 2016 Universidade Federal Fluminense (UFF)
+# Copyright (c) 2016 Polytechnic Institute of New York University.
+# This file is part of noWorkflow.
+# Please, consult the license terms in the LICENSE file.
+"""Test relational database storage"""
+from __future__ import (absolute_import, print_function,
+                        division, unicode_literals)
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from sqlalchemy import event
+
+from ...now.persistence.lightweight import ObjectStore, DependencyLW
+from ...now.persistence.lightweight import EvaluationLW, MemberLW
+from ...now.persistence.config import PersistenceConfig
+from ...now.persistence.relational_database import RelationalDatabase
+from ...now.persistence.models import Dependency, Evaluation
+from ...now.persistence.models.base import proxy, proxy_gen
+from ...now.persistence import relational, content
+
+
+class TestRelationalDatabase(unittest.TestCase):
+    """Test RelationalDatabase configuration and bulk storage"""
+
+    def test_fast_storage_profile_configures_sqlite(self):
+        """Test fast storage profile enables WAL and relaxed synchronous"""
+        directory = tempfile.mkdtemp()
+        config = PersistenceConfig()
+        config.storage_profile = "fast"
+        database = RelationalDatabase(config)
+        config.path = directory
+        os.makedirs(config.provenance_path)
+        config.connect()
+        conn = database.engine.connect()
+        try:
+            self.assertEqual(
+                conn.exec_driver_sql("PRAGMA journal_mode").scalar(), "wal"
+            )
+            self.assertEqual(
+                conn.exec_driver_sql("PRAGMA synchronous").scalar(), 1
+            )
+        finally:
+            conn.close()
+            database.engine.dispose()
+            with content.use_safe_open():
+                shutil.rmtree(directory)
+
+    def test_migrate_creates_composite_indexes(self):
+        """Test migrate creates missing or outdated indexes and runs ANALYZE"""
+        directory = tempfile.mkdtemp()
+        config = PersistenceConfig()
+        database = RelationalDatabase(config)
+        database.base = relational.base
+        config.path = directory
+        os.makedirs(config.provenance_path)
+        config.connect()
+        with database.transaction() as conn:
+            conn.exec_driver_sql(
+                "DROP INDEX ix_dependency_trial_id_dependent_id"
+            )
+            # Index of a previous version, without id
+            conn.exec_driver_sql("DROP INDEX ix_member_trial_id_member_id")
+            conn.exec_driver_sql(
+                "CREATE INDEX ix_member_trial_id_member_id "
+                "ON member (trial_id, member_id)"
+            )
+        conn = database.engine.connect()
+        try:
+            self.assertEqual(sorted(database.migrate()), [
+                "ix_dependency_trial_id_dependent_id",
+                "ix_member_trial_id_member_id",
+            ])
+            self.assertEqual(database.migrate(analyze=False), [])
+            plan = conn.exec_driver_sql(
+                "EXPLAIN QUERY PLAN SELECT * FROM dependency "
+                "WHERE trial_id = 'a' AND dependent_id = 1"
+            ).fetchall()
+            self.assertIn(
+                "ix_dependency_trial_id_dependent_id",
+                " ".join(str(row[-1]) for row in plan)
+            )
+            self.assertTrue(conn.exec_driver_sql(
+                "SELECT name FROM sqlite_master WHERE name = 'sqlite_stat1'"
+            ).fetchall())
+        finally:
+            conn.close()
+            database.engine.dispose()
+            with content.use_safe_open():
+                shutil.rmtree(directory)
+
+    def test_relationship_loads_use_composite_indexes(self):
+        """Test ordered relationship loads search (trial_id, fk, id) indexes
+        The indexes cover the order by id. Thus, SQLite neither scans the
+        whole trial with the primary key nor sorts the rows"""
+        trial_id = "plans"
+        evaluations = ObjectStore(EvaluationLW)
+        for _ in range(3):
+            evaluations.add(trial_id, 1, 1, 0.0, "1")
+        dependencies = ObjectStore(DependencyLW)
+        dependencies.add(trial_id, 1, 2, 1, 1, "assign", False, None, None, None)
+        members = ObjectStore(MemberLW)
+        members.add(trial_id, 1, 3, 1, 1, "[0]", 0.0, "Put")
+        with relational.transaction() as conn:
+            evaluations.do_store(False, conn)
+            dependencies.do_store(False, conn)
+            members.do_store(False, conn)
+        statements = []
+
+        def record_statement(*args):                                             # pylint: disable=unused-argument
+            """Record executed statements"""
+            statements.append((args[2], args[3]))
+
+        session = relational.make_session()
+        evaluation = session.query(Evaluation.m).filter(
+            Evaluation.m.trial_id == trial_id, Evaluation.m.id == 1
+        ).one()
+        event.listen(relational.engine, "before_cursor_execute", record_statement)
+        try:
+            self.assertEqual(len(evaluation.dependencies_as_dependency), 1)
+            self.assertEqual(len(evaluation.memberships_as_member), 1)
+            self.assertEqual(len(evaluation.dependents), 1)
+        finally:
+            event.remove(
+                relational.engine, "before_cursor_execute", record_statement
+            )
+        session.remove()
+        self.assertEqual(len(statements), 3)
+        expected = ["ix_dependency_trial_id_", "ix_member_trial_id_",
+                    "ix_dependency_trial_id_"]
+        conn = relational.engine.connect()
+        try:
+            for (statement, parameters), index in zip(statements, expected):
+                plan = " ".join(str(row[-1]) for row in conn.exec_driver_sql(
+                    "EXPLAIN QUERY PLAN " + statement, parameters
+                ))
+                self.assertIn(index, plan)
+                self.assertNotIn("TEMP B-TREE", plan)
+        finally:
+            conn.close()
+
+    def test_insert_many_stores_objects_in_transaction(self):
+        """Test insert_many stores tuples and fills column defaults"""
+        trial_id = "insert_many"
+        store = ObjectStore(DependencyLW)
+        store.add(trial_id, 1, 2, 1, 3, "argument", True, None, None, None)
+        store.add(trial_id, 1, 4, 1, 5, "assign", False, None, None, None)
+        with relational.transaction() as conn:
+            store.do_store(False, conn)
+        dependencies = relational.session.query(Dependency.m).filter(
+            Dependency.m.trial_id == trial_id
+        ).order_by(Dependency.m.id).all()
+        self.assertEqual(
+            [(dep.dependency_id, dep.type, dep.reference)
+             for dep in dependencies],
+            [(3, "argument", True), (5, "assign", False)]
+        )
+
+    def test_proxy_gen_hydrates_loaded_rows(self):
+        """Test proxy_gen does not refetch rows and shares proxies"""
+        trial_id = "hydration"
+        store = ObjectStore(DependencyLW)
+        for index in range(10):
+            store.add(trial_id, 1, index, 1, index, "assign", False,
+                      None, None, None)
+        with relational.transaction() as conn:
+            store.do_store(False, conn)
+        statements = []
+
+        def count_statement(*args):                                              # pylint: disable=unused-argument
+            """Count executed statements"""
+            statements.append(args[2])
+
+        session = relational.make_session()
+        event.listen(relational.engine, "before_cursor_execute", count_statement)
+        try:
+            dependencies = list(proxy_gen(session.query(Dependency.m).filter(
+                Dependency.m.trial_id == trial_id
+            )))
+        finally:
+            event.remove(
+                relational.engine, "before_cursor_execute", count_statement
+            )
+        self.assertEqual(len(statements), 1)
+        self.assertEqual(len(dependencies), 10)
+        self.assertEqual(
+            sorted(dep.dependency_id for dep in dependencies), list(range(10))
+        )
+        element = session.query(Dependency.m).filter(
+            Dependency.m.trial_id == trial_id
+        ).first()
+        self.assertIs(proxy(element), proxy(element))
+        session.remove()
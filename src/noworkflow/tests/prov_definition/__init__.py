@@ -10,9 +10,11 @@ from __future__ import (absolute_import, print_function,
 from .test_code_block_definition import TestCodeBlockDefinition
 from .test_code_component_definition import TestCodeComponentDefinition
 from .test_reconstruction import TestReconstruction
+from .test_code_cache_definition import TestCodeCacheDefinition
 
 __all__ = [
     "TestCodeBlockDefinition",
     "TestCodeComponentDefinition",
     "TestReconstruction",
+    "TestCodeCacheDefinition",
 ]
@@ -0,0 +1,127 @@
+# Copyright (c) 2016 Universidade Federal Fluminense (UFF)
+# Copyright (c) 2016 Polytechnic Institute of New York University.
+# This file is part of noWorkflow.
+# Please, consult the license terms in the LICENSE file.
+"""Test code cache of definition provenance"""
+from __future__ import (absolute_import, print_function,
+                        division, unicode_literals)
+
+import os
+import shutil
+import tempfile
+
+from ...now.persistence import code_cache
+from ...now.persistence.code_cache import CACHE_ENTRIES
+
+from ..collection_testcase import CollectionTestCase
+
+
+CODE = ("# script.py\n"
+        "def f(x):\n"
+        "    'fdoc'\n"
+        "    return [x, x + 1]\n"
+        "a = f(2)\n"
+        "# other")
+
+
+def components(metascript):
+    """Return code component rows without trial id"""
+    return [
+        (comp.id, comp.name, comp.type, comp.mode,
+         comp.first_char_line, comp.first_char_column,
+         comp.last_char_line, comp.last_char_column, comp.container_id)
+        for comp in metascript.code_components_store.values()
+    ]
+
+
+def compositions(metascript):
+    """Return composition rows without trial id"""
+    return [
+        (comp.id, comp.part_id, comp.whole_id, comp.type, comp.position,
+         comp.extra)
+        for comp in metascript.compositions_store.values()
+    ]
+
+
+class TestCodeCacheDefinition(CollectionTestCase):
+    """Test code cache of definition provenance"""
+    # pylint: disable=invalid-name
+
+    def setUp(self):
+        self.cache_path = tempfile.mkdtemp()
+        code_cache.cache_path = self.cache_path
+
+    def tearDown(self):
+        code_cache.cache_path = None
+        shutil.rmtree(self.cache_path, ignore_errors=True)
+
+    def compile_code(self, code=CODE, **kwargs):
+        """Compile code in a new metascript. Return metascript and code"""
+        self.script(code, **kwargs)
+        compiled = self.metascript.definition.compile(
+            self.metascript.code, self.metascript.path, "exec"
+        )
+        return self.metascript, compiled
+
+    def count_entries(self):
+        """Count cache files"""
+        return sum(len(files) for _, _, files in os.walk(self.cache_path))
+
+    def entries(self):
+        """Return paths of cache files"""
+        return {
+            os.path.join(directory, name)
+            for directory, _, files in os.walk(self.cache_path)
+            for name in files
+        }
+
+    def test_cache_replays_definition_provenance(self):
+        """Test second compilation replays components, blocks and compositions"""
+        first, first_code = self.compile_code()
+        self.assertEqual(self.count_entries(), 1)
+        second, second_code = self.compile_code()
+        self.assertEqual(self.count_entries(), 1)
+
+        self.assertEqual(components(first), components(second))
+        self.assertEqual(compositions(first), compositions(second))
+        self.assertEqual(
+            sorted(first.code_blocks_store.store),
+            sorted(second.code_blocks_store.store)
+        )
+        function = [comp for comp in components(second) if comp[1] == "f"][0]
+        block = second.code_blocks_store[function[0]]
+        self.assertEqual(block.docstring, "fdoc")
+        self.assertEqual(first_code.co_code, second_code.co_code)
+
+    def test_cache_key_depends_on_options(self):
+        """Test transformer options create new cache entries"""
+        self.compile_code()
+        self.compile_code(coarse_granularity=True)
+        self.assertEqual(self.count_entries(), 2)
+        self.compile_code(CODE + "\nb = 1")
+        self.assertEqual(self.count_entries(), 3)
+
+    def test_cache_evicts_least_recently_used_entries(self):
+        """Test cache keeps the max_entries most recently used entries"""
+        code_cache.max_entries = 2
+        try:
+            self.compile_code()
+            first = self.entries()
+            self.compile_code(CODE + "\nb = 1")
+            second = self.entries() - first
+            for path in first | second:
+                os.utime(path, (0, 0))
+            self.compile_code()
+            self.compile_code(CODE + "\nc = 2")
+            entries = self.entries()
+            self.assertEqual(len(entries), 2)
+            self.assertTrue(first <= entries)
+            self.assertFalse(second & entries)
+            self.assertEqual(code_cache.prune(), 0)
+        finally:
+            code_cache.max_entries = CACHE_ENTRIES
+
+    def test_disabled_cache(self):
+        """Test code_cache=False does not create cache entries"""
+        self.compile_code(code_cache=False)
+        self.assertEqual(self.count_entries(), 0)
@@ -8,6 +8,7 @@ from __future__ import (absolute_import, print_function,
                         division, unicode_literals)
 
 
+from ...now.collection.prov_execution.structures import LoopSample
 from ...now.utils.cross_version import PY2, PY3, PY36, only
 from ..collection_testcase import CollectionTestCase
 
@@ -539,6 +540,86 @@ class TestStmtExecution(CollectionTestCase):
         self.assertEqual(var_x1_w.repr, "1")
         self.assertEqual(var_x2_w.repr, "2")
 
+    def test_for_loop_sample(self):
+        self.script("for x in [10, 11, 12, 13, 14, 15]:\n"
+                    "    y = x\n"
+                    "# other", loop_sample=LoopSample(1, 1, 3))
+
+        var_l = self.get_evaluation(name="[10, 11, 12, 13, 14, 15]", mode="r")
+        var_xs_w = self.get_evaluations(name="x", mode="w")
+        var_ys_w = self.get_evaluations(name="y", mode="w")
+
+        self.assertEqual(len(var_xs_w), 4)
+        self.assertEqual(len(var_ys_w), 3)
+        var_x10_w, summary, var_x13_w, var_x15_w = var_xs_w
+
+        self.assertEqual(var_x10_w.repr, "10")
+        self.assertEqual(var_x13_w.repr, "13")
+        self.assertEqual(var_x15_w.repr, "15")
+        self.assertTrue(summary.repr.startswith("<3 skipped iterations in "))
+        self.assertTrue(summary.checkpoint > var_x15_w.checkpoint)
+        self.assert_dependency(summary, var_l, "loop_summary")
+        self.assert_dependency(var_x13_w, summary, "loop_summary")
+        self.assert_dependency(var_x13_w, var_l, "dependency")
+
+    def test_for_loop_sample_without_len(self):
+        self.script("for x in iter([1, 2, 3, 4]):\n"
+                    "    y = x\n"
+                    "# other", loop_sample=LoopSample(2, 1, 0))
+
+        var_xs_w = self.get_evaluations(name="x", mode="w")
+        var_ys_w = self.get_evaluations(name="y", mode="w")
+
+        self.assertEqual(len(var_xs_w), 3)
+        self.assertEqual(len(var_ys_w), 2)
+        self.assertTrue(var_xs_w[2].repr.startswith("<2 skipped iterations"))
+
+    def test_for_loop_sample_break_restores_activation(self):
+        self.script("for x in [1, 2, 3]:\n"
+                    "    break\n"
+                    "z = 1\n"
+                    "# other", loop_sample=LoopSample(0, 0, 0))
+
+        var_z = self.get_evaluation(name="z", mode="w")
+        var_xs_w = self.get_evaluations(name="x", mode="w")
+
+        self.assertIsNotNone(var_z)
+        self.assertEqual(len(var_xs_w), 1)
+        self.assertTrue(var_xs_w[0].repr.startswith("<1 skipped iterations"))
+
+    def test_for_loop_sample_with_calls(self):
+        self.script("def f(x):\n"
+                    "    return x * 2\n"
+                    "for i in [0, 1, 2, 3, 4]:\n"
+                    "    y = f(i)\n"
+                    "    z = len([i])\n"
+                    "w = f(7)\n"
+                    "# other", loop_sample=LoopSample(1, 1, 0))
+
+        var_ys_w = self.get_evaluations(name="y", mode="w")
+        var_zs_w = self.get_evaluations(name="z", mode="w")
+        var_w = self.get_evaluation(name="w", mode="w")
+        calls = self.get_evaluations(name="f(i)")
+
+        self.assertEqual([var.repr for var in var_ys_w], ["0", "8"])
+        self.assertEqual([var.repr for var in var_zs_w], ["1", "1"])
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(var_w.repr, "14")
+        # Calls of skipped iterations do not create members
+        self.assertIsNone(self.find_member(collection_id=-1))
+
+    def test_for_loop_sample_with_nested_loop_and_calls(self):
+        self.script("def f(x):\n"
+                    "    return [x]\n"
+                    "for i in range(4):\n"
+                    "    for j in range(2):\n"
+                    "        y = f(i + j)\n"
+                    "    z = sum(f(i))\n"
+                    "# other", loop_sample=LoopSample(1, 0, 0))
+
+        var_zs_w = self.get_evaluations(name="z", mode="w")
+        self.assertEqual([var.repr for var in var_zs_w], ["0"])
+
     def test_for_loop_variable(self):
         self.script("lis = [1, 2]\n"
                     "for x in lis:\n"
@@ -0,0 +1,359 @@
+# Copyright (c) 2016 Universidade Federal Fluminense (UFF)
+# Copyright (c) 2016 Polytechnic Institute of New York University.
+# This file is part of noWorkflow.
+# Please, consult the license terms in the LICENSE file.
+"""Test partial storage during collection"""
+from __future__ import (absolute_import, print_function,
+                        division, unicode_literals)
+
+import os
+import tempfile
+import threading
+import unittest
+
+from sqlalchemy import create_engine
+
+from ...now.persistence.lightweight import ObjectStore, EvaluationLW
+from ...now.persistence.lightweight import DependencyLW
+from ...now.persistence.lightweight import ColumnarObjectStore
+from ...now.persistence.lightweight import ColumnarEvaluationStore
+from ...now.collection.prov_execution.hot_functions import HotFunctionPolicy
+from ...now.persistence.models import Evaluation, Activation, Dependency
+from ...now.persistence.serializers import BudgetedSerializer, DeferredValue
+from ...now.persistence.serializers import repr_serializer
+from ...now.persistence.serializers import ScientificSerializer
+from ...now.persistence.writer import BackgroundWriter
+from ...now.persistence import relational, content
+
+from ..collection_testcase import CollectionTestCase
+from ..helpers import models
+
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+def count_trial(model, trial_id):
+    """Count tuples from model that belong to trial"""
+    return relational.session.query(model.m).filter(
+        model.m.trial_id == trial_id
+    ).count()
+
+
+class TestStorageExecution(CollectionTestCase):
+    """Test partial storage of execution provenance"""
+    # pylint: disable=invalid-name
+
+    def create_trial(self):
+        """Clear database and create trial for partial storage"""
+        models.meta = self.metascript
+        models.erase_database()
+        self.metascript.trial_id = models.Trial.create(**models.trial_params(
+            script=self.metascript.code,
+            path=self.metascript.path
+        ))
+
+    def test_call_storage_frequency_flushes_complete_objects(self):
+        """Test store complete objects after closing activations"""
+        self.script("# script.py\n"
+                    "def f(x):\n"
+                    "    return x\n"
+                    "for i in range(6):\n"
+                    "    f(i)\n"
+                    "# other", call_storage_frequency=2)
+        self.create_trial()
+        self.metascript.execution.collect_provenance()
+        self.executed = True
+        evaluations = self.metascript.evaluations_store
+        activations = self.metascript.activations_store
+        self.assertLess(evaluations.count, evaluations.id)
+        self.assertLess(activations.count, 8)
+
+    def test_call_storage_frequency_stores_every_evaluation(self):
+        """Test flushed objects and remaining objects reach the database"""
+        self.script("# script.py\n"
+                    "def f(x):\n"
+                    "    return x\n"
+                    "for i in range(6):\n"
+                    "    f(i)\n"
+                    "# other", call_storage_frequency=2)
+        trial_id = self.clean_execution()
+        self.assertEqual(
+            count_trial(Evaluation, trial_id),
+            self.metascript.evaluations_store.id
+        )
+        self.assertEqual(count_trial(Activation, trial_id), 8)
+
+    def test_call_storage_frequency_zero_keeps_objects(self):
+        """Test objects stay in memory without call storage frequency"""
+        self.script("# script.py\n"
+                    "def f(x):\n"
+                    "    return x\n"
+                    "for i in range(6):\n"
+                    "    f(i)\n"
+                    "# other", call_storage_frequency=0)
+        self.execute()
+        evaluations = self.metascript.evaluations_store
+        self.assertEqual(evaluations.count, evaluations.id)
+        self.assertEqual(self.metascript.activations_store.count, 8)
+
+    def test_background_writer_stores_batches(self):
+        """Test background writer stores enqueued objects on close"""
+        path = os.path.join(
+            tempfile.gettempdir(), "now_writer_{}.sqlite".format(os.getpid())
+        )
+        try:
+            engine = create_engine("sqlite:///" + path)
+            relational.base.metadata.create_all(engine)
+            store = ObjectStore(EvaluationLW)
+            for checkpoint in range(1, 6):
+                store.add(7, 1, 0, checkpoint, None)
+            store.add(7, 1, 0, None, None)
+            writer = BackgroundWriter(
+                max_pending=2, batch_size=2, interval=0.01, engine=engine
+            ).start()
+            self.assertTrue(writer.put(Evaluation, store.pop_complete()))
+            writer.close()
+            self.assertEqual(writer.stored, 5)
+            self.assertEqual(store.count, 1)
+            with engine.connect() as conn:
+                result = conn.execute(
+                    Evaluation.t.select().where(Evaluation.t.c.trial_id == 7)
+                ).fetchall()
+            self.assertEqual(len(result), 5)
+            engine.dispose()
+        finally:
+            if os.path.exists(path):
+                os.remove(path)
+
+    def test_background_writer_without_queue_limit(self):
+        """Test background writer with max_pending = 0 does not block"""
+        store = ObjectStore(EvaluationLW)
+        for checkpoint in range(1, 4):
+            store.add(7, 1, 0, checkpoint, None)
+        writer = BackgroundWriter(max_pending=0, interval=0.01)
+        writer.thread = threading.current_thread()  # Pretend it is running
+        thread = threading.Thread(
+            target=writer.put, args=(Evaluation, store.pop_complete())
+        )
+        thread.daemon = True
+        thread.start()
+        thread.join(5)
+        self.assertFalse(thread.is_alive())
+        self.assertEqual(writer.pending, 3)
+        self.assertFalse(writer.full)
+
+    def test_columnar_store_writes_through_live_objects(self):
+        """Test columnar store keeps changes of collected live objects"""
+        store = ColumnarEvaluationStore(EvaluationLW)
+        first = store.add_object(7, 1, 1, None, None)
+        second = store.add_object(7, 2, 1, None, "x")
+        first_id, second_id = first.id, second.id
+        second.set_reference(first)
+        first.members[".__class__"] = second
+        first.members["[0]"] = second
+        first.checkpoint = 2.5
+        first.repr = "[1]"
+        del first, second
+        first = store[first_id]
+        self.assertEqual(first.checkpoint, 2.5)
+        self.assertEqual(first.repr, "[1]")
+        self.assertEqual(first.members[".__class__"].id, second_id)
+        self.assertEqual(first.members.get("[0]").repr, "x")
+        self.assertIsNone(first.members.get("[1]"))
+        self.assertEqual(store[second_id].same().id, first_id)
+
+    def test_columnar_store_references_do_not_keep_objects_alive(self):
+        """Test live evaluations refer to others by id"""
+        store = ColumnarEvaluationStore(EvaluationLW)
+        first = store.add_object(7, 1, 1, None, None)
+        second = store.add_object(7, 2, 1, None, "x")
+        first_id = first.id
+        second.set_reference(first)
+        second.members["[0]"] = first
+        del first
+        self.assertNotIn(first_id, store.live)
+        self.assertEqual(second.same().id, first_id)
+        self.assertIs(second.same(), second.members["[0]"])
+
+    def test_columnar_store_drops_unreferenced_stored_rows(self):
+        """Test columnar store keeps stored rows only while referenced"""
+        store = ColumnarEvaluationStore(EvaluationLW)
+        first = store.add_object(7, 1, 1, None, None)
+        second = store.add_object(7, 2, 1, None, "x")
+        third = store.add_object(7, 3, 1, None, "y")
+        first_id, second_id, third_id = first.id, second.id, third.id
+        third.set_reference(second)
+        second.members["[0]"] = first
+        del first, second, third
+        del store[first_id]
+        del store[second_id]
+        store.clear()
+        self.assertEqual(len(store.ids), 3)
+        self.assertEqual(store.order, [third_id])
+        self.assertEqual(store[third_id].same().members["[0]"].id, first_id)
+        del store[third_id]
+        store.clear()
+        self.assertEqual(len(store.ids), 0)
+        self.assertIsNone(store.lookup(first_id))
+
+    def test_columnar_store_promotes_unexpected_types(self):
+        """Test columnar store keeps values that do not fit the column"""
+        store = ColumnarObjectStore(DependencyLW)
+        id_ = store.add(7, 1, 2, 1, 3, "argument", "maybe", 1, 4, 2 ** 40)
+        store.add(7, 1, 2, 1, 3, "argument", False, None, None, None)
+        dependency = store[id_]
+        self.assertEqual(dependency.reference, "maybe")
+        self.assertEqual(dependency.collection_id, 4)
+        self.assertEqual(dependency.key, 2 ** 40)
+        self.assertEqual(store.order, [1, 2])
+
+    def test_columnar_stores_store_every_object(self):
+        """Test columnar stores reach the database after partial storage"""
+        self.script("# script.py\n"
+                    "def f(x):\n"
+                    "    return [x]\n"
+                    "for i in range(6):\n"
+                    "    f(i)\n"
+                    "# other", call_storage_frequency=2, columnar_stores=True)
+        trial_id = self.clean_execution()
+        self.assertIsInstance(
+            self.metascript.evaluations_store, ColumnarEvaluationStore
+        )
+        self.assertEqual(
+            count_trial(Evaluation, trial_id),
+            self.metascript.evaluations_store.id
+        )
+        self.assertEqual(
+            count_trial(Dependency, trial_id),
+            self.metascript.dependencies_store.id
+        )
+
+    def test_hot_function_is_summarized_after_max_calls(self):
+        """Test hot function calls are aggregated in a summary activation"""
+        self.script("# script.py\n"
+                    "def f(x):\n"
+                    "    return x + 1\n"
+                    "for i in range(5):\n"
+                    "    y = f(i)\n"
+                    "# other", hot_function_calls=2)
+        self.clean_execution()
+        activations = [
+            activation
+            for activation in self.metascript.activations_store.store.values()
+            if activation.name == "f"
+        ]
+        self.assertEqual(len(activations), 3)
+        summary = self.metascript.evaluations_store[activations[-1].id]
+        self.assertTrue(summary.repr.startswith(
+            "<3 summarized calls of f: total="
+        ))
+        self.assertIn("first=(2), last=(4)", summary.repr)
+
+        self.assertGreater(activations[0].code_block_id, 0)
+        self.assertEqual(
+            activations[-1].code_block_id, activations[0].code_block_id
+        )
+
+        var_y = self.get_evaluations(name="y", mode="w")
+        self.assertEqual(len(var_y), 5)
+        self.assert_dependency(var_y[-1], summary, "assign", True)
+
+    def test_hot_function_serializes_arguments_on_call(self):
+        """Test summary represents arguments at call time"""
+        self.script("# script.py\n"
+                    "def f(x):\n"
+                    "    return len(x)\n"
+                    "a = []\n"
+                    "for i in range(4):\n"
+                    "    a.append(i)\n"
+                    "    y = f(a)\n"
+                    "a.append(9)\n"
+                    "# other", hot_function_calls=2)
+        self.clean_execution()
+        activation = [
+            activation
+            for activation in self.metascript.activations_store.store.values()
+            if activation.name == "f"
+        ][-1]
+        summary = self.metascript.evaluations_store[activation.id]
+        self.assertIn(
+            "first=([0, 1, 2]), last=([0, 1, 2, 3])>", summary.repr
+        )
+
+    def test_hot_function_budget_demotes_function(self):
+        """Test hot function policy demotes function after time budget"""
+        def func():
+            """Dummy function"""
+        policy = HotFunctionPolicy(budget=0.5)
+        self.assertIsNone(policy.record(func, 0.3))
+        self.assertIsNone(policy.summary(func))
+        summary = policy.record(func, 0.3)
+        self.assertIs(policy.summary(func), summary)
+        self.assertEqual(summary.reason, "0.600000s in 2 activations")
+        self.assertEqual(policy.report(), [
+            "demoted func after 0.600000s in 2 activations. "
+            "No summarized calls"
+        ])
+
+    def test_budgeted_serializer_truncates_large_values(self):
+        """Test value size limit truncates representations"""
+        serialize = BudgetedSerializer(repr_serializer, size_limit=10)
+        self.assertEqual(serialize([1, 2]), "[1, 2]")
+        self.assertEqual(
+            serialize(list(range(1000))),
+            "[0, ...]"
+        )
+        self.assertEqual(
+            serialize(2 ** 100),
+            "1267650600...<truncated 21 characters>"
+        )
+
+    def test_budgeted_serializer_caches_expensive_types(self):
+        """Test value time limit skips types that were too expensive"""
+        calls = []
+        def slow_serializer(value):
+            """Serializer that is always too slow"""
+            calls.append(value)
+            return repr(value)
+        serialize = BudgetedSerializer(slow_serializer, time_limit=1e-12)
+        self.assertEqual(serialize([1]), "[1]")
+        self.assertEqual(
+            serialize([2]), "<list value too expensive to serialize>"
+        )
+        self.assertEqual(serialize([1, 2]), "[1, 2]")
+        self.assertEqual(calls, [[1], [1, 2]])
+
+    def test_defer_immutable_values_serializes_on_store(self):
+        """Test deferred immutable values reach the database"""
+        self.script("# script.py\n"
+                    "a = 2\n"
+                    "b = [a]\n"
+                    "# other", defer_immutable_values=True)
+        trial_id = self.clean_execution()
+        var_a = self.get_evaluation(name="a", mode="w")
+        var_b = self.get_evaluation(name="b", mode="w")
+        self.assertIsInstance(var_a.repr, DeferredValue)
+        self.assertEqual(var_b.repr, "[2]")
+        stored = relational.session.query(Evaluation.m).filter(
+            Evaluation.m.trial_id == trial_id,
+            Evaluation.m.id == var_a.id
+        ).one()
+        self.assertEqual(stored.repr, "2")
+
+    @unittest.skipIf(numpy is None, "requires numpy")
+    def test_scientific_serializer_summarizes_arrays(self):
+        """Test scientific serializer stores array buffers once"""
+        serialize = ScientificSerializer(store_content=True).serialize
+        data = numpy.arange(6, dtype="int64").reshape(2, 3)
+        result = serialize(data)
+        self.assertTrue(result.startswith(
+            "ndarray(shape=(2, 3), dtype=int64, strides=(24, 8), "
+            "min=0, max=5, sha1="
+        ))
+        content_hash = result.split("now-content:")[1][:-1]
+        self.assertEqual(bytes(content.get(content_hash)), data.tobytes())
+        self.assertEqual(serialize(data.copy()), result)
+        self.assertEqual(serialize([1, 2]), "[1, 2]")
@@ -0,0 +1,106 @@
+# Copyright (c) 2016 Universidade Federal Fluminense (UFF)
+# Copyright (c) 2016 Polytechnic Institute of New York University.
+# This file is part of noWorkflow.
+# Please, consult the license terms in the LICENSE file.
+"""Test 'now' startup cost with python -X importtime
+
+Run as a script to print the import time of each scenario:
+    python src/noworkflow/tests/startup_test.py
+"""
+from __future__ import (absolute_import, print_function,
+                        division, unicode_literals)
+
+import os
+import subprocess
+import sys
+import unittest
+
+from os.path import dirname
+
+
+SRC_DIR = dirname(dirname(dirname(os.path.abspath(__file__))))
+
+LOAD_COMMAND = (
+    "from noworkflow.now.cmd import selected_commands, load_command\n"
+    "for command in selected_commands([{!r}]):\n"
+    "    load_command(*command)\n"
+)
+
+# Scenario -> code
+STARTUP_SCENARIOS = {
+    "import noworkflow": "import noworkflow",
+    "now list": LOAD_COMMAND.format("list"),
+    "now run": LOAD_COMMAND.format("run"),
+}
+
+# Modules that should only be imported by the commands that use them
+HEAVY_MODULES = [
+    "flask", "IPython", "nbformat", "requests", "pkg_resources",
+    "noworkflow.now.vis", "noworkflow.now.models.prospective",
+]
+
+
+def import_times(code):
+    """Run code with -X importtime
+    Return dict of module -> cumulative import time in seconds"""
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(
+        [SRC_DIR] + ([env["PYTHONPATH"]] if env.get("PYTHONPATH") else [])
+    )
+    process = subprocess.Popen(
+        [sys.executable, "-X", "importtime", "-c", code],
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE, env=env
+    )
+    _, stderr = process.communicate()
+    if process.returncode:
+        raise RuntimeError(stderr.decode("utf-8", "replace"))
+    result = {}
+    for line in stderr.decode("utf-8", "replace").splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        try:
+            result[name.strip()] = int(cumulative) / 1e6
+        except ValueError:
+            pass  # Header
+    return result
+
+
+class TestStartup(unittest.TestCase):
+    """TestCase for 'now' startup cost"""
+
+    def check_scenario(self, scenario, forbidden=()):
+        """Check that scenario does not import forbidden modules"""
+        times = import_times(STARTUP_SCENARIOS[scenario])
+        for module in forbidden:
+            self.assertNotIn(module, times, "{} imported {}".format(
+                scenario, module
+            ))
+
+    def test_import_noworkflow_does_not_load_commands(self):
+        """Test 'import noworkflow' does not import command modules"""
+        self.check_scenario(
+            "import noworkflow",
+            HEAVY_MODULES + ["sqlalchemy", "noworkflow.now.cmd.cmd_run"]
+        )
+
+    def test_now_list_loads_only_list_command(self):
+        """Test 'now list' imports only its command"""
+        self.check_scenario(
+            "now list",
+            HEAVY_MODULES + ["noworkflow.now.cmd.cmd_run"]
+        )
+
+    def test_now_run_loads_only_run_command(self):
+        """Test 'now run' imports only its command"""
+        self.check_scenario(
+            "now run",
+            HEAVY_MODULES + ["noworkflow.now.cmd.cmd_show"]
+        )
+
+
+if __name__ == "__main__":
+    for name, scenario_code in sorted(STARTUP_SCENARIOS.items()):
+        print("{}: {:.3f}s".format(
+            name, max(import_times(scenario_code).values())
+        ))
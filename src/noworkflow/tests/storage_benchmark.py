@@ -0,0 +1,77 @@
+# Copyright (c) 2016 Universidade Federal Fluminense (UFF)
+# Copyright (c) 2016 Polytechnic Institute of New York University.
+# This file is part of noWorkflow.
+# Please, consult the license terms in the LICENSE file.
+"""Benchmark the storage of evaluations in SQLite
+
+Compare the previous write path (SQLAlchemy Core insert per store with
+the default SQLite settings) with the storage profiles and the single
+transaction executemany path:
+    python src/noworkflow/tests/storage_benchmark.py [evaluations]
+"""
+from __future__ import (absolute_import, print_function,
+                        division, unicode_literals)
+
+import shutil
+import sys
+import tempfile
+import time
+
+
+def evaluations(count):
+    """Create ObjectStore with count evaluations"""
+    from noworkflow.now.persistence.lightweight import ObjectStore
+    from noworkflow.now.persistence.lightweight import EvaluationLW
+    store = ObjectStore(EvaluationLW)
+    for index in range(count):
+        store.add("trial", index % 1000, index % 100, index * 0.001,
+                  repr(index))
+    return store
+
+
+def core_insert(relational, store):
+    """Previous write path. Autocommitted SQLAlchemy Core insert"""
+    table = store.cls.model.__table__
+    conn = relational.engine.connect()
+    conn.execute(
+        table.insert().prefix_with("OR REPLACE"), *store.generator()
+    )
+    conn.close()
+
+
+def single_transaction(relational, store):
+    """Current write path. Single transaction executemany over tuples"""
+    with relational.transaction() as conn:
+        store.do_store(False, conn)
+
+
+def run(count, profile, write):
+    """Store count evaluations in a new database. Return rows/second"""
+    from noworkflow.now.persistence import persistence_config, relational
+    from noworkflow.now.persistence import models  # pylint: disable=unused-variable
+    directory = tempfile.mkdtemp()
+    try:
+        persistence_config.storage_profile = profile
+        persistence_config.connect(directory)
+        store = evaluations(count)
+        start = time.time()
+        write(relational, store)
+        duration = time.time() - start
+        relational.engine.dispose()
+        return count / duration
+    finally:
+        shutil.rmtree(directory)
+
+
+def main():
+    """Print rows/second of each write path"""
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    for name, profile, write in [
+            ("core insert, default profile", "default", core_insert),
+            ("executemany, default profile", "default", single_transaction),
+            ("executemany, fast profile", "fast", single_transaction)]:
+        print("{}: {:.0f} rows/s".format(name, run(count, profile, write)))
+
+
+if __name__ == "__main__":
+    main()